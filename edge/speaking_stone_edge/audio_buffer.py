@@ -0,0 +1,319 @@
+"""Per-session PCM accumulation with a single copy per byte.
+
+Frame payloads arrive as memoryviews into the websocket message and are copied once
+into a preallocated store that grows geometrically. `snapshot()` hands out a read-only
+memoryview of the buffered audio instead of a `bytes` copy. A store is never
+overwritten while a snapshot of it (or any view derived from one) is still alive: the
+next utterance then moves to a fresh store, so in-flight STT work keeps a stable view.
+Once every snapshot is gone the store is reused, so steady-state ingest allocates
+nothing per utterance.
+
+Memory is bounded per session and globally. In-memory stores stop growing at
+`AUDIO_BUFFER_MEMORY_CAP_BYTES`; longer utterances spill to an unlinked, memory-mapped
+temp file that snapshots (and so Whisper) read in place. Past `AUDIO_BUFFER_MAX_BYTES`
+frames are rejected with `BufferLimitError`. Every in-memory store is charged to a
+process-wide `MemoryBudget`; when it is exhausted new stores go straight to disk, and
+`MemoryBudget.wait_for_room` lets the websocket loop stop reading (TCP backpressure)
+until STT releases audio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from . import protocol
+
+logger = logging.getLogger(__name__)
+
+BytesLike = Union[bytes, bytearray, memoryview]
+Header = Union[protocol.AudioFrameHeader, protocol.FrameSlot]
+
+INITIAL_CAPACITY_BYTES = 64 * 1024  # ~2 s of 16 kHz PCM16
+GROWTH_FACTOR = 2
+
+AUDIO_BUFFER_MEMORY_CAP_BYTES = int(os.getenv("AUDIO_BUFFER_MEMORY_CAP_BYTES", str(60 * 16000 * 2)))  # 60 s
+AUDIO_BUFFER_MAX_BYTES = int(os.getenv("AUDIO_BUFFER_MAX_BYTES", str(10 * 60 * 16000 * 2)))  # 10 min
+AUDIO_SPILL_DIR = os.getenv("AUDIO_SPILL_DIR") or None  # None: the system temp dir
+AUDIO_MEMORY_BUDGET_BYTES = int(os.getenv("AUDIO_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+AUDIO_BACKPRESSURE_HIGH_WATER = float(os.getenv("AUDIO_BACKPRESSURE_HIGH_WATER", "0.9"))
+AUDIO_BACKPRESSURE_MAX_WAIT_MS = float(os.getenv("AUDIO_BACKPRESSURE_MAX_WAIT_MS", "2000"))
+BACKPRESSURE_POLL_S = 0.01
+
+
+class BufferLimitError(ValueError):
+    """The utterance reached the hard per-session ceiling; further frames are rejected."""
+
+    def __init__(self, limit_bytes: int, buffered_bytes: int) -> None:
+        super().__init__(f"utterance exceeds {limit_bytes} bytes")
+        self.limit_bytes = limit_bytes
+        self.buffered_bytes = buffered_bytes
+
+
+class MemoryBudget:
+    """Bytes of in-memory audio stores across all sessions.
+
+    Stores are charged when allocated and released when garbage collected (possibly on an
+    STT worker thread that dropped the last snapshot), hence the lock.
+    """
+
+    def __init__(self, limit_bytes: int = AUDIO_MEMORY_BUDGET_BYTES, high_water: float = AUDIO_BACKPRESSURE_HIGH_WATER) -> None:
+        self.limit_bytes = max(0, limit_bytes)
+        self.high_water = min(1.0, max(0.0, high_water))
+        self._used = 0
+        self._lock = threading.Lock()
+        self.denied = 0
+        self.backpressure_waits = 0
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    def try_reserve(self, nbytes: int) -> bool:
+        with self._lock:
+            if self._used + nbytes > self.limit_bytes:
+                self.denied += 1
+                return False
+            self._used += nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        with self._lock:
+            self._used = max(0, self._used - nbytes)
+
+    def under_pressure(self) -> bool:
+        return self._used >= self.limit_bytes * self.high_water
+
+    async def wait_for_room(self, max_wait_ms: float = AUDIO_BACKPRESSURE_MAX_WAIT_MS) -> float:
+        """Sleep while above the high-water mark (bounded); returns the milliseconds waited."""
+        if not self.under_pressure():
+            return 0.0
+        self.backpressure_waits += 1
+        started = time.monotonic()
+        deadline = started + max_wait_ms / 1000.0
+        while self.under_pressure() and time.monotonic() < deadline:
+            await asyncio.sleep(BACKPRESSURE_POLL_S)
+        return (time.monotonic() - started) * 1000.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit_bytes": self.limit_bytes,
+            "used_bytes": self._used,
+            "denied": self.denied,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+_budget: Optional[MemoryBudget] = None
+
+
+def get_memory_budget() -> MemoryBudget:
+    global _budget
+    if _budget is None:
+        _budget = MemoryBudget()
+    return _budget
+
+
+def _spill_file(size: int) -> mmap.mmap:
+    """A sparse, already-unlinked temp file mapped read/write; disk space is freed with the map."""
+    with tempfile.TemporaryFile(prefix="speaking-stone-audio-", dir=AUDIO_SPILL_DIR) as handle:
+        handle.truncate(size)
+        return mmap.mmap(handle.fileno(), size)  # the map keeps its own descriptor
+
+
+class AudioStreamBuffer:
+    """Accumulate PCM payloads for a websocket session."""
+
+    def __init__(
+        self,
+        initial_capacity: int = INITIAL_CAPACITY_BYTES,
+        memory_cap: int = AUDIO_BUFFER_MEMORY_CAP_BYTES,
+        max_bytes: int = AUDIO_BUFFER_MAX_BYTES,
+        budget: Optional[MemoryBudget] = None,
+    ) -> None:
+        self.initial_capacity = max(2, initial_capacity)
+        self.memory_cap = max(2, memory_cap)
+        self.max_bytes = max(2, max_bytes)
+        self.budget = budget if budget is not None else get_memory_budget()
+        self.header: protocol.AudioFrameHeader | None = None
+        self._store: np.ndarray | None = None  # int16 samples; byte length may be odd for 8-bit audio
+        self._bytes: memoryview | None = None  # writable byte view of `_store`
+        self._length = 0  # bytes
+        # Snapshots are views of `_export`, a per-store ndarray alias, so its weakref dies
+        # only when the last view derived from any snapshot of the store does.
+        self._export: np.ndarray | None = None
+        self._export_ref: Optional[weakref.ref] = None  # set once the buffer let go of `_export`
+        self._spilled = False
+        self._capacity_hint = min(self.initial_capacity, self.memory_cap)
+        self._validated_slot: protocol.FrameSlot | None = None  # its format already matched `header`
+
+    def _reserve(self, needed: int) -> memoryview:
+        if self._export_ref is not None:
+            self._detach_if_exported()
+        if self._bytes is not None and self._bytes.nbytes >= needed:
+            return self._bytes
+        if needed > self.max_bytes:
+            raise BufferLimitError(self.max_bytes, self._length)
+        capacity = self._capacity_hint if self._store is None else self._store.nbytes
+        while capacity < needed:
+            capacity *= GROWTH_FACTOR
+        capacity = min(capacity, self.memory_cap)
+        if capacity >= needed and not self._spilled and self.budget.try_reserve(capacity):
+            grown = np.empty((capacity + 1) // 2, dtype="<i2")
+            weakref.finalize(grown, self.budget.release, capacity)
+            self._capacity_hint = grown.nbytes
+        else:
+            # Over the session cap or the global budget: map the rest of the utterance from disk.
+            size = (self.max_bytes + 1) & ~1
+            grown = np.frombuffer(_spill_file(size), dtype="<i2")
+            self._spilled = True
+            logger.info("audio_buffer_spilled bytes=%d budget_used=%d", self._length, self.budget.used)
+        grown_bytes = memoryview(grown).cast("B")
+        if self._bytes is not None and self._length:
+            grown_bytes[: self._length] = self._bytes[: self._length]
+        # Earlier snapshots keep the old store alive; new audio lands in the grown one.
+        self._store, self._bytes = grown, grown_bytes
+        self._export = None
+        return grown_bytes
+
+    def _release_export(self) -> None:
+        """Drop the buffer's own reference to the snapshot alias; only snapshots keep it alive."""
+        if self._export is not None:
+            self._export_ref = weakref.ref(self._export)
+            self._export = None
+
+    def _detach_if_exported(self) -> None:
+        """Before rewriting the start of the store: move to a fresh one if a snapshot still reads it."""
+        if self._export_ref is not None and self._export_ref() is not None:
+            self._store = self._bytes = None
+        self._export_ref = None
+
+    def append_frame(self, header: Header, payload: BytesLike) -> None:
+        """Append a PCM payload, ensuring audio params stay consistent."""
+        size = len(payload)
+        if header.payload_len != size:
+            raise ValueError("payload length mismatch")
+        if header is not self._validated_slot:
+            self._check_format(header)
+        start = self._length
+        end = start + size
+        store = self._bytes
+        # Per-frame hot path: only call out when the store must grow or may be shared.
+        if store is None or end > store.nbytes or self._export_ref is not None:
+            store = self._reserve(end)
+        store[start:end] = payload
+        self._length = end
+
+    def append_decoded(self, header: Header) -> memoryview:
+        """Extend the buffer by `header.payload_len` bytes for a decoder to fill in place.
+
+        Returns the writable region; `header` describes the decoded PCM.
+        """
+        self._check_format(header)
+        end = self._length + header.payload_len
+        region = self._reserve(end)[self._length : end]
+        self._length = end
+        return region
+
+    def _check_format(self, header: Header) -> None:
+        if header is self._validated_slot:
+            return  # slim-header stream: the format is fixed by stream_start
+        if self.header is None:
+            # A FrameSlot is refilled by the next frame; keep an immutable copy.
+            self.header = header.freeze() if isinstance(header, protocol.FrameSlot) else header
+        else:
+            if header.sample_rate != self.header.sample_rate:
+                raise ValueError("sample rate changed mid-stream")
+            if header.channels != self.header.channels:
+                raise ValueError("channel count changed mid-stream")
+            if header.bits_per_sample != self.header.bits_per_sample:
+                raise ValueError("bit depth changed mid-stream")
+        if isinstance(header, protocol.FrameSlot):
+            self._validated_slot = header
+
+    def snapshot(self) -> Tuple[memoryview, protocol.AudioFrameHeader]:
+        """Return a read-only view of the buffered PCM with the header metadata.
+
+        The view stays valid after later appends and after `clear()`.
+        """
+        if self.header is None or self._bytes is None:
+            raise ValueError("no audio buffered yet")
+        if self._export is None:
+            self._export = self._store.view()
+        return memoryview(self._export).cast("B")[: self._length].toreadonly(), self.header
+
+    def samples(self) -> np.ndarray:
+        """Buffered PCM16 samples as an int16 view (no copy)."""
+        if self._store is None:
+            return np.zeros(0, dtype="<i2")
+        return self._store[: self._length // 2]
+
+    def clear(self) -> None:
+        """Reset the buffer for the next utterance."""
+        self._release_export()
+        if self._spilled:
+            # The next utterance starts in memory again.
+            self._store = self._bytes = None
+            self._export_ref = None
+            self._spilled = False
+        self._length = 0
+        self.header = None
+        self._validated_slot = None
+
+    def keep_tail(self, nbytes: int) -> int:
+        """Drop all but the last `nbytes` of buffered audio (open-mic pre-roll window).
+
+        Returns the number of bytes dropped.
+        """
+        if nbytes >= self._length or self._bytes is None:
+            return 0
+        dropped = self._length - max(0, nbytes)
+        if nbytes <= 0:
+            header = self.header
+            self.clear()
+            self.header = header
+            return dropped
+        tail = bytes(self._bytes[self._length - nbytes : self._length])  # at most the pre-roll
+        self._release_export()
+        if self._spilled:
+            self._store = self._bytes = None
+            self._export_ref = None
+            self._spilled = False
+        self._reserve(nbytes)[:nbytes] = tail  # a store a snapshot still reads is left alone
+        self._length = nbytes
+        return dropped
+
+    def is_empty(self) -> bool:
+        return self._length == 0
+
+    def byte_count(self) -> int:
+        return self._length
+
+    def capacity(self) -> int:
+        return 0 if self._store is None else self._store.nbytes
+
+    def spilled(self) -> bool:
+        return self._spilled
+
+
+_scratch = threading.local()
+
+
+def float32_scratch(samples: int) -> np.ndarray:
+    """Per-thread reusable float32 buffer of at least `samples` entries (returns an exact-size view)."""
+    buffer = getattr(_scratch, "buffer", None)
+    if buffer is None or buffer.size < samples:
+        capacity = max(samples, 16000)
+        if buffer is not None:
+            capacity = max(capacity, buffer.size * GROWTH_FACTOR)
+        buffer = _scratch.buffer = np.empty(capacity, dtype=np.float32)
+    return buffer[:samples]
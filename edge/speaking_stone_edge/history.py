@@ -0,0 +1,184 @@
+"""Per-connection chat history kept under a token budget.
+
+Turns are stored verbatim until the estimated size exceeds `CHAT_HISTORY_TOKEN_BUDGET`.
+The oldest turns (all but the `CHAT_HISTORY_KEEP_MESSAGES` most recent messages) are
+then folded into a rolling summary by a background task, so the compaction never
+sits on a turn's critical path. The summary call is admitted through the LLM stage pool
+like any other LLM call; a summary over `CHAT_SUMMARY_MAX_TOKENS` is replaced by the
+local extractive one. If compaction falls behind and the history grows past
+twice the budget, the oldest turns are dropped outright.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from . import stage_pool
+
+logger = logging.getLogger(__name__)
+
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+CHAT_HISTORY_KEEP_MESSAGES = int(os.getenv("CHAT_HISTORY_KEEP_MESSAGES", "6"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators in the chat template
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+Message = Dict[str, str]
+Summarizer = Callable[[str, List[Message]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English BPE vocabularies)."""
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(message: Message) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def extractive_summary(previous: str, turns: List[Message], max_tokens: int = CHAT_SUMMARY_MAX_TOKENS) -> str:
+    """Local fallback summary: previous summary plus the gist of each turn, truncated from the front."""
+    parts = [previous] if previous else []
+    for turn in turns:
+        content = " ".join(turn.get("content", "").split())
+        if len(content) > 160:
+            content = content[:157] + "..."
+        speaker = "User" if turn.get("role") == "user" else "Assistant"
+        parts.append(f"{speaker}: {content}")
+    summary = " | ".join(parts)
+    max_chars = max_tokens * 4
+    if len(summary) > max_chars:
+        summary = "..." + summary[-(max_chars - 3) :]
+    return summary
+
+
+class ChatHistory:
+    """Token-budgeted message list with a rolling summary of compacted turns."""
+
+    def __init__(
+        self,
+        summarizer: Optional[Summarizer] = None,
+        budget_tokens: int = CHAT_HISTORY_TOKEN_BUDGET,
+        keep_messages: int = CHAT_HISTORY_KEEP_MESSAGES,
+        summary_max_tokens: int = CHAT_SUMMARY_MAX_TOKENS,
+    ) -> None:
+        self._summarizer = summarizer
+        self.budget_tokens = budget_tokens
+        self.keep_messages = max(0, keep_messages)
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ""
+        self._turns: List[Message] = []
+        self._turn_tokens = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        self.compactions = 0
+        self.dropped = 0
+        self.revision = 0  # bumped whenever `messages()` would change
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def append(self, role: str, content: str) -> None:
+        message = {"role": role, "content": content}
+        self._turns.append(message)
+        self._turn_tokens += _message_tokens(message)
+        self.revision += 1
+        if self.token_count() > 2 * self.budget_tokens:
+            self._drop_oldest()
+
+    def token_count(self) -> int:
+        summary_tokens = estimate_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS if self.summary else 0
+        return self._turn_tokens + summary_tokens
+
+    def messages(self) -> List[Message]:
+        """Messages to send before the new user turn (summary first, then verbatim turns)."""
+        messages: List[Message] = []
+        if self.summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+        messages.extend(dict(turn) for turn in self._turns)
+        return messages
+
+    def needs_compaction(self) -> bool:
+        return self.token_count() > self.budget_tokens and len(self._turns) > self.keep_messages
+
+    def schedule_compaction(self) -> Optional[asyncio.Task[None]]:
+        """Start a background compaction if over budget and none is running."""
+        if self._task is not None and not self._task.done():
+            return None
+        if not self.needs_compaction():
+            return None
+        # Fix the prefix now so turns appended before the task starts stay verbatim.
+        # A fresh context: the summary call outlives the turn and must not land in its trace.
+        self._task = asyncio.create_task(
+            self.compact(len(self._turns) - self.keep_messages), context=contextvars.Context()
+        )
+        return self._task
+
+    async def compact(self, count: Optional[int] = None) -> None:
+        """Fold the oldest `count` turns (default: all but the kept ones) into the summary.
+
+        Turns appended while the summarizer runs are untouched: only the prefix that was
+        summarized is removed afterwards.
+        """
+        if count is None:
+            count = len(self._turns) - self.keep_messages
+        count = min(count, len(self._turns))
+        if count <= 0:
+            return
+        oldest = [dict(turn) for turn in self._turns[:count]]
+        previous = self.summary
+        dropped_before = self.dropped
+        summary = ""
+        if self._summarizer is not None:
+            try:
+                async with stage_pool.get_stage_pool("llm").slot():
+                    summary = (await self._summarizer(previous, oldest)).strip()
+            except Exception as exc:  # noqa: BLE001 - includes StageBusyError
+                logger.warning("history_summarize_failed error=%s; using extractive summary", exc)
+            if estimate_tokens(summary) > self.summary_max_tokens:
+                # An overlong summary would be resent with every turn.
+                logger.warning(
+                    "history_summary_over_budget tokens=%d max=%d; using extractive summary",
+                    estimate_tokens(summary),
+                    self.summary_max_tokens,
+                )
+                summary = ""
+        if not summary:
+            summary = extractive_summary(previous, oldest, self.summary_max_tokens)
+        # Turns dropped meanwhile (see `_drop_oldest`) were part of the summarized prefix.
+        self._remove_oldest(max(0, count - (self.dropped - dropped_before)))
+        self.summary = summary
+        self.revision += 1
+        self.compactions += 1
+        logger.info(
+            "history_compacted turns=%d remaining=%d tokens=%d summary_tokens=%d",
+            count,
+            len(self._turns),
+            self.token_count(),
+            estimate_tokens(summary),
+        )
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def _remove_oldest(self, count: int) -> None:
+        removed = self._turns[:count]
+        del self._turns[:count]
+        self._turn_tokens -= sum(_message_tokens(turn) for turn in removed)
+        self.revision += 1
+
+    def _drop_oldest(self) -> None:
+        # Compaction is behind: keep the payload bounded on the critical path.
+        count = 0
+        tokens = self.token_count()
+        while tokens > self.budget_tokens and count < len(self._turns) - self.keep_messages:
+            tokens -= _message_tokens(self._turns[count])
+            count += 1
+        if count:
+            logger.warning("history_dropped turns=%d tokens=%d", count, tokens)
+            self._remove_oldest(count)
+            self.dropped += count
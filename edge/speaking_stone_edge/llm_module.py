@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 import re
-import urllib.error
-import urllib.request
-from typing import Any, Dict
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from . import metrics
+from . import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +24,12 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_REFERRER = os.getenv("OPENROUTER_REFERRER")
 OPENROUTER_APP_TITLE = os.getenv("OPENROUTER_APP_TITLE")
 REQUEST_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "5"))
+OPENROUTER_STREAM = os.getenv("OPENROUTER_STREAM", "").strip().lower() in {"1", "true", "yes", "on"}
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "").strip().lower() in {"1", "true", "yes", "on"}
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "120"))
+OPENROUTER_PREWARM = os.getenv("OPENROUTER_PREWARM", "1").strip().lower() in {"1", "true", "yes", "on"}
 DEFAULT_SYSTEM_PROMPT_PATH = os.path.join(os.path.dirname(__file__), "system_prompt.txt")
 SYSTEM_PROMPT_PATH = os.getenv("SYSTEM_PROMPT_PATH") or DEFAULT_SYSTEM_PROMPT_PATH
 
@@ -40,13 +52,164 @@ def _build_headers() -> Dict[str, str]:
     return headers
 
 
-def _post_openrouter(payload: Dict[str, Any]) -> Dict[str, Any]:
+@dataclass
+class ConnectionStats:
+    """Connection reuse counters for the shared OpenRouter client."""
+
+    requests: int = 0
+    connections_opened: int = 0
+    http_version: str = ""
+
+    @property
+    def connections_reused(self) -> int:
+        return max(0, self.requests - self.connections_opened)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "connections_reused": self.connections_reused}
+
+
+_stats = ConnectionStats()
+_client: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (optional dependency for HTTP/2)
+    except ImportError:
+        return False
+    return True
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the keep-alive client shared by every session on the running event loop."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].is_closed:
+        http2 = OPENROUTER_HTTP2 and _http2_available()
+        if OPENROUTER_HTTP2 and not http2:
+            logger.warning("OPENROUTER_HTTP2 set but the h2 package is missing; using HTTP/1.1")
+        client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENROUTER_MAX_CONNECTIONS,
+                keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        _client = (loop, client)
+    return _client[1]
+
+
+async def _trace(event_name: str, info: Dict[str, Any]) -> None:
+    """httpcore trace hook: a TCP connect means the pool had no idle connection to reuse."""
+    if event_name == "connection.connect_tcp.complete":
+        _stats.connections_opened += 1
+
+
+def _request_extensions() -> Dict[str, Any]:
+    _stats.requests += 1
+    if tracing.current_turn() is None:
+        return {"trace": _trace}
+    started: Dict[str, float] = {}
+
+    async def trace_phases(event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore reports "<scope>.<phase>.started" / ".complete" / ".failed"; each phase
+        # (connect_tcp, start_tls, send_request_headers, receive_response_headers, ...)
+        # becomes an `llm.<phase>` span of the current turn.
+        await _trace(event_name, info)
+        phase, _, status = event_name.rpartition(".")
+        if status == "started":
+            started[phase] = time.perf_counter()
+        elif phase in started:
+            tracing.record_span("llm." + phase.rpartition(".")[2], started.pop(phase), failed=status == "failed")
+
+    return {"trace": trace_phases}
+
+
+def _note_response(response: httpx.Response) -> None:
+    _stats.http_version = response.http_version
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Requests issued, TCP connections opened and reused by the shared client."""
+    return _stats.as_dict()
+
+
+async def prewarm_connection() -> None:
+    """Open (TCP + TLS) a pooled connection ahead of the first turn; failures are only logged."""
+    try:
+        response = await _get_http_client().head(OPENROUTER_BASE_URL, extensions=_request_extensions())
+        _note_response(response)
+        logger.info("openrouter_prewarmed status=%d http_version=%s", response.status_code, response.http_version)
+    except httpx.HTTPError as exc:
+        logger.warning("openrouter_prewarm_failed error=%s", exc)
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        loop, client = _client
+        _client = None
+        if loop is asyncio.get_running_loop():
+            await client.aclose()
+
+
+async def _post_openrouter(payload: Dict[str, Any]) -> Dict[str, Any]:
+    target_url = OPENROUTER_BASE_URL.rstrip("/") + "/chat/completions"
+    response = await _get_http_client().post(
+        target_url, json=payload, headers=_build_headers(), extensions=_request_extensions()
+    )
+    _note_response(response)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _aiter_sse_data(lines: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Yield `data:` payloads from a server-sent-events line stream until `[DONE]`."""
+    data_lines: List[str] = []
+    async for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+        if not line:
+            if data_lines:
+                data = "\n".join(data_lines)
+                data_lines = []
+                if data == "[DONE]":
+                    return
+                yield data
+            continue
+        if line.startswith(":"):
+            # Comment/keep-alive line (OpenRouter sends ": OPENROUTER PROCESSING").
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip(" "))
+    if data_lines and "\n".join(data_lines) != "[DONE]":
+        yield "\n".join(data_lines)
+
+
+async def _stream_openrouter(payload: Dict[str, Any]) -> AsyncIterator[str]:
+    """POST a streaming completion and yield content deltas as they arrive."""
     target_url = OPENROUTER_BASE_URL.rstrip("/") + "/chat/completions"
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(target_url, data=data, headers=_build_headers(), method="POST")
-    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
-        body = response.read()
-    return json.loads(body.decode("utf-8"))
+    headers = {**_build_headers(), "Accept": "text/event-stream"}
+    async with _get_http_client().stream(
+        "POST",
+        target_url,
+        json={**payload, "stream": True},
+        headers=headers,
+        extensions=_request_extensions(),
+    ) as response:
+        _note_response(response)
+        response.raise_for_status()
+        async for event in _aiter_sse_data(response.aiter_lines()):
+            chunk = json.loads(event)
+            if "error" in chunk:
+                raise ValueError(f"OpenRouter stream error: {chunk['error']}")
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content")
+            if isinstance(delta, str) and delta:
+                yield delta
 
 
 def _load_system_prompt() -> str:
@@ -62,14 +225,65 @@ def _load_system_prompt() -> str:
     return DEFAULT_SYSTEM_PROMPT
 
 
-def _sanitize_reply(reply: str) -> str:
-    """Strip stage directions/quotes so TTS gets clean speech."""
-    cleaned = re.sub(r"\*[^*]{0,80}\*", " ", reply)
+def _clean_speech(text: str) -> str:
+    """Remove stage directions/quotes; may return an empty string."""
+    cleaned = re.sub(r"\*[^*]{0,80}\*", " ", text)
     cleaned = re.sub(r"\[[^\]]{0,80}\]", " ", cleaned)
     cleaned = cleaned.strip().strip('"“”\'')
     cleaned = re.sub(r"\s{2,}", " ", cleaned)
-    cleaned = cleaned.strip()
-    return cleaned or reply
+    return cleaned.strip()
+
+
+def _sanitize_reply(reply: str) -> str:
+    """Strip stage directions/quotes so TTS gets clean speech."""
+    return _clean_speech(reply) or reply
+
+
+_SENTENCE_END_RE = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s)|\n+")
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "no."}
+
+
+class SentenceSegmenter:
+    """Split a token stream into sentences as soon as each one is complete.
+
+    A boundary is terminal punctuation followed by whitespace (or a newline). Text inside an
+    unclosed `*...*` or `[...]` stage direction is never split, so `_clean_speech` can still
+    remove it whole.
+    """
+
+    def __init__(self, min_chars: int = 12) -> None:
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        sentences: List[str] = []
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(self._buffer):
+            end = match.end()
+            candidate = self._buffer[start:end]
+            if len(candidate.strip()) < self.min_chars and not candidate.endswith("\n"):
+                continue
+            if self._inside_direction(candidate) or self._ends_with_abbreviation(candidate):
+                continue
+            sentences.append(candidate.strip())
+            start = end
+        self._buffer = self._buffer[start:]
+        return [sentence for sentence in sentences if sentence]
+
+    def flush(self) -> List[str]:
+        """Return whatever remains once the stream has ended."""
+        remainder, self._buffer = self._buffer.strip(), ""
+        return [remainder] if remainder else []
+
+    @staticmethod
+    def _inside_direction(text: str) -> bool:
+        return text.count("*") % 2 == 1 or text.count("[") > text.count("]")
+
+    @staticmethod
+    def _ends_with_abbreviation(text: str) -> bool:
+        words = text.split()
+        return bool(words) and words[-1].lower() in _ABBREVIATIONS
 
 
 def _build_messages(user_text: str, history: list[Dict[str, str]] | None) -> list[Dict[str, str]]:
@@ -91,13 +305,28 @@ def _build_messages(user_text: str, history: list[Dict[str, str]] | None) -> lis
     return messages
 
 
-def generate_reply(text: str, history: list[Dict[str, str]] | None = None) -> str:
-    """Send the transcript to OpenRouter and return the assistant reply."""
+class ReplyUnavailableError(RuntimeError):
+    """OpenRouter gave no usable reply and the caller opted out of the echo fallback."""
+
+
+async def generate_reply(
+    text: str, history: list[Dict[str, str]] | None = None, echo_fallback: bool = True
+) -> str:
+    """Send the transcript to OpenRouter and return the assistant reply.
+
+    On any failure the reply echoes the transcript, or `ReplyUnavailableError` is raised
+    when `echo_fallback` is False (speculative calls, which fall back to a real request).
+    """
     fallback = f"Echoing your words: {text}"
     if not text.strip():
+        if not echo_fallback:
+            raise ReplyUnavailableError("empty transcript")
         return fallback
     if not OPENROUTER_API_KEY:
+        if not echo_fallback:
+            raise ReplyUnavailableError("OPENROUTER_API_KEY missing")
         logger.warning("OPENROUTER_API_KEY missing; falling back to echo response.")
+        metrics.FALLBACKS.labels("llm").inc()
         return fallback
 
     payload: Dict[str, Any] = {
@@ -106,15 +335,93 @@ def generate_reply(text: str, history: list[Dict[str, str]] | None = None) -> st
     }
 
     try:
-        data = _post_openrouter(payload)
+        with tracing.span("llm.request", model=OPENROUTER_MODEL):
+            data = await _post_openrouter(payload)
         choices = data.get("choices") or []
         if not choices:
             raise ValueError("no choices returned from OpenRouter")
         message = choices[0]["message"]["content"]
         if isinstance(message, str):
             sanitized = _sanitize_reply(message)
-            return sanitized if sanitized.strip() else fallback
-        return fallback
-    except (urllib.error.URLError, ValueError, json.JSONDecodeError) as exc:
+            if sanitized.strip():
+                return sanitized
+    except (httpx.HTTPError, ValueError, json.JSONDecodeError, KeyError, IndexError, TypeError) as exc:
+        # KeyError/IndexError/TypeError: a response that does not have the completion shape.
         logger.error("OpenRouter request failed: %s", exc)
-        return fallback
+        if not echo_fallback:
+            raise ReplyUnavailableError(f"OpenRouter request failed: {exc}") from exc
+    else:
+        if not echo_fallback:
+            raise ReplyUnavailableError("OpenRouter returned an empty reply")
+    metrics.FALLBACKS.labels("llm").inc()
+    return fallback
+
+
+async def stream_reply(text: str, history: list[Dict[str, str]] | None = None) -> AsyncIterator[str]:
+    """Yield raw reply tokens from a streaming OpenRouter completion.
+
+    Falls back to the echo reply (as a single token) when streaming is impossible or fails
+    before any content arrived; a failure mid-reply just ends the stream early.
+    """
+    fallback = f"Echoing your words: {text}"
+    if not text.strip():
+        yield fallback
+        return
+    if not OPENROUTER_API_KEY:
+        logger.warning("OPENROUTER_API_KEY missing; falling back to echo response.")
+        metrics.FALLBACKS.labels("llm").inc()
+        yield fallback
+        return
+
+    payload: Dict[str, Any] = {
+        "model": OPENROUTER_MODEL,
+        "messages": _build_messages(text, history),
+    }
+    produced = False
+    started = time.perf_counter()
+    deltas = 0
+    try:
+        async for delta in _stream_openrouter(payload):
+            if not produced:
+                tracing.record_span("llm.first_token", started)
+            produced = True
+            deltas += 1
+            yield delta
+    except (httpx.HTTPError, ValueError, json.JSONDecodeError) as exc:
+        logger.error("OpenRouter stream failed after_content=%s: %s", produced, exc)
+    finally:
+        # Recorded after the fact: a span must not stay open across this generator's yields.
+        tracing.record_span("llm.stream", started, model=OPENROUTER_MODEL, deltas=deltas)
+    if not produced:
+        metrics.FALLBACKS.labels("llm").inc()
+        yield fallback
+
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below for your own memory in at most five short sentences. "
+    "Keep names, facts the user shared, open questions and promises. Plain text only."
+)
+
+
+async def summarize_turns(previous_summary: str, turns: list[Dict[str, str]]) -> str:
+    """Ask the model to fold `turns` into the running summary; returns "" when unavailable."""
+    if not OPENROUTER_API_KEY or not turns:
+        return ""
+    transcript = "\n".join(f"{turn.get('role', 'user')}: {turn.get('content', '')}" for turn in turns)
+    if previous_summary:
+        transcript = f"Earlier summary: {previous_summary}\n{transcript}"
+    payload: Dict[str, Any] = {
+        "model": OPENROUTER_MODEL,
+        "messages": [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": transcript},
+        ],
+    }
+    try:
+        data = await _post_openrouter(payload)
+        choices = data.get("choices") or []
+        message = choices[0]["message"]["content"] if choices else ""
+        return message.strip() if isinstance(message, str) else ""
+    except (httpx.HTTPError, ValueError, KeyError, json.JSONDecodeError) as exc:
+        logger.error("OpenRouter summary request failed: %s", exc)
+        return ""
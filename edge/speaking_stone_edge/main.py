@@ -1,16 +1,37 @@
-from dataclasses import dataclass, field
+import asyncio
 import json
 import logging
+import os
 import time
-from typing import Dict, Tuple
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict
 
+import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 
+from . import adpcm
 from . import protocol
-from .llm_module import generate_reply
+from .audio_buffer import AudioStreamBuffer, BufferLimitError, get_memory_budget
+from .history import ChatHistory
+from . import llm_module
+from . import metrics
+from . import reply_pipeline
+from . import speculative
+from .llm_module import OPENROUTER_STREAM, generate_reply
+from . import stage_pool
+from . import stt_batch
 from . import stt_module
-from .stt_module import transcribe_audio
-from .tts_module import synthesize_speech
+from . import stt_workers
+from . import tts_cache
+from . import tracing
+from . import tts_module
+from . import vad
+from .speculative import SpeculativeReply
+from .streaming_stt import STT_STREAMING, StreamingTranscript
+from .stt_module import transcribe_segments
+from .tts_module import iter_speech
+from .tts_stream import TtsChunkSender
 
 app = FastAPI(title="Speaking Stone Edge", version="0.1.0")
 logger = logging.getLogger("speaking_stone_edge")
@@ -21,67 +42,51 @@ if not logger.handlers:
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# Speech confirmed by the server VAD while a reply is in flight cancels it. Without VAD
+# (VAD_MODE=off) uplink audio never does; the stone sends `cancel` instead.
+BARGE_IN = os.getenv("BARGE_IN", "1").strip().lower() in {"1", "true", "yes", "on"}
 
-@dataclass
-class AudioStreamBuffer:
-    """Accumulate PCM payloads for a websocket session."""
-
-    pcm_bytes: bytearray = field(default_factory=bytearray)
-    header: protocol.AudioFrameHeader | None = None
-
-    def append_frame(self, header: protocol.AudioFrameHeader, payload: bytes) -> None:
-        """Append a PCM payload, ensuring audio params stay consistent."""
-        if header.payload_len != len(payload):
-            raise ValueError("payload length mismatch")
-
-        if self.header is None:
-            self.header = header
-        else:
-            if header.sample_rate != self.header.sample_rate:
-                raise ValueError("sample rate changed mid-stream")
-            if header.channels != self.header.channels:
-                raise ValueError("channel count changed mid-stream")
-            if header.bits_per_sample != self.header.bits_per_sample:
-                raise ValueError("bit depth changed mid-stream")
-
-        self.pcm_bytes.extend(payload)
-
-    def snapshot(self) -> Tuple[bytes, protocol.AudioFrameHeader]:
-        """Return current PCM bytes with the header metadata."""
-        if self.header is None:
-            raise ValueError("no audio buffered yet")
-        return bytes(self.pcm_bytes), self.header
-
-    def clear(self) -> None:
-        """Reset the buffer for the next utterance."""
-        self.pcm_bytes.clear()
-        self.header = None
-
-    def is_empty(self) -> bool:
-        return len(self.pcm_bytes) == 0
-
-    def byte_count(self) -> int:
-        return len(self.pcm_bytes)
+# Session buffers, read by the /metrics gauges at scrape time.
+_SESSION_BUFFERS: set[AudioStreamBuffer] = set()
+metrics.ACTIVE_SESSIONS.set_function(lambda: len(_SESSION_BUFFERS))
+metrics.BUFFERED_BYTES.set_function(lambda: sum(buffer.byte_count() for buffer in list(_SESSION_BUFFERS)))
+metrics.QUEUE_DEPTH.set_collector(
+    lambda: {(name,): stats["queue_depth"] for name, stats in stage_pool.pool_stats().items()}
+)
 
 
 class StageTimer:
     """Record elapsed time for sequential pipeline stages."""
 
     def __init__(self) -> None:
-        self._last = time.perf_counter()
+        self._start = self._last = time.perf_counter()
         self._durations: list[tuple[str, float]] = []
+        self._extras: Dict[str, float] = {}
 
     def mark(self, name: str) -> None:
         now = time.perf_counter()
         self._durations.append((name, now - self._last))
         self._last = now
 
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the timer was created (for latency-to-event metrics)."""
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def record(self, name: str, value: float) -> None:
+        """Attach an auxiliary metric (queue wait, depth, ...) that is not a stage duration."""
+        self._extras[name] = round(float(value), 2)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment an auxiliary counter (cache hits, ...) reported alongside the timings."""
+        self._extras[name] = self._extras.get(name, 0) + amount
+
     def metrics(self) -> Dict[str, float]:
         total = 0.0
         metric: Dict[str, float] = {}
         for name, duration in self._durations:
             metric[f"{name}_ms"] = round(duration * 1000.0, 2)
             total += duration
+        metric.update(self._extras)
         if self._durations:
             metric["total_ms"] = round(total * 1000.0, 2)
         else:
@@ -89,8 +94,21 @@ class StageTimer:
         return metric
 
 
-def _estimate_duration_ms(byte_len: int, header: protocol.AudioFrameHeader) -> float:
-    """Approximate duration (ms) for PCM bytes."""
+@dataclass
+class ActiveTurn:
+    """The session's turn in flight, run as a task so the socket keeps being read."""
+
+    kind: str
+    task: "asyncio.Task[None]"
+    started: float = field(default_factory=time.perf_counter)
+
+
+def _estimate_duration_ms(byte_len: int, header: protocol.AudioFrameHeader, blocks: int = 1) -> float:
+    """Approximate duration (ms) for PCM bytes, or for `blocks` IMA-ADPCM blocks when flagged."""
+    if header.flags & protocol.FLAG_ADPCM:
+        if header.sample_rate == 0:
+            return 0.0
+        return round(adpcm.samples_in(byte_len, blocks) / header.sample_rate * 1000.0, 2)
     bytes_per_sample = header.channels * (header.bits_per_sample // 8)
     if bytes_per_sample == 0 or header.sample_rate == 0:
         return 0.0
@@ -105,18 +123,90 @@ async def root_status():
     return {"service": "speaking-stone-edge", "status": "ok"}
 
 
+@app.get("/stats")
+async def runtime_stats():
+    """Stage queues, Whisper instance utilization, OpenRouter connection reuse, speculation, TTS cache and audio memory."""
+    cache = tts_cache.get_tts_cache()
+    return {
+        "stages": stage_pool.pool_stats(),
+        "stt_models": stt_module.model_pool_stats(),
+        "llm_connections": llm_module.connection_stats(),
+        "llm_speculation": speculative.speculation_stats(),
+        "tts_cache": cache.stats() if cache is not None else None,
+        "audio_memory": get_memory_budget().stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latency histograms, frame/error/fallback counters and live gauges for Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.on_event("startup")
 async def _warm_stt_model() -> None:
-    """Load the Whisper model during startup to avoid first-request latency."""
-    stt_module._get_model()
+    """Load the Whisper model(s) during startup to avoid first-request latency."""
+    pool = stage_pool.get_stage_pool("stt", initializer=stt_module.warm_models)
+    if pool.config.kind == "thread":
+        # Thread workers share this process's models; process workers warm up via the initializer.
+        stt_module.warm_models()
+
+
+@app.on_event("startup")
+async def _prewarm_llm_connection() -> None:
+    """Open a pooled OpenRouter connection so the first turn skips TCP+TLS setup."""
+    if llm_module.OPENROUTER_API_KEY and llm_module.OPENROUTER_PREWARM:
+        await llm_module.prewarm_connection()
+
+
+@app.on_event("startup")
+async def _warm_tts_backend() -> None:
+    """Load the TTS provider (e.g. the Piper ONNX session) before the first reply."""
+    pool = stage_pool.get_stage_pool("tts", initializer=tts_module.warm_backend)
+    if pool.config.kind == "thread":
+        await asyncio.get_running_loop().run_in_executor(None, tts_module.warm_backend)
+
+
+@app.on_event("startup")
+async def _preload_tts_cache() -> None:
+    """Pre-render `TTS_CACHE_PRELOAD_FILE` phrases in the background so they are instant later."""
+    phrases = tts_cache.load_preload_phrases()
+    if phrases:
+        app.state.tts_preload = asyncio.create_task(tts_cache.preload(phrases))
+
+
+@app.on_event("startup")
+async def _start_loop_lag_probe() -> None:
+    """Sample event loop scheduling delay for the `event_loop_lag_seconds` histogram."""
+    if metrics.METRICS_LOOP_LAG_INTERVAL_MS > 0:
+        app.state.loop_lag_probe = asyncio.create_task(metrics.probe_loop_lag())
+
+
+@app.on_event("shutdown")
+async def _stop_stage_pools() -> None:
+    stage_pool.shutdown_stage_pools()
+    stt_workers.close_ring()
+    tracing.close_exporter()
+    await llm_module.close_http_client()
 
 
 @app.websocket("/ws/audio")
 async def audio_websocket(websocket: WebSocket):
     await websocket.accept()
-    await websocket.send_text(protocol.encode_control_message("connected", {"note": "placeholder session"}))
+    websocket.state.control_encoding = protocol.negotiate_control_encoding(websocket.query_params.get("encoding"))
+    await _send_control(
+        websocket, "connected", {"note": "placeholder session", "encoding": websocket.state.control_encoding}
+    )
     websocket.state.audio_buffer = AudioStreamBuffer()
-    websocket.state.chat_history: list[dict[str, str]] = []
+    _SESSION_BUFFERS.add(websocket.state.audio_buffer)
+    websocket.state.streaming_stt = StreamingTranscript() if STT_STREAMING else None
+    # Speculation feeds on partial transcripts; streamed replies already overlap the LLM with TTS.
+    speculate = speculative.LLM_SPECULATIVE and STT_STREAMING and not OPENROUTER_STREAM
+    websocket.state.speculation = SpeculativeReply(_speculative_reply) if speculate else None
+    websocket.state.endpointer = vad.create_endpointer()
+    websocket.state.chat_history = ChatHistory(summarizer=llm_module.summarize_turns)
+    websocket.state.frame_slot = None  # set by stream_start: slim per-frame headers from then on
+    websocket.state.turn = None  # ActiveTurn while STT/LLM/TTS for a turn are running
     client = websocket.client or ("unknown", 0)
     logger.info("websocket_connected client=%s", client)
 
@@ -129,18 +219,22 @@ async def audio_websocket(websocket: WebSocket):
                 break
             if "bytes" in message and message["bytes"] is not None:
                 raw_frame = message["bytes"]
+                metrics.FRAMES.inc()
+                metrics.AUDIO_BYTES.inc(len(raw_frame))
+                frame_slot: protocol.FrameSlot | None = websocket.state.frame_slot
                 try:
-                    header = protocol.AudioFrameHeader.from_bytes(raw_frame)
+                    if frame_slot is not None:
+                        header = frame_slot.parse(raw_frame)  # slim header, format from stream_start
+                        header_size = protocol.SLIM_HEADER_SIZE
+                    else:
+                        header = protocol.AudioFrameHeader.from_bytes(raw_frame)
+                        header_size = protocol.HEADER_SIZE
                 except ValueError as exc:
                     logger.warning("invalid_audio_header client=%s error=%s", client, exc)
-                    await websocket.send_text(
-                        protocol.encode_control_message(
-                            "error", {"detail": str(exc), "received_bytes": len(raw_frame)}
-                        )
-                    )
+                    await _send_control(websocket, "error", {"detail": str(exc), "received_bytes": len(raw_frame)})
                     continue
 
-                frame_payload = raw_frame[protocol.HEADER_SIZE :]
+                frame_payload = memoryview(raw_frame)[header_size:]  # appended without an extra copy
                 if len(frame_payload) != header.payload_len:
                     logger.warning(
                         "payload_length_mismatch client=%s header=%s actual=%d",
@@ -148,139 +242,482 @@ async def audio_websocket(websocket: WebSocket):
                         header.payload_len,
                         len(frame_payload),
                     )
-                    await websocket.send_text(
-                        protocol.encode_control_message(
-                            "error",
-                            {
-                                "detail": "audio payload length mismatch",
-                                "header_payload_len": header.payload_len,
-                                "actual_payload_len": len(frame_payload),
-                            },
-                        )
+                    await _send_control(
+                        websocket,
+                        "error",
+                        {
+                            "detail": "audio payload length mismatch",
+                            "header_payload_len": header.payload_len,
+                            "actual_payload_len": len(frame_payload),
+                        },
                     )
                     continue
 
+                if header.flags & protocol.FLAG_CONTROL:
+                    await _handle_compact_control(websocket, header, frame_payload)
+                    continue
+
+                block_lengths = (len(frame_payload),)
+                if header.flags & protocol.FLAG_SUPERFRAME:
+                    # Everything below then runs once per message instead of once per packed frame.
+                    try:
+                        header, sequences, block_lengths, frame_payload = protocol.split_superframe(
+                            header, frame_payload
+                        )
+                    except ValueError as exc:
+                        logger.warning("invalid_superframe client=%s sequence=%d error=%s", client, header.sequence, exc)
+                        await _send_control(websocket, "error", {"detail": str(exc), "sequence": header.sequence})
+                        continue
+                    logger.debug("superframe client=%s frames=%d sequences=%s", client, len(sequences), sequences)
+
+                wire_header = header
+                if header.flags & protocol.FLAG_ADPCM:
+                    try:
+                        header = adpcm.decoded_header(wire_header, block_lengths)
+                    except ValueError as exc:
+                        logger.warning("invalid_adpcm client=%s sequence=%d error=%s", client, header.sequence, exc)
+                        await _send_control(websocket, "error", {"detail": str(exc), "sequence": header.sequence})
+                        continue
+
                 audio_buffer: AudioStreamBuffer = websocket.state.audio_buffer
+                endpointer: vad.VoiceEndpointer | None = websocket.state.endpointer
+                if endpointer is not None and not endpointer.accepts(header):
+                    endpointer = None
+                if (
+                    endpointer is not None
+                    and not endpointer.speech_seen
+                    and not endpointer.speech_pending
+                    and _estimate_duration_ms(audio_buffer.byte_count(), header)
+                    >= vad.VAD_PREROLL_MS + vad.VAD_PREROLL_SLACK_MS
+                ):
+                    # Open mic: slide a window of the last VAD_PREROLL_MS over the silence ahead
+                    # of the next utterance, so a word onset is never cut off. The slack lets
+                    # silence build up so the tail is copied once per slack, not once per frame.
+                    _trim_preroll(websocket, endpointer, header)
                 try:
-                    audio_buffer.append_frame(header, frame_payload)
-                    logger.debug(
-                        "frame_buffered client=%s sequence=%d total_bytes=%d",
-                        client,
-                        header.sequence,
-                        audio_buffer.byte_count(),
+                    if wire_header is not header:
+                        # Decode straight into the session buffer; VAD then scores the decoded PCM.
+                        region = audio_buffer.append_decoded(header)
+                        frame_payload = adpcm.decode_blocks(
+                            frame_payload, block_lengths, out=np.frombuffer(region, dtype="<i2")
+                        )
+                    else:
+                        audio_buffer.append_frame(header, frame_payload)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "frame_buffered client=%s sequence=%d frame_ms=%.1f wire_bytes=%d total_bytes=%d",
+                            client,
+                            header.sequence,
+                            _estimate_duration_ms(wire_header.payload_len, wire_header, len(block_lengths)),
+                            wire_header.payload_len,
+                            audio_buffer.byte_count(),
+                        )
+                except BufferLimitError as exc:
+                    # Keep what was buffered so a late speech_end/flush can still transcribe it.
+                    logger.warning(
+                        "frame_rejected client=%s sequence=%d error=%s", client, header.sequence, exc
                     )
+                    await _send_control(
+                        websocket,
+                        "error",
+                        {
+                            "detail": "buffer_limit",
+                            "sequence": header.sequence,
+                            "limit_bytes": exc.limit_bytes,
+                            "buffered_bytes": exc.buffered_bytes,
+                        },
+                    )
+                    continue
                 except ValueError as exc:
-                    audio_buffer.clear()
+                    _reset_utterance(websocket)
                     logger.warning(
                         "frame_rejected client=%s sequence=%d error=%s",
                         client,
                         header.sequence,
                         exc,
                     )
-                    await websocket.send_text(
-                        protocol.encode_control_message(
-                            "error",
-                            {
-                                "detail": str(exc),
-                                "sequence": header.sequence,
-                                "sample_rate": header.sample_rate,
-                                "channels": header.channels,
-                                "bits_per_sample": header.bits_per_sample,
-                            },
-                        )
+                    await _send_control(
+                        websocket,
+                        "error",
+                        {
+                            "detail": str(exc),
+                            "sequence": header.sequence,
+                            "sample_rate": header.sample_rate,
+                            "channels": header.channels,
+                            "bits_per_sample": header.bits_per_sample,
+                        },
                     )
+                else:
+                    _schedule_partial_decode(websocket)
+                    endpoint = endpointer is not None and endpointer.feed(frame_payload)
+                    if BARGE_IN and endpointer is not None and endpointer.speech_seen and _turn_running(websocket):
+                        await _cancel_turn(websocket, "barge_in")
+                    if endpoint:
+                        await _handle_endpoint(websocket, endpointer)
+                    budget = audio_buffer.budget
+                    if budget.under_pressure():
+                        # Stop reading this socket for a while so TCP pushes back on the stone.
+                        waited_ms = await budget.wait_for_room()
+                        logger.warning(
+                            "audio_backpressure client=%s waited_ms=%.1f used=%d", client, waited_ms, budget.used
+                        )
 
             elif "text" in message and message["text"] is not None:
                 await _handle_control_message(websocket, message["text"])
             else:
-                await websocket.send_text(protocol.encode_control_message("noop", {}))
+                await _send_control(websocket, "noop", {})
     except WebSocketDisconnect:
         # TODO: add reconnect/backoff strategy for clients.
         return
+    finally:
+        _SESSION_BUFFERS.discard(websocket.state.audio_buffer)
+        turn: ActiveTurn | None = websocket.state.turn
+        if turn is not None and not turn.task.done():
+            # Nobody is listening any more: stop provider calls and synthesis right away.
+            turn.task.cancel()
+            await asyncio.gather(turn.task, return_exceptions=True)
+        if websocket.state.speculation is not None:
+            websocket.state.speculation.cancel()
+        await websocket.state.chat_history.close()
+
+
+async def _send_control(websocket: WebSocket, event: str, payload: dict) -> None:
+    """Send a control event in the connection's negotiated encoding (JSON text or compact binary)."""
+    if event == "error":
+        metrics.count_error(payload.get("detail"))
+    encoding = getattr(websocket.state, "control_encoding", protocol.CONTROL_ENCODING_JSON)
+    message = protocol.encode_control(event, payload, encoding)
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_text(message)
 
 
 async def _handle_control_message(websocket: WebSocket, raw_text: str) -> None:
-    """Process control messages coming from the client."""
+    """Process JSON control messages coming from the client."""
     try:
         control = protocol.decode_control_message(raw_text)
     except json.JSONDecodeError:
-        await websocket.send_text(protocol.encode_control_message("ack", {"echo": raw_text}))
+        await _send_control(websocket, "ack", {"echo": raw_text})
         return
 
     if control.get("type") != protocol.MSG_TYPE_CONTROL:
-        await websocket.send_text(protocol.encode_control_message("ack", {"echo": raw_text}))
+        await _send_control(websocket, "ack", {"echo": raw_text})
+        return
+    await _dispatch_control(websocket, control)
+
+
+async def _handle_compact_control(
+    websocket: WebSocket, header: protocol.AudioFrameHeader, body: memoryview
+) -> None:
+    """Process a binary `FLAG_CONTROL` frame (accepted whatever encoding was negotiated)."""
+    if not protocol.compact_encoding_available():
+        await _send_control(websocket, "error", {"detail": "compact control encoding unavailable"})
         return
+    try:
+        control = protocol.decode_compact_control(header, body)
+    except Exception as exc:  # noqa: BLE001 - malformed MessagePack
+        logger.warning("invalid_compact_control client=%s event_id=%d error=%s", websocket.client, header.sequence, exc)
+        await _send_control(websocket, "error", {"detail": "invalid control frame", "event_id": header.sequence})
+        return
+    await _dispatch_control(websocket, control)
 
+
+async def _dispatch_control(websocket: WebSocket, control: dict) -> None:
     event = control.get("event")
     if event == "speech_end":
         logger.info("control_event client=%s event=speech_end", websocket.client)
         await _flush_transcription(websocket)
+    elif event == "cancel":
+        logger.info("control_event client=%s event=cancel", websocket.client)
+        if not await _cancel_turn(websocket, "cancel"):
+            await _send_control(websocket, "ack", {"event": "cancel"})
+    elif event == "stream_start":
+        await _start_stream(websocket, control.get("payload") or {})
     elif event == "reset_buffer":
-        websocket.state.audio_buffer.clear()
+        _reset_utterance(websocket)
         logger.info("control_event client=%s event=reset_buffer", websocket.client)
-        await websocket.send_text(protocol.encode_control_message("ack", {"event": "reset_buffer"}))
+        await _send_control(websocket, "ack", {"event": "reset_buffer"})
     elif event == "text_input":
-        payload = control.get("payload") or {}
-        try:
-            await _process_text_input(websocket, payload)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("text_input_failed client=%s error=%s", websocket.client, exc)
-            await websocket.send_text(
-                protocol.encode_control_message(
-                    "error",
-                    {
-                        "detail": "text_input_failed",
-                        "error": str(exc),
-                    },
-                )
-            )
+        await _start_turn(websocket, "text", _text_input_turn(websocket, control.get("payload") or {}))
     else:
         logger.debug("control_event client=%s event=%s", websocket.client, event)
-        await websocket.send_text(protocol.encode_control_message("ack", {"event": event}))
+        await _send_control(websocket, "ack", {"event": event})
+
+
+async def _start_stream(websocket: WebSocket, payload: dict) -> None:
+    """Fix the connection's audio format; later uplink frames carry only the slim header."""
+    try:
+        websocket.state.frame_slot = protocol.parse_stream_format(payload)
+    except ValueError as exc:
+        await _send_control(websocket, "error", {"detail": str(exc)})
+        return
+    _reset_utterance(websocket)
+    slot = websocket.state.frame_slot
+    logger.info(
+        "control_event client=%s event=stream_start sample_rate=%d channels=%d bits_per_sample=%d",
+        websocket.client,
+        slot.sample_rate,
+        slot.channels,
+        slot.bits_per_sample,
+    )
+    await _send_control(websocket, "ack", {"event": "stream_start", "header_bytes": protocol.SLIM_HEADER_SIZE})
+
+
+def _reset_utterance(websocket: WebSocket) -> None:
+    """Drop buffered audio and any incremental transcription/VAD state for the next utterance."""
+    websocket.state.audio_buffer.clear()
+    if websocket.state.streaming_stt is not None:
+        websocket.state.streaming_stt.reset()
+    if websocket.state.endpointer is not None:
+        websocket.state.endpointer.reset()
+    if websocket.state.speculation is not None:
+        websocket.state.speculation.cancel()
+
+
+def _trim_preroll(websocket: WebSocket, endpointer: vad.VoiceEndpointer, header: protocol.AudioFrameHeader) -> None:
+    """Keep only the last `VAD_PREROLL_MS` of leading silence in the session buffer."""
+    frame_bytes = header.channels * (header.bits_per_sample // 8)
+    preroll_bytes = int(header.sample_rate * vad.VAD_PREROLL_MS / 1000) * frame_bytes
+    dropped = websocket.state.audio_buffer.keep_tail(preroll_bytes)
+    if endpointer.speech_ms:
+        endpointer.reset()  # a blip shorter than VAD_MIN_SPEECH_MS that died out
+    if not dropped:
+        return
+    # Window decodes and speculation refer to offsets that just moved.
+    if websocket.state.streaming_stt is not None:
+        websocket.state.streaming_stt.reset()
+    if websocket.state.speculation is not None:
+        websocket.state.speculation.cancel()
+
+
+def _turn_running(websocket: WebSocket) -> bool:
+    turn: ActiveTurn | None = websocket.state.turn
+    return turn is not None and not turn.task.done()
+
+
+async def _start_turn(websocket: WebSocket, kind: str, work: Awaitable[None]) -> None:
+    """Run `work` as the session's turn; a turn still in flight is cancelled first."""
+    await _cancel_turn(websocket, "superseded")
+    turn = ActiveTurn(kind, asyncio.create_task(work))
+    websocket.state.turn = turn
+    turn.task.add_done_callback(lambda _: _clear_turn(websocket, turn))
+
+
+def _clear_turn(websocket: WebSocket, turn: ActiveTurn) -> None:
+    if websocket.state.turn is turn:
+        websocket.state.turn = None
+    if not turn.task.cancelled() and turn.task.exception() is not None:
+        logger.error("turn_failed client=%s kind=%s", websocket.client, turn.kind, exc_info=turn.task.exception())
+
+
+async def _cancel_turn(websocket: WebSocket, reason: str) -> bool:
+    """Cancel the turn in flight and send `turn_cancelled`; False when there was none.
+
+    Cancellation aborts the pending OpenRouter/ElevenLabs requests, stops TTS workers at
+    their next chunk, frees the turn's stage slots and drops TTS audio not yet sent.
+    """
+    turn: ActiveTurn | None = websocket.state.turn
+    if turn is None or turn.task.done():
+        return False
+    turn.task.cancel()
+    websocket.state.turn = None
+    elapsed_ms = round((time.perf_counter() - turn.started) * 1000.0, 2)
+    metrics.TURNS_CANCELLED.labels(reason).inc()
+    logger.info(
+        "turn_cancelled client=%s kind=%s reason=%s elapsed_ms=%.1f", websocket.client, turn.kind, reason, elapsed_ms
+    )
+    await _send_control(websocket, "turn_cancelled", {"reason": reason, "kind": turn.kind, "elapsed_ms": elapsed_ms})
+    return True
+
+
+async def _handle_endpoint(websocket: WebSocket, endpointer: vad.VoiceEndpointer) -> None:
+    """Trailing silence passed the hangover: report it and flush as if speech_end arrived."""
+    logger.info(
+        "endpoint_detected client=%s speech_ms=%.0f trailing_silence_ms=%.0f",
+        websocket.client,
+        endpointer.speech_ms,
+        endpointer.trailing_silence_ms,
+    )
+    await _send_control(
+        websocket,
+        "endpoint_detected",
+        {
+            "speech_ms": round(endpointer.speech_ms, 2),
+            "trailing_silence_ms": round(endpointer.trailing_silence_ms, 2),
+        },
+    )
+    await _flush_transcription(websocket)
+
+
+def _schedule_partial_decode(websocket: WebSocket) -> None:
+    """Start a background window decode when streaming STT has enough new audio."""
+    streaming: StreamingTranscript | None = websocket.state.streaming_stt
+    if streaming is None or not streaming.should_decode(websocket.state.audio_buffer.byte_count()):
+        return
+    pcm_bytes, header = websocket.state.audio_buffer.snapshot()
+    streaming.task = asyncio.create_task(
+        _decode_partial(websocket, streaming, pcm_bytes, header, websocket.state.speculation)
+    )
+
+
+async def _decode_partial(
+    websocket: WebSocket,
+    streaming: StreamingTranscript,
+    pcm_bytes: memoryview,
+    header: protocol.AudioFrameHeader,
+    speculation: SpeculativeReply | None,
+) -> None:
+    """Decode the uncommitted tail, commit stable segments and report a partial transcript."""
+    window_start = streaming.committed_bytes
+    window_end = len(pcm_bytes)
+    try:
+        segments = await stt_workers.run_stt(transcribe_segments, pcm_bytes[window_start:], header, streaming.prompt())
+    except Exception as exc:  # noqa: BLE001 - a bad window must not kill the task unobserved
+        # Skip this window; the next step (or speech_end) decodes the tail again.
+        streaming.decoded_bytes = window_end
+        logger.warning("partial_decode_failed client=%s error=%s", websocket.client, exc)
+        return
+
+    committed = streaming.apply(segments, window_start, window_end)
+    logger.debug(
+        "partial_decoded client=%s window_bytes=%d committed_segments=%d",
+        websocket.client,
+        window_end - window_start,
+        len(committed),
+    )
+    partial = streaming.partial_payload()
+    await _send_control(websocket, "partial_transcript", partial)
+    if speculation is not None:
+        chat_history: ChatHistory = websocket.state.chat_history
+        speculation.observe(partial["text"], chat_history.messages(), chat_history.revision)
+
+
+async def _speculative_reply(text: str, history: list) -> str:
+    """Early LLM call for a stable partial transcript, admitted like any other LLM call."""
+    async with stage_pool.get_stage_pool("llm").slot():
+        # Raise instead of echoing, so a failed speculation falls back to a real request.
+        return await generate_reply(text, history, echo_fallback=False)
+
+
+async def _finish_streaming_transcript(
+    streaming: StreamingTranscript,
+    pcm_bytes: bytes,
+    header: protocol.AudioFrameHeader,
+    timer: StageTimer,
+) -> str:
+    """Wait for any in-flight window, then decode only the uncommitted tail."""
+    if streaming.task is not None:
+        try:
+            await streaming.task
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("partial_decode_failed error=%s", exc)
+    tail = pcm_bytes[streaming.committed_bytes :]
+    timer.record("stt_tail_ms", _estimate_duration_ms(len(tail), header))
+    segments = []
+    if tail:
+        segments = await stt_workers.run_stt(transcribe_segments, tail, header, streaming.prompt(), timer=timer)
+    return streaming.final_text(segments)
+
+
+async def _report_stage_busy(websocket: WebSocket, exc: stage_pool.StageBusyError) -> None:
+    """Tell the client a stage rejected the turn because its queue stayed full."""
+    logger.warning("turn_rejected client=%s stage=%s error=%s", websocket.client, exc.stage, exc)
+    await _send_control(
+        websocket,
+        "error",
+        {
+            "detail": "stage_busy",
+            "stage": exc.stage,
+            "waited_ms": round(exc.waited_s * 1000.0, 2),
+        },
+    )
 
 
 async def _flush_transcription(websocket: WebSocket) -> None:
-    """Run STT + LLM + TTS for the buffered audio and reset the buffer."""
+    """Hand the buffered utterance to a new turn that runs STT + LLM + TTS for it.
+
+    The session's buffer and incremental STT state start over right away, so audio that
+    arrives while the turn runs belongs to the next utterance (and may barge in).
+    """
     audio_buffer: AudioStreamBuffer = websocket.state.audio_buffer
     if audio_buffer.is_empty():
         logger.info("flush_skipped client=%s reason=no_audio", websocket.client)
-        await websocket.send_text(protocol.encode_control_message("noop", {"detail": "no audio buffered"}))
+        await _send_control(websocket, "noop", {"detail": "no audio buffered"})
         return
 
+    pcm_bytes, header = audio_buffer.snapshot()
+    streaming: StreamingTranscript | None = websocket.state.streaming_stt
+    speculation: SpeculativeReply | None = websocket.state.speculation
+    if streaming is not None:
+        websocket.state.streaming_stt = StreamingTranscript()
+    if speculation is not None:
+        websocket.state.speculation = SpeculativeReply(_speculative_reply)
+    audio_buffer.clear()
+    if websocket.state.endpointer is not None:
+        websocket.state.endpointer.reset()
+    await _start_turn(websocket, "audio", _audio_turn(websocket, pcm_bytes, header, streaming, speculation))
+
+
+async def _audio_turn(
+    websocket: WebSocket,
+    pcm_bytes: memoryview,
+    header: protocol.AudioFrameHeader,
+    streaming: StreamingTranscript | None,
+    speculation: SpeculativeReply | None,
+) -> None:
+    try:
+        with tracing.turn("audio", client=str(websocket.client)) as trace:
+            await _run_audio_turn(websocket, pcm_bytes, header, streaming, speculation, trace)
+    except Exception as exc:  # noqa: BLE001 - the stone would otherwise wait for a reply forever
+        logger.exception("turn_failed client=%s kind=audio error=%s", websocket.client, exc)
+        await _send_control(websocket, "error", {"detail": "turn_failed", "error": str(exc)})
+    finally:
+        # Stop the utterance's in-flight window decode and speculative reply if still running.
+        if streaming is not None:
+            streaming.reset()
+        if speculation is not None:
+            speculation.cancel()
+
+
+async def _run_audio_turn(
+    websocket: WebSocket,
+    pcm_bytes: memoryview,
+    header: protocol.AudioFrameHeader,
+    streaming: StreamingTranscript | None,
+    speculation: SpeculativeReply | None,
+    trace: tracing.Turn,
+) -> None:
     timer = StageTimer()
     try:
-        pcm_bytes, header = audio_buffer.snapshot()
         duration_ms = _estimate_duration_ms(len(pcm_bytes), header)
         logger.info(
-            "flush_begin client=%s buffered_bytes=%d est_duration_ms=%.2f",
+            "flush_begin client=%s turn=%s buffered_bytes=%d est_duration_ms=%.2f",
             websocket.client,
+            trace.turn_id,
             len(pcm_bytes),
             duration_ms,
         )
-        transcript = transcribe_audio(pcm_bytes, header)
+        trace.attrs["audio_ms"] = duration_ms
+        with tracing.span("stt", streaming=streaming is not None):
+            if streaming is not None:
+                transcript = await _finish_streaming_transcript(streaming, pcm_bytes, header, timer)
+            else:
+                transcript = await stt_batch.transcribe(pcm_bytes, header, timer=timer)
         timer.mark("stt")
     except ValueError as exc:
         logger.error("flush_failed client=%s error=%s", websocket.client, exc)
-        await websocket.send_text(protocol.encode_control_message("error", {"detail": str(exc)}))
-        audio_buffer.clear()
+        await _send_control(websocket, "error", {"detail": str(exc)})
+        return
+    except stage_pool.StageBusyError as exc:
+        await _report_stage_busy(websocket, exc)
         return
 
-    chat_history: list[dict[str, str]] = websocket.state.chat_history
-    reply_text = generate_reply(transcript, chat_history)
-    timer.mark("llm")
-    tts_bytes = synthesize_speech(reply_text)
-    timer.mark("tts")
-
-    # Maintain per-connection history so the LLM can reference prior turns.
-    chat_history.append({"role": "user", "content": transcript})
-    chat_history.append({"role": "assistant", "content": reply_text})
-
-    timings = timer.metrics()
-    logger.info("timings=%s transcript_len=%d reply_len=%d", timings, len(transcript), len(reply_text))
-
-    await websocket.send_text(
-        protocol.encode_control_message(
-            "transcription_ready",
+    try:
+        reply_text = await _reply_to_turn(
+            websocket,
+            transcript,
+            timer,
             {
                 "header": {
                     "sample_rate": header.sample_rate,
@@ -289,15 +726,118 @@ async def _flush_transcription(websocket: WebSocket) -> None:
                     "flags": header.flags,
                 },
                 "payload_bytes": len(pcm_bytes),
-                "transcript": transcript,
-                "reply": reply_text,
             },
+            speak=True,
+            speculation=speculation,
         )
+    except stage_pool.StageBusyError as exc:
+        await _report_stage_busy(websocket, exc)
+        return
+
+    timings = timer.metrics()
+    metrics.observe_timings(timings, "audio")
+    logger.info(
+        "timings=%s turn=%s transcript_len=%d reply_len=%d",
+        timings,
+        trace.turn_id,
+        len(transcript),
+        len(reply_text),
     )
 
-    # TODO: stream synthesized TTS bytes over WebSocket once streaming is implemented.
-    await websocket.send_bytes(tts_bytes)
-    audio_buffer.clear()
+
+async def _reply_to_turn(
+    websocket: WebSocket,
+    transcript: str,
+    timer: StageTimer,
+    ready_payload: dict,
+    speak: bool,
+    speculation: SpeculativeReply | None = None,
+) -> str:
+    """Run the LLM (and TTS) for a transcript and send the reply to the client.
+
+    The order is always `transcription_ready`, TTS chunks, `tts_end`.
+    `transcription_ready` carries the transcript, the timings so far and the turn's
+    trace summary. It also carries the reply when that is complete before any audio
+    goes out. With `OPENROUTER_STREAM` the first sentence is spoken while the reply
+    still streams, so there the reply text arrives in `tts_end`. A spoken turn always
+    ends with `tts_end`, which carries the reply and the full timings. A
+    `speculation` that already answered this transcript replaces the LLM call.
+    """
+    chat_history: ChatHistory = websocket.state.chat_history
+    history, revision = chat_history.messages(), chat_history.revision
+    timer.record("history_tokens", chat_history.token_count())
+    sender = TtsChunkSender(websocket.send_bytes, timer=timer) if speak else None
+    ready_sent = False
+
+    async def send_ready(reply_text: str | None) -> None:
+        nonlocal ready_sent
+        ready_sent = True
+        payload = {**ready_payload, "transcript": transcript, "timings": timer.metrics()}
+        if reply_text is not None:
+            payload["reply"] = reply_text
+        trace = tracing.current_turn()
+        if trace is not None:
+            payload["trace"] = trace.summary()
+        await _send_control(websocket, "transcription_ready", payload)
+
+    if OPENROUTER_STREAM:
+        send_audio = None
+        if sender is not None:
+
+            async def send_audio(pcm: bytes) -> None:
+                if not ready_sent:
+                    await send_ready(None)
+                await sender.send(pcm)
+
+        with tracing.span("reply", streamed=True, spoken=speak):
+            reply_text = await reply_pipeline.stream_spoken_reply(transcript, history, timer, send_audio)
+        if not ready_sent:
+            await send_ready(reply_text)
+    else:
+        with tracing.span("llm"):
+            reply_text = await speculation.take(transcript, revision) if speculation is not None else None
+            if reply_text is not None:
+                timer.count("llm_speculative_hits")
+            else:
+                async with stage_pool.get_stage_pool("llm").slot(timer=timer):
+                    reply_text = await generate_reply(transcript, history)
+        timer.mark("llm")
+        await send_ready(reply_text)
+
+    # Maintain per-connection history so the LLM can reference prior turns.
+    chat_history.append("user", transcript)
+    chat_history.append("assistant", reply_text)
+    # Over budget: fold older turns into the summary while the reply is delivered.
+    chat_history.schedule_compaction()
+
+    if sender is not None:
+        if not OPENROUTER_STREAM:
+            with tracing.span("tts"):
+                async for pcm in tts_cache.iter_cached_speech(reply_text, iter_speech, timer=timer):
+                    await sender.send(pcm)
+            timer.mark("tts")
+        await sender.finish()
+        await _send_control(
+            websocket, "tts_end", {**sender.summary(), "reply": reply_text, "timings": timer.metrics()}
+        )
+    return reply_text
+
+
+async def _text_input_turn(websocket: WebSocket, payload: dict) -> None:
+    try:
+        await _process_text_input(websocket, payload)
+    except stage_pool.StageBusyError as exc:
+        await _report_stage_busy(websocket, exc)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("text_input_failed client=%s error=%s", websocket.client, exc)
+        await _send_control(
+            websocket,
+            "error",
+            {
+                "detail": "text_input_failed",
+                "error": str(exc),
+            },
+        )
 
 
 async def _process_text_input(websocket: WebSocket, payload: dict) -> None:
@@ -305,44 +845,28 @@ async def _process_text_input(websocket: WebSocket, payload: dict) -> None:
     text = (payload.get("text") or "").strip()
     skip_tts = bool(payload.get("skip_tts"))
     if not text:
-        await websocket.send_text(protocol.encode_control_message("error", {"detail": "empty text input"}))
+        await _send_control(websocket, "error", {"detail": "empty text input"})
         return
 
     timer = StageTimer()
     transcript = text
-    chat_history: list[dict[str, str]] = websocket.state.chat_history
-    reply_text = generate_reply(transcript, chat_history)
-    timer.mark("llm")
-    tts_bytes = b""
-    if not skip_tts:
-        tts_bytes = synthesize_speech(reply_text)
-        timer.mark("tts")
-
-    chat_history.append({"role": "user", "content": transcript})
-    chat_history.append({"role": "assistant", "content": reply_text})
+    with tracing.turn("text", client=str(websocket.client), skip_tts=skip_tts) as trace:
+        reply_text = await _reply_to_turn(
+            websocket,
+            transcript,
+            timer,
+            {"header": None, "payload_bytes": 0, "tts_skipped": skip_tts},
+            speak=not skip_tts,
+        )
 
     timings = timer.metrics()
+    metrics.observe_timings(timings, "text")
     logger.info(
-        "text_input_processed client=%s timings=%s transcript_len=%d reply_len=%d skip_tts=%s",
+        "text_input_processed client=%s turn=%s timings=%s transcript_len=%d reply_len=%d skip_tts=%s",
         websocket.client,
+        trace.turn_id,
         timings,
         len(transcript),
         len(reply_text),
         skip_tts,
     )
-
-    await websocket.send_text(
-        protocol.encode_control_message(
-            "transcription_ready",
-            {
-                "header": None,
-                "payload_bytes": 0,
-                "transcript": transcript,
-                "reply": reply_text,
-                "timings": timings,
-                "tts_skipped": skip_tts,
-            },
-        )
-    )
-    if not skip_tts:
-        await websocket.send_bytes(tts_bytes)
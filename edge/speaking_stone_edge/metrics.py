@@ -0,0 +1,308 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python objects guarded by a lock (updates
+come from the event loop and from stage worker threads), so recording a frame costs a
+few hundred nanoseconds and the registry can stay on in production. Gauges that mirror
+existing state (active sessions' buffered bytes, stage queue depth) are evaluated
+lazily at scrape time via `set_function`. `GET /metrics` returns `render()`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "speaking_stone")
+METRICS_LOOP_LAG_INTERVAL_MS = float(os.getenv("METRICS_LOOP_LAG_INTERVAL_MS", "500"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = f"{METRICS_NAMESPACE}_{name}" if METRICS_NAMESPACE else name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[Tuple[str, LabelValues, str, float]]:
+        """Yield (suffix, label values, extra label text, value)."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_label_text(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield "_total", values, "", child.value
+
+
+class _GaugeChild:
+    __slots__ = ("_lock", "value", "function")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at scrape time instead."""
+        self.function = function
+
+    def read(self) -> float:
+        if self.function is None:
+            return self.value
+        try:
+            return float(self.function())
+        except Exception as exc:  # noqa: BLE001 - a broken probe must not fail the scrape
+            logger.debug("gauge_probe_failed error=%s", exc)
+            return math.nan
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._collector: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild(self._lock)
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def set_collector(self, collector: Callable[[], Dict[LabelValues, float]]) -> None:
+        """For labelled gauges: `collector()` returns {label values: value} at scrape time."""
+        self._collector = collector
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield "", values, "", child.read()
+        if self._collector is not None:
+            try:
+                collected = self._collector()
+            except Exception as exc:  # noqa: BLE001
+                logger.debug("gauge_collector_failed name=%s error=%s", self.name, exc)
+                collected = {}
+            for values, value in collected.items():
+                yield "", values, "", value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]) -> None:
+        self._lock = lock
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: above the largest bound
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        slot = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS_S,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            with self._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield "_bucket", values, f'le="{_format_value(bound)}"', cumulative
+            yield "_sum", values, "", total
+            yield "_count", values, "", count
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("stage_seconds", "Per-turn stage latency (stt, llm, tts, first_audio, total).", ("stage",))
+)
+TURNS = REGISTRY.register(Counter("turns", "Completed turns by input kind.", ("kind",)))
+TURNS_CANCELLED = REGISTRY.register(
+    Counter("turns_cancelled", "Turns cancelled in flight (barge_in, cancel, superseded).", ("reason",))
+)
+FRAMES = REGISTRY.register(Counter("audio_frames", "Uplink binary audio messages received."))
+AUDIO_BYTES = REGISTRY.register(Counter("audio_bytes", "Uplink audio payload bytes received (as sent)."))
+ERRORS = REGISTRY.register(Counter("errors", "`error` control events sent, by detail code.", ("detail",)))
+FALLBACKS = REGISTRY.register(Counter("fallbacks", "Provider fallbacks (echo reply, placeholder audio).", ("stage",)))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge("active_sessions", "Open /ws/audio connections."))
+BUFFERED_BYTES = REGISTRY.register(Gauge("buffered_audio_bytes", "PCM buffered across all sessions."))
+QUEUE_DEPTH = REGISTRY.register(Gauge("stage_queue_depth", "Calls waiting for a stage worker slot.", ("stage",)))
+LOOP_LAG_SECONDS = REGISTRY.register(
+    Histogram("event_loop_lag_seconds", "Event loop scheduling delay of a periodic probe.", buckets=LOOP_LAG_BUCKETS_S)
+)
+
+# Latency-bearing StageTimer keys; queue waits and counters stay in the turn log only.
+TIMED_STAGES = ("stt", "llm", "tts", "first_audio", "total")
+# `detail` values of error events that are stable codes; free-text details count as "other".
+ERROR_CODES = frozenset(
+    {
+        "stage_busy",
+        "buffer_limit",
+        "text_input_failed",
+        "turn_failed",
+        "audio payload length mismatch",
+        "invalid control frame",
+    }
+)
+
+
+def observe_timings(timings: Dict[str, float], kind: str) -> None:
+    """Feed a finished turn's `StageTimer.metrics()` into the stage histograms."""
+    TURNS.labels(kind).inc()
+    for stage in TIMED_STAGES:
+        value = timings.get(f"{stage}_ms")
+        if value is not None:
+            STAGE_SECONDS.labels(stage).observe(value / 1000.0)
+
+
+def count_error(detail: object) -> None:
+    ERRORS.labels(detail if detail in ERROR_CODES else "other").inc()
+
+
+async def probe_loop_lag(interval_ms: float = METRICS_LOOP_LAG_INTERVAL_MS) -> None:
+    """Sleep `interval_ms` repeatedly and record how late each wake-up was."""
+    interval = interval_ms / 1000.0
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, time.perf_counter() - started - interval))
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,190 @@
+"""On-box Piper (VITS) text-to-speech through onnxruntime.
+
+A voice is an `.onnx` model plus its `.onnx.json` config (see
+`tests/data/tts/voices/alan/en_GB-alan-low.onnx.json`). Text is phonemized with
+espeak-ng via the optional `piper-phonemize` package (configs with
+`"phoneme_type": "text"` map characters directly), split into sentences, and each
+sentence is synthesized and yielded as 16 kHz mono PCM16 before the next one starts.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PAD, BOS, EOS = "_", "^", "$"
+
+
+@dataclass(frozen=True)
+class PiperConfig:
+    """The parts of a Piper voice config needed for inference."""
+
+    sample_rate: int
+    phoneme_id_map: Dict[str, List[int]]
+    espeak_voice: str = "en-us"
+    phoneme_type: str = "espeak"
+    noise_scale: float = 0.667
+    length_scale: float = 1.0
+    noise_w: float = 0.8
+    num_speakers: int = 1
+    speaker_id_map: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_file(cls, path: str) -> "PiperConfig":
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        inference = data.get("inference") or {}
+        return cls(
+            sample_rate=int(data["audio"]["sample_rate"]),
+            phoneme_id_map=data["phoneme_id_map"],
+            espeak_voice=(data.get("espeak") or {}).get("voice", "en-us"),
+            phoneme_type=data.get("phoneme_type", "espeak"),
+            noise_scale=float(inference.get("noise_scale", 0.667)),
+            length_scale=float(inference.get("length_scale", 1.0)),
+            noise_w=float(inference.get("noise_w", 0.8)),
+            num_speakers=int(data.get("num_speakers", 1)),
+            speaker_id_map=data.get("speaker_id_map") or {},
+        )
+
+
+RESAMPLE_HALF_TAPS = 10  # filter half-length in units of the slower rate's sample period
+RESAMPLE_KAISER_BETA = 5.0
+_RESAMPLE_BLOCK = 4096  # output samples per vectorized step, bounds the index matrix
+
+
+@lru_cache(maxsize=8)
+def _lowpass(up: int, down: int) -> np.ndarray:
+    """Kaiser-windowed sinc at the lower of the two Nyquist rates, with gain `up`."""
+    cutoff = 1.0 / max(up, down)
+    half = RESAMPLE_HALF_TAPS * max(up, down)
+    taps = np.arange(-half, half + 1, dtype=np.float64)
+    fir = np.sinc(cutoff * taps) * np.kaiser(taps.size, RESAMPLE_KAISER_BETA)
+    return fir * (up / fir.sum())
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Polyphase resampler for float32 mono audio (identity when rates match).
+
+    Equivalent to `scipy.signal.resample_poly`: upsample by `up`, low-pass below the
+    lower Nyquist rate so nothing above the target band aliases, then keep every
+    `down`-th sample. Only the non-zero taps are evaluated.
+    """
+    if src_rate == dst_rate or audio.size == 0:
+        return audio
+    step = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // step, src_rate // step
+    fir = _lowpass(up, down)
+    half = fir.size // 2
+    samples = audio.astype(np.float64)
+    dst_len = -(-audio.size * up // down)
+    span = np.arange(-(-fir.size // up) + 1)
+    out = np.empty(dst_len, dtype=np.float32)
+    for start in range(0, dst_len, _RESAMPLE_BLOCK):
+        # Output k sits at k * down on the upsampled grid; input m contributes tap
+        # half + k * down - m * up while that lies inside the filter.
+        position = np.arange(start, min(start + _RESAMPLE_BLOCK, dst_len), dtype=np.int64) * down + half
+        first = -(-(position - (fir.size - 1)) // up)
+        index = first[:, None] + span
+        tap = position[:, None] - index * up
+        valid = (tap >= 0) & (tap < fir.size) & (index >= 0) & (index < samples.size)
+        weights = np.where(valid, fir[np.clip(tap, 0, fir.size - 1)], 0.0)
+        out[start : start + position.size] = (weights * samples[np.clip(index, 0, samples.size - 1)]).sum(axis=1)
+    return out
+
+
+def to_pcm16(audio: np.ndarray) -> bytes:
+    """Peak-normalize quiet-or-clipping float audio like Piper does, then convert to PCM16."""
+    peak = float(np.max(np.abs(audio))) if audio.size else 0.0
+    scale = 32767.0 / max(0.01, peak)
+    return np.clip(audio * scale, -32768, 32767).astype("<i2").tobytes()
+
+
+def _load_session(model_path: str, intra_op_threads: int) -> Any:
+    import onnxruntime  # optional dependency, only needed for TTS_BACKEND=piper
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class PiperVoice:
+    """A loaded Piper voice; `session` is any object with onnxruntime's `run` signature."""
+
+    def __init__(self, config: PiperConfig, session: Any, speaker_id: Optional[int] = None) -> None:
+        self.config = config
+        self._session = session
+        self._input_names = {node.name for node in session.get_inputs()}
+        self.speaker_id = speaker_id if config.num_speakers > 1 else None
+
+    @classmethod
+    def load(
+        cls,
+        model_path: str,
+        config_path: Optional[str] = None,
+        intra_op_threads: int = 1,
+        speaker_id: Optional[int] = None,
+    ) -> "PiperVoice":
+        config = PiperConfig.from_file(config_path or model_path + ".json")
+        session = _load_session(model_path, intra_op_threads)
+        logger.info(
+            "piper_voice_loaded model=%s sample_rate=%d threads=%d",
+            os.path.basename(model_path),
+            config.sample_rate,
+            intra_op_threads,
+        )
+        return cls(config, session, speaker_id=speaker_id)
+
+    def phonemize(self, text: str) -> List[List[str]]:
+        """Phonemes per sentence."""
+        if self.config.phoneme_type == "text":
+            return [list(text)]
+        from piper_phonemize import phonemize_espeak  # optional; needs espeak-ng data
+
+        return phonemize_espeak(text, self.config.espeak_voice)
+
+    def phoneme_ids(self, phonemes: Sequence[str]) -> List[int]:
+        """Map phonemes to ids with Piper's BOS / interleaved PAD / EOS framing."""
+        id_map = self.config.phoneme_id_map
+        ids: List[int] = list(id_map[BOS]) + list(id_map[PAD])
+        for phoneme in phonemes:
+            mapped = id_map.get(phoneme)
+            if mapped is None:
+                logger.debug("piper_missing_phoneme phoneme=%r", phoneme)
+                continue
+            ids.extend(mapped)
+            ids.extend(id_map[PAD])
+        ids.extend(id_map[EOS])
+        return ids
+
+    def synthesize_ids(self, ids: Sequence[int]) -> np.ndarray:
+        """Run the model on one sentence; returns float32 audio at the voice's sample rate."""
+        inputs: Dict[str, np.ndarray] = {
+            "input": np.asarray([ids], dtype=np.int64),
+            "input_lengths": np.asarray([len(ids)], dtype=np.int64),
+            "scales": np.asarray(
+                [self.config.noise_scale, self.config.length_scale, self.config.noise_w], dtype=np.float32
+            ),
+        }
+        if "sid" in self._input_names:
+            inputs["sid"] = np.asarray([self.speaker_id or 0], dtype=np.int64)
+        audio = self._session.run(None, inputs)[0]
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+    def iter_pcm(self, text: str, sample_rate: int) -> Iterator[bytes]:
+        """Yield PCM16 mono at `sample_rate`, one piece per sentence."""
+        for phonemes in self.phonemize(text):
+            if not phonemes:
+                continue
+            audio = self.synthesize_ids(self.phoneme_ids(phonemes))
+            yield to_pcm16(resample(audio, self.config.sample_rate, sample_rate))
@@ -6,7 +6,13 @@ Keep these values aligned with shared/protocol.md and firmware/main/protocol.h.
 import json
 import struct
 from dataclasses import dataclass
-from typing import Any, Dict, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Sequence, Tuple, Union
+
+try:  # optional: compact control encoding
+    import msgpack
+except ImportError:  # pragma: no cover - JSON stays available
+    msgpack = None
 
 MSG_TYPE_AUDIO_CHUNK = "MSG_TYPE_AUDIO_CHUNK"
 MSG_TYPE_TTS_CHUNK = "MSG_TYPE_TTS_CHUNK"
@@ -16,6 +22,38 @@ MSG_TYPE_CONTROL = "MSG_TYPE_CONTROL"
 HEADER_STRUCT = struct.Struct("<HHHBBH")
 HEADER_SIZE = HEADER_STRUCT.size
 
+# AudioFrameHeader.flags bits.
+FLAG_LAST_CHUNK = 0x0001  # downlink: final MSG_TYPE_TTS_CHUNK frame of a reply
+FLAG_SUPERFRAME = 0x0002  # uplink: payload packs several PCM frames behind a sequence/length table
+FLAG_ADPCM = 0x0004  # uplink: payload is IMA-ADPCM (4 bits per sample, one block per frame), not PCM
+FLAG_CONTROL = 0x8000  # compact control message: `sequence` is the event id, payload is a MessagePack map
+
+# Control message encodings, negotiated per connection (`/ws/audio?encoding=msgpack`).
+CONTROL_ENCODING_JSON = "json"
+CONTROL_ENCODING_MSGPACK = "msgpack"
+
+# Event ids for compact control frames; 0 means "see the `event` key in the payload".
+EVENT_ID_NAMED = 0
+EVENT_IDS: Dict[str, int] = {
+    # edge -> firmware
+    "connected": 1,
+    "ack": 2,
+    "noop": 3,
+    "error": 4,
+    "transcription_ready": 5,
+    "tts_end": 6,
+    "partial_transcript": 7,
+    "endpoint_detected": 8,
+    "turn_cancelled": 9,
+    # firmware -> edge
+    "speech_end": 32,
+    "reset_buffer": 33,
+    "text_input": 34,
+    "stream_start": 35,
+    "cancel": 36,
+}
+EVENT_NAMES: Dict[int, str] = {event_id: name for name, event_id in EVENT_IDS.items()}
+
 
 @dataclass(frozen=True)
 class AudioFrameHeader:
@@ -48,6 +86,122 @@ class AudioFrameHeader:
         return cls(*unpacked)
 
 
+# Slim per-frame header, used on the uplink after a `stream_start` control event has
+# declared the audio format for the connection: sequence, payload_len, flags.
+SLIM_HEADER_STRUCT = struct.Struct("<HHH")
+SLIM_HEADER_SIZE = SLIM_HEADER_STRUCT.size
+
+
+class FrameSlot:
+    """Reusable, mutable stand-in for `AudioFrameHeader` on slim-header streams.
+
+    The format fields are fixed by `stream_start`; `parse` refills sequence, length and
+    flags in place, so a frame costs one `unpack_from` and no header allocation. Anything
+    that outlives the frame must keep `freeze()` instead of the slot.
+    """
+
+    __slots__ = ("sequence", "payload_len", "sample_rate", "channels", "bits_per_sample", "flags")
+
+    def __init__(self, sample_rate: int, channels: int, bits_per_sample: int) -> None:
+        self.sequence = 0
+        self.payload_len = 0
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits_per_sample = bits_per_sample
+        self.flags = 0
+
+    def parse(self, data: bytes) -> "FrameSlot":
+        """Decode a slim header into this slot."""
+        if len(data) < SLIM_HEADER_SIZE:
+            raise ValueError(f"Incomplete audio header: expected {SLIM_HEADER_SIZE} bytes, got {len(data)}")
+        self.sequence, self.payload_len, self.flags = SLIM_HEADER_STRUCT.unpack_from(data)
+        return self
+
+    def freeze(self) -> AudioFrameHeader:
+        return AudioFrameHeader(
+            sequence=self.sequence,
+            payload_len=self.payload_len,
+            sample_rate=self.sample_rate,
+            channels=self.channels,
+            bits_per_sample=self.bits_per_sample,
+            flags=self.flags,
+        )
+
+
+def parse_stream_format(payload: Dict[str, Any]) -> FrameSlot:
+    """Validate a `stream_start` payload and return the connection's frame slot."""
+    fields = {}
+    for name, upper in (("sample_rate", 0xFFFF), ("channels", 0xFF), ("bits_per_sample", 0xFF)):
+        value = payload.get(name)
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 < value <= upper:
+            raise ValueError(f"stream_start needs an integer {name} in 1..{upper}")
+        fields[name] = value
+    return FrameSlot(**fields)
+
+
+# Superframe payload: u16 frame count, then (u16 sequence, u16 length) per frame, then the
+# frames' PCM back to back. The outer header carries the audio format shared by all frames.
+SUPERFRAME_COUNT_STRUCT = struct.Struct("<H")
+SUPERFRAME_ENTRY_SIZE = 4
+
+
+@lru_cache(maxsize=64)
+def _superframe_table(count: int) -> struct.Struct:
+    return struct.Struct(f"<{2 * count}H")
+
+
+def pack_superframe(
+    frames: Sequence[Tuple[int, bytes]], sample_rate: int, channels: int, bits_per_sample: int, flags: int = 0
+) -> bytes:
+    """Pack `(sequence, pcm)` frames into one `FLAG_SUPERFRAME` message."""
+    if not frames:
+        raise ValueError("superframe needs at least one frame")
+    table = _superframe_table(len(frames)).pack(*(value for sequence, pcm in frames for value in (sequence, len(pcm))))
+    payload = SUPERFRAME_COUNT_STRUCT.pack(len(frames)) + table + b"".join(pcm for _, pcm in frames)
+    if len(payload) > 0xFFFF:
+        raise ValueError(f"superframe payload too large: {len(payload)} bytes")
+    header = AudioFrameHeader(
+        sequence=frames[0][0],
+        payload_len=len(payload),
+        sample_rate=sample_rate,
+        channels=channels,
+        bits_per_sample=bits_per_sample,
+        flags=flags | FLAG_SUPERFRAME,
+    )
+    return header.to_bytes() + payload
+
+
+def split_superframe(
+    header: Union[AudioFrameHeader, FrameSlot], payload: Union[bytes, memoryview]
+) -> Tuple[AudioFrameHeader, Tuple[int, ...], Tuple[int, ...], memoryview]:
+    """Parse a superframe in one pass.
+
+    Returns a header describing the concatenated payload (first frame's sequence, total
+    length, `FLAG_SUPERFRAME` cleared), the packed sequence numbers, the per-frame lengths
+    and a view of the concatenated frame payloads.
+    """
+    if len(payload) < SUPERFRAME_COUNT_STRUCT.size:
+        raise ValueError("superframe missing frame count")
+    (count,) = SUPERFRAME_COUNT_STRUCT.unpack_from(payload)
+    table_end = SUPERFRAME_COUNT_STRUCT.size + count * SUPERFRAME_ENTRY_SIZE
+    if count == 0 or len(payload) < table_end:
+        raise ValueError(f"superframe table truncated: {count} frames, {len(payload)} bytes")
+    table = _superframe_table(count).unpack_from(payload, SUPERFRAME_COUNT_STRUCT.size)
+    pcm = memoryview(payload)[table_end:]
+    if sum(table[1::2]) != len(pcm):
+        raise ValueError(f"superframe lengths sum to {sum(table[1::2])}, payload has {len(pcm)} frame bytes")
+    sequences, lengths = table[0::2], table[1::2]
+    pcm_header = AudioFrameHeader(
+        sequence=sequences[0],
+        payload_len=len(pcm),
+        sample_rate=header.sample_rate,
+        channels=header.channels,
+        bits_per_sample=header.bits_per_sample,
+        flags=header.flags & ~FLAG_SUPERFRAME,
+    )
+    return pcm_header, sequences, lengths, pcm
+
+
 def encode_control_message(event: str, payload: Dict[str, Any]) -> str:
     """Encode a control message as a JSON string."""
     return json.dumps({"type": MSG_TYPE_CONTROL, "event": event, "payload": payload})
@@ -56,3 +210,43 @@ def encode_control_message(event: str, payload: Dict[str, Any]) -> str:
 def decode_control_message(raw: str) -> Dict[str, Any]:
     """Decode a control message JSON string."""
     return json.loads(raw)
+
+
+def compact_encoding_available() -> bool:
+    return msgpack is not None
+
+
+def negotiate_control_encoding(requested: str | None) -> str:
+    """Pick the connection's control encoding; anything unsupported falls back to JSON."""
+    if (requested or "").strip().lower() == CONTROL_ENCODING_MSGPACK and compact_encoding_available():
+        return CONTROL_ENCODING_MSGPACK
+    return CONTROL_ENCODING_JSON
+
+
+def encode_compact_control(event: str, payload: Dict[str, Any]) -> bytes:
+    """Encode a control message as an audio-style header flagged `FLAG_CONTROL` plus a MessagePack map."""
+    event_id = EVENT_IDS.get(event, EVENT_ID_NAMED)
+    if event_id == EVENT_ID_NAMED:
+        payload = {**payload, "event": event}
+    body = msgpack.packb(payload)
+    if len(body) > 0xFFFF:
+        raise ValueError(f"control payload too large for a compact frame: {len(body)} bytes")
+    return HEADER_STRUCT.pack(event_id, len(body), 0, 0, 0, FLAG_CONTROL) + body
+
+
+def decode_compact_control(
+    header: Union[AudioFrameHeader, FrameSlot], body: Union[bytes, memoryview]
+) -> Dict[str, Any]:
+    """Decode a `FLAG_CONTROL` frame into the same shape as `decode_control_message`."""
+    payload = msgpack.unpackb(body)
+    if not isinstance(payload, dict):
+        raise ValueError("compact control payload must be a map")
+    event = EVENT_NAMES.get(header.sequence) or payload.pop("event", None)
+    return {"type": MSG_TYPE_CONTROL, "event": event, "payload": payload}
+
+
+def encode_control(event: str, payload: Dict[str, Any], encoding: str = CONTROL_ENCODING_JSON) -> Union[str, bytes]:
+    """Encode a control message for a connection: `str` (text frame) for JSON, `bytes` for compact."""
+    if encoding == CONTROL_ENCODING_MSGPACK:
+        return encode_compact_control(event, payload)
+    return encode_control_message(event, payload)
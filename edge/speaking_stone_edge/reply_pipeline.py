@@ -0,0 +1,118 @@
+"""Sentence-level pipelining of a streamed LLM reply into TTS.
+
+Tokens from `llm_module.stream_reply` are cut into sentences as they arrive; each
+sentence is sanitized and submitted to the TTS stage as soon as fewer than
+`REPLY_SYNTH_AHEAD` sentences are synthesizing or waiting to be sent, so sentence 1 is
+being synthesized (and sent) while the LLM is still producing sentence 2, but a long
+reply on a slow socket does not queue its whole audio in memory. PCM is forwarded
+piece by piece as the TTS provider streams it, strictly in sentence order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import stage_pool
+from .tts_cache import iter_cached_speech
+from .llm_module import SentenceSegmenter, _clean_speech, stream_reply
+from .tts_module import iter_speech
+
+logger = logging.getLogger(__name__)
+
+# Sentences synthesizing or holding unsent audio at once, including the one being sent.
+REPLY_SYNTH_AHEAD = max(1, int(os.getenv("REPLY_SYNTH_AHEAD", "2")))
+
+SendAudio = Callable[[bytes], Awaitable[None]]
+_Synthesis = Tuple["asyncio.Future[None]", "asyncio.Queue[Optional[bytes]]"]
+
+
+async def _synthesize_into(sentence: str, pieces: "asyncio.Queue[Optional[bytes]]", timer: Any) -> None:
+    """Stream one sentence's PCM (cached or from the TTS stage) into `pieces`, then a None sentinel."""
+    try:
+        async for pcm in iter_cached_speech(sentence, iter_speech, timer=timer):
+            pieces.put_nowait(pcm)
+    finally:
+        pieces.put_nowait(None)
+
+
+async def stream_spoken_reply(
+    transcript: str,
+    history: List[Dict[str, str]],
+    timer: Any,
+    send_audio: Optional[SendAudio],
+) -> str:
+    """Stream the reply for `transcript`, speaking each sentence as soon as it is complete.
+
+    Pass `send_audio=None` to stream the text only (no TTS). Marks `llm` when the token
+    stream ends and `tts` when the last sentence's audio was handed to `send_audio`.
+    Returns the spoken reply text.
+    """
+    segmenter = SentenceSegmenter()
+    raw_parts: List[str] = []
+    spoken: List[str] = []
+    # Sentence text waits here (cheap); audio exists only for the admitted few.
+    sentences: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    synth_queue: asyncio.Queue[Optional[_Synthesis]] = asyncio.Queue()
+    ahead = asyncio.Semaphore(REPLY_SYNTH_AHEAD)
+    synth_tasks: List[asyncio.Future[None]] = []
+
+    def queue_sentence(sentence: str) -> None:
+        if not sentence:
+            return
+        spoken.append(sentence)
+        if send_audio is not None:
+            sentences.put_nowait(sentence)
+
+    async def synthesize_ahead() -> None:
+        while (sentence := await sentences.get()) is not None:
+            await ahead.acquire()  # released once the sentence's audio has been sent
+            pieces: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+            task = asyncio.ensure_future(_synthesize_into(sentence, pieces, timer))
+            synth_tasks.append(task)
+            await synth_queue.put((task, pieces))
+        await synth_queue.put(None)
+
+    async def send_in_order() -> None:
+        while True:
+            synthesis = await synth_queue.get()
+            if synthesis is None:
+                return
+            task, pieces = synthesis
+            while (pcm := await pieces.get()) is not None:
+                await send_audio(pcm)
+            await task  # re-raise StageBusyError and friends
+            ahead.release()
+
+    workers = (
+        [asyncio.ensure_future(synthesize_ahead()), asyncio.ensure_future(send_in_order())]
+        if send_audio is not None
+        else []
+    )
+    try:
+        async with stage_pool.get_stage_pool("llm").slot(timer=timer):
+            async for token in stream_reply(transcript, history):
+                raw_parts.append(token)
+                for sentence in segmenter.feed(token):
+                    queue_sentence(_clean_speech(sentence))
+        for sentence in segmenter.flush():
+            queue_sentence(_clean_speech(sentence))
+        if not spoken and "".join(raw_parts).strip():
+            # Everything was stage directions; speak the raw reply like `_sanitize_reply` would.
+            queue_sentence("".join(raw_parts).strip())
+        timer.mark("llm")
+
+        if workers:
+            sentences.put_nowait(None)
+            await asyncio.gather(*workers)
+            timer.mark("tts")
+    except BaseException:
+        for task in [*workers, *synth_tasks]:
+            task.cancel()
+        raise
+
+    reply = " ".join(spoken)
+    logger.debug("streamed_reply sentences=%d chars=%d", len(spoken), len(reply))
+    return reply
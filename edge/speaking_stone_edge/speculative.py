@@ -0,0 +1,152 @@
+"""Speculative LLM replies from stable partial transcripts (streaming STT only).
+
+With `LLM_SPECULATIVE=1`, each streaming-STT session watches its partial transcript.
+Once the normalized text comes out the same in `LLM_SPECULATIVE_STABLE_DECODES`
+consecutive window decodes, the reply is requested in the background while the user is
+still talking or pausing. At `speech_end`, a speculation whose text matches the final
+transcript (after `normalize_text`) provides the reply directly, so the LLM round trip
+overlaps the user's speech. Otherwise it is cancelled and the reply is requested as
+usual. A newer stable hypothesis replaces an older in-flight speculation, and so does a
+chat history that changed since the speculation started (its reply answers a stale
+context).
+
+Outcomes (started / hit / miss / superseded / cancelled / failed) and estimated
+wasted prompt and completion tokens of discarded speculations are reported by
+`speculation_stats()` (`GET /stats`) and as Prometheus counters.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import metrics
+from .history import estimate_tokens
+from .streaming_stt import normalize_text
+
+logger = logging.getLogger(__name__)
+
+LLM_SPECULATIVE = os.getenv("LLM_SPECULATIVE", "").strip().lower() in {"1", "true", "yes", "on"}
+LLM_SPECULATIVE_STABLE_DECODES = int(os.getenv("LLM_SPECULATIVE_STABLE_DECODES", "2"))
+LLM_SPECULATIVE_MIN_CHARS = int(os.getenv("LLM_SPECULATIVE_MIN_CHARS", "2"))
+
+Generate = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+OUTCOMES = metrics.REGISTRY.register(
+    metrics.Counter("llm_speculative", "Speculative LLM calls by outcome.", ("outcome",))
+)
+WASTED_TOKENS = metrics.REGISTRY.register(
+    metrics.Counter("llm_speculative_wasted_tokens", "Estimated tokens of discarded speculative calls.", ("kind",))
+)
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    hits: int = 0
+    misses: int = 0
+    superseded: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    wasted_prompt_tokens: int = 0
+    wasted_completion_tokens: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        decided = self.hits + self.misses
+        return {**asdict(self), "hit_rate": round(self.hits / decided, 3) if decided else None}
+
+
+_stats = SpeculationStats()
+
+
+def speculation_stats() -> Dict[str, Any]:
+    return _stats.as_dict()
+
+
+def _count(outcome: str, attribute: str) -> None:
+    setattr(_stats, attribute, getattr(_stats, attribute) + 1)
+    OUTCOMES.labels(outcome).inc()
+
+
+class SpeculativeReply:
+    """At most one in-flight early reply for a session's current utterance."""
+
+    def __init__(self, generate: Generate, stable_decodes: int = LLM_SPECULATIVE_STABLE_DECODES) -> None:
+        self._generate = generate
+        self.stable_decodes = max(1, stable_decodes)
+        self.task: Optional[asyncio.Task[str]] = None
+        self.key = ""  # normalized text the in-flight speculation answers
+        self.revision = 0  # `ChatHistory.revision` the in-flight speculation was built on
+        self._prompt_tokens = 0
+        self._candidate = ""
+        self._repeats = 0
+
+    def observe(self, partial_text: str, history: List[Dict[str, str]], revision: int = 0) -> bool:
+        """Feed the latest partial transcript; start a speculation once it is stable.
+
+        Returns True when a new speculation was started.
+        """
+        key = normalize_text(partial_text)
+        if key != self._candidate:
+            self._candidate, self._repeats = key, 0
+        self._repeats += 1
+        if self._repeats < self.stable_decodes or len(key) < LLM_SPECULATIVE_MIN_CHARS or key == self.key:
+            return False
+        if self.task is not None:
+            self._discard("superseded", "superseded")
+        self.key, self.revision = key, revision
+        self._prompt_tokens = estimate_tokens(partial_text) + sum(
+            estimate_tokens(message.get("content", "")) for message in history
+        )
+        self.task = asyncio.create_task(self._generate(partial_text, history))
+        _count("started", "started")
+        logger.info("llm_speculation_started chars=%d", len(partial_text))
+        return True
+
+    async def take(self, transcript: str, revision: int = 0) -> Optional[str]:
+        """The speculative reply if it answers `transcript` on history `revision`, else None."""
+        task, key = self.task, self.key
+        if task is None:
+            return None
+        if revision != self.revision:
+            self._discard("superseded", "superseded")  # the history moved under it
+            return None
+        if normalize_text(transcript) != key:
+            self._discard("miss", "misses")
+            return None
+        self.task, self.key = None, ""
+        self._candidate, self._repeats = "", 0
+        try:
+            reply = await task
+        except asyncio.CancelledError:
+            _count("cancelled", "cancelled")  # the turn itself was cancelled (barge-in)
+            raise
+        except Exception as exc:  # noqa: BLE001 - fall back to a regular request
+            _count("failed", "failed")
+            logger.warning("llm_speculation_failed error=%s", exc)
+            return None
+        _count("hit", "hits")
+        return reply
+
+    def cancel(self) -> None:
+        """Drop any speculation (utterance reset or session end)."""
+        if self.task is not None:
+            self._discard("cancelled", "cancelled")
+        self._candidate, self._repeats = "", 0
+
+    def _discard(self, outcome: str, attribute: str) -> None:
+        task, self.task, self.key = self.task, None, ""
+        if task is None:
+            return
+        completion = 0
+        if task.done() and not task.cancelled() and task.exception() is None:
+            completion = estimate_tokens(task.result())
+        task.cancel()
+        _count(outcome, attribute)
+        _stats.wasted_prompt_tokens += self._prompt_tokens
+        _stats.wasted_completion_tokens += completion
+        WASTED_TOKENS.labels("prompt").inc(self._prompt_tokens)
+        WASTED_TOKENS.labels("completion").inc(completion)
@@ -0,0 +1,331 @@
+"""Bounded per-stage worker pools that keep blocking STT/LLM/TTS work off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+POOL_KINDS = ("thread", "process")
+DEFAULT_WORKERS = {"stt": 2, "llm": 8, "tts": 4}
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_QUEUE_TIMEOUT = 10.0
+
+
+class StageBusyError(RuntimeError):
+    """Raised when a stage queue stays full for longer than its wait timeout."""
+
+    def __init__(self, stage: str, waited_s: float) -> None:
+        super().__init__(f"{stage} stage busy; waited {waited_s * 1000.0:.0f} ms for a slot")
+        self.stage = stage
+        self.waited_s = waited_s
+
+
+@dataclass(frozen=True)
+class StagePoolConfig:
+    """Sizing for one stage: worker count, executor kind and queue bounds."""
+
+    name: str
+    workers: int
+    kind: str = "thread"
+    max_queue: int = DEFAULT_QUEUE_SIZE
+    queue_timeout: float = DEFAULT_QUEUE_TIMEOUT
+
+    @classmethod
+    def from_env(cls, name: str) -> "StagePoolConfig":
+        """Read `<STAGE>_POOL_*` environment overrides for the named stage."""
+        prefix = f"{name.upper()}_POOL_"
+        kind = os.getenv(prefix + "KIND", "thread").strip().lower()
+        if kind not in POOL_KINDS:
+            raise ValueError(f"{prefix}KIND must be one of {POOL_KINDS}, got {kind!r}")
+        workers = int(os.getenv(prefix + "WORKERS", str(DEFAULT_WORKERS.get(name, 2))))
+        max_queue = int(os.getenv(prefix + "QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE)))
+        queue_timeout = float(os.getenv(prefix + "QUEUE_TIMEOUT", str(DEFAULT_QUEUE_TIMEOUT)))
+        return cls(
+            name=name,
+            workers=max(1, workers),
+            kind=kind,
+            max_queue=max(0, max_queue),
+            queue_timeout=max(0.0, queue_timeout),
+        )
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> Tuple[float, Any]:
+    """Run `func` in the worker and report when it actually started.
+
+    `time.monotonic` is system-wide on Linux, so the start stamp is comparable
+    with the submit stamp even when the worker is a separate process.
+    """
+    started = time.monotonic()
+    return started, func(*args)
+
+
+def _collect(func: Callable[..., Iterable[Any]], *args: Any) -> List[Any]:
+    """Drain a generator inside a worker process (items cannot be streamed across processes)."""
+    return list(func(*args))
+
+
+_END = object()
+
+
+class StagePool:
+    """Executor plus admission control for a single pipeline stage.
+
+    At most `workers + max_queue` calls are admitted at once; further callers wait
+    up to `queue_timeout` seconds for a slot and then get `StageBusyError`.
+    """
+
+    def __init__(self, config: StagePoolConfig, initializer: Optional[Callable[[], Any]] = None) -> None:
+        self.config = config
+        self._initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = asyncio.Semaphore(config.workers + config.max_queue)
+        self._running = asyncio.Semaphore(config.workers)  # executor-less `slot` bodies
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._last_wait_s = 0.0
+        self._max_wait_s = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    def queue_depth(self) -> int:
+        """Calls admitted or waiting that are not yet running on a worker."""
+        return max(0, self._pending - self.config.workers)
+
+    def idle_workers(self) -> int:
+        """Workers that would start a call submitted now right away."""
+        return max(0, self.config.workers - self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.config.kind,
+            "workers": self.config.workers,
+            "pending": self._pending,
+            "queue_depth": self.queue_depth(),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "last_wait_ms": round(self._last_wait_s * 1000.0, 2),
+            "max_wait_ms": round(self._max_wait_s * 1000.0, 2),
+        }
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.config.kind == "process":
+                    # Spawn rather than fork: the parent already runs threads (uvicorn, CTranslate2).
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.config.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self._initializer,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.workers,
+                        thread_name_prefix=f"{self.name}-stage",
+                        initializer=self._initializer,
+                    )
+            return self._executor
+
+    async def _acquire(self, submitted: float, depth: int) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.config.queue_timeout)
+        except asyncio.TimeoutError as exc:
+            self._rejected += 1
+            waited = time.monotonic() - submitted
+            logger.warning("stage_busy stage=%s waited_ms=%.1f depth=%d", self.name, waited * 1000.0, depth)
+            raise StageBusyError(self.name, waited) from exc
+
+    def _note_wait(self, waited: float, depth: int, timer: Any) -> None:
+        self._last_wait_s = waited
+        self._max_wait_s = max(self._max_wait_s, waited)
+        if timer is not None:
+            timer.record(f"{self.name}_queue_wait_ms", waited * 1000.0)
+            timer.record(f"{self.name}_queue_depth", depth)
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timer: Any = None,
+        finished: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Run `func(*args)` on a stage worker and return its result.
+
+        When `timer` is given, `<stage>_queue_wait_ms` and `<stage>_queue_depth` are
+        recorded on it so slow turns can be attributed to queueing vs. work.
+
+        Cancelling the caller drops a call that has not reached a worker yet. A call that
+        is already running cannot be interrupted, so it keeps its slot, and counts as
+        pending, until it finishes.
+        `finished` is called on the event loop once no worker uses `args` any more (right
+        away if the call never ran), e.g. to recycle a buffer the arguments point into.
+        """
+        submitted = time.monotonic()
+        depth = self.queue_depth()
+        self._pending += 1
+        admitted = False
+        work = None
+        try:
+            await self._acquire(submitted, depth)
+            admitted = True
+            loop = asyncio.get_running_loop()
+            call = functools.partial(_timed_call, func, *args)
+            if self.config.kind == "thread":
+                # Thread workers run in a copy of the caller's context, so trace spans nest.
+                call = functools.partial(contextvars.copy_context().run, call)
+            work = self._get_executor().submit(call)
+            started, result = await asyncio.wrap_future(work)
+        finally:
+            if work is not None and not work.done() and not work.cancel():
+                # Already running and cannot be interrupted: it keeps its slot until it finishes.
+                work.add_done_callback(lambda _: self._settle_later(loop, admitted, finished))
+            else:
+                self._settle(admitted, finished)
+
+        self._completed += 1
+        self._note_wait(max(0.0, started - submitted), depth, timer)
+        return result
+
+    def _settle_later(
+        self, loop: asyncio.AbstractEventLoop, admitted: bool, finished: Optional[Callable[[], None]]
+    ) -> None:
+        with contextlib.suppress(RuntimeError):  # the loop is already closed (shutdown)
+            loop.call_soon_threadsafe(self._settle, admitted, finished)
+
+    def _settle(self, admitted: bool, finished: Optional[Callable[[], None]]) -> None:
+        self._pending -= 1
+        if admitted:
+            self._slots.release()
+        if finished is not None:
+            finished()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, timer: Any = None) -> AsyncIterator[None]:
+        """Admission control without an executor, for stages whose work is natively async.
+
+        The body holds one of the `workers` slots; the queue bound, timeout and wait/depth
+        reporting are the same as for `run`.
+        """
+        submitted = time.monotonic()
+        depth = self.queue_depth()
+        self._pending += 1
+        try:
+            await self._acquire(submitted, depth)
+            try:
+                # Admitted callers queue here for one of `workers` running slots.
+                await self._running.acquire()
+                self._note_wait(time.monotonic() - submitted, depth, timer)
+                try:
+                    yield
+                finally:
+                    self._running.release()
+                    self._completed += 1
+            finally:
+                self._slots.release()
+        finally:
+            self._pending -= 1
+
+    async def iterate(self, func: Callable[..., Iterable[Any]], *args: Any, timer: Any = None) -> AsyncIterator[Any]:
+        """Run the generator `func(*args)` on a stage worker and yield its items as produced.
+
+        Thread workers hand items to the event loop one by one. Process workers cannot, so
+        their generator is drained in the worker and items are yielded once it finishes.
+        Closing the async iterator early stops the worker at its next item.
+        """
+        if self.config.kind == "process":
+            for item in await self.run(_collect, func, *args, timer=timer):
+                yield item
+            return
+
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue[Any] = asyncio.Queue()
+        stop = threading.Event()
+
+        def pump() -> None:
+            try:
+                for item in func(*args):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(items.put_nowait, item)
+            finally:
+                loop.call_soon_threadsafe(items.put_nowait, _END)
+
+        worker = asyncio.ensure_future(self.run(pump, timer=timer))
+        # Also wake the consumer if the worker never ran (StageBusyError, cancellation).
+        worker.add_done_callback(lambda _: items.put_nowait(_END))
+        try:
+            while True:
+                item = await items.get()
+                if item is _END:
+                    break
+                yield item
+            await worker  # surface exceptions raised by the generator
+        finally:
+            stop.set()
+            if not worker.done():
+                worker.cancel()
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_POOLS: Dict[str, StagePool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_stage_pool(name: str, initializer: Optional[Callable[[], Any]] = None) -> StagePool:
+    """Return the process-wide pool for `name`, creating it from env config on first use."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(name)
+        if pool is None:
+            pool = StagePool(StagePoolConfig.from_env(name), initializer=initializer)
+            _POOLS[name] = pool
+            logger.info(
+                "stage_pool_created stage=%s kind=%s workers=%d max_queue=%d",
+                name,
+                pool.config.kind,
+                pool.config.workers,
+                pool.config.max_queue,
+            )
+        return pool
+
+
+async def run_stage(name: str, func: Callable[..., Any], *args: Any, timer: Any = None) -> Any:
+    """Convenience wrapper: run `func(*args)` on the named stage pool."""
+    return await get_stage_pool(name).run(func, *args, timer=timer)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def shutdown_stage_pools(wait: bool = False) -> None:
+    """Stop all executors and forget the pools (they are rebuilt lazily)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
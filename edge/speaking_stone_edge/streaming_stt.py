@@ -0,0 +1,107 @@
+"""Incremental transcription of an utterance while its frames are still arriving.
+
+The session re-decodes the uncommitted tail of the buffer every `STT_STREAM_STEP_MS`
+of new audio. Segments that come out identical in two consecutive decodes and end
+well before the tail edge are committed, and the decode window then starts after
+them. On `speech_end` only the remaining (unstable) tail needs decoding.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from .stt_module import WHISPER_SAMPLE_RATE, Segment
+
+STT_STREAMING = os.getenv("STT_STREAMING", "").strip().lower() in {"1", "true", "yes", "on"}
+STT_STREAM_STEP_MS = int(os.getenv("STT_STREAM_STEP_MS", "1000"))
+STT_STREAM_STABILITY_MS = int(os.getenv("STT_STREAM_STABILITY_MS", "1000"))
+STT_STREAM_MAX_WINDOW_MS = int(os.getenv("STT_STREAM_MAX_WINDOW_MS", "15000"))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s']")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip punctuation so near-identical hypotheses compare equal."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.lower()).split())
+
+
+class StreamingTranscript:
+    """Committed prefix plus the latest tentative hypothesis for one utterance."""
+
+    def __init__(
+        self,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        step_ms: int = STT_STREAM_STEP_MS,
+        stability_ms: int = STT_STREAM_STABILITY_MS,
+        max_window_ms: int = STT_STREAM_MAX_WINDOW_MS,
+    ) -> None:
+        self.bytes_per_second = sample_rate * 2  # PCM16 mono
+        self.step_bytes = self._ms_to_bytes(step_ms)
+        self.stability_s = stability_ms / 1000.0
+        self.max_window_s = max_window_ms / 1000.0
+        self.task: Optional[asyncio.Task[Any]] = None
+        self.reset()
+
+    def _ms_to_bytes(self, ms: int) -> int:
+        return (self.bytes_per_second * ms // 1000) & ~1
+
+    def reset(self) -> None:
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.task = None
+        self.committed: List[str] = []
+        self.committed_bytes = 0
+        self.tentative = ""
+        self.decoded_bytes = 0
+        self._previous: List[Segment] = []
+
+    def should_decode(self, buffered_bytes: int) -> bool:
+        """True when enough new audio arrived and no window decode is in flight."""
+        if self.task is not None and not self.task.done():
+            return False
+        return buffered_bytes - self.decoded_bytes >= self.step_bytes
+
+    def prompt(self) -> str:
+        """Committed text, passed as the decoder prompt for continuity across windows."""
+        return " ".join(self.committed)
+
+    def apply(self, segments: Sequence[Segment], window_start: int, window_end: int) -> List[str]:
+        """Merge a decode of `[window_start, window_end)` and return newly committed texts."""
+        self.decoded_bytes = max(self.decoded_bytes, window_end)
+        if window_start != self.committed_bytes:
+            # The window predates a commit made by a newer decode; discard it.
+            return []
+
+        window_s = (window_end - window_start) / self.bytes_per_second
+        horizon_s = window_s - self.stability_s
+        force = window_s > self.max_window_s
+
+        stable: List[Segment] = []
+        for index, segment in enumerate(segments):
+            previous = self._previous[index] if index < len(self._previous) else None
+            agreed = previous is not None and normalize_text(previous[2]) == normalize_text(segment[2])
+            forced = force and index < len(segments) - 1
+            if not ((agreed and segment[1] <= horizon_s) or forced):
+                break
+            stable.append(segment)
+
+        remaining = list(segments[len(stable) :])
+        if stable:
+            cut = window_start + (int(stable[-1][1] * self.bytes_per_second) & ~1)
+            self.committed_bytes = min(cut, window_end)
+            self.committed.extend(segment[2] for segment in stable)
+        self._previous = remaining
+        self.tentative = " ".join(segment[2] for segment in remaining)
+        return [segment[2] for segment in stable]
+
+    def partial_payload(self) -> Dict[str, Any]:
+        committed = self.prompt()
+        text = " ".join(part for part in (committed, self.tentative) if part)
+        return {"text": text, "committed": committed, "tentative": self.tentative}
+
+    def final_text(self, tail_segments: Sequence[Segment]) -> str:
+        """Committed prefix joined with the decode of the remaining tail."""
+        return " ".join(self.committed + [segment[2] for segment in tail_segments])
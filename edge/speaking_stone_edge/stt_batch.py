@@ -0,0 +1,123 @@
+"""Cross-session micro-batching for end-of-utterance transcription.
+
+When `STT_BATCH_WINDOW_MS` > 0, an utterance that arrives while an STT worker is idle
+is dispatched straight away. Otherwise it waits for the next free worker, the end of
+its `STT_BATCH_WINDOW_MS` window, or a full batch of `STT_BATCH_MAX`, whichever comes
+first, and everything waiting by then is decoded together by
+`stt_module.transcribe_batch` in a single STT stage call; each session gets its own
+transcript back. Batching therefore only forms under load, and never adds more than
+the window to a turn.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from . import stage_pool
+from . import stt_workers
+from .audio_buffer import BytesLike
+from .protocol import AudioFrameHeader
+from .stt_module import transcribe_audio, transcribe_batch
+
+logger = logging.getLogger(__name__)
+
+STT_BATCH_WINDOW_MS = float(os.getenv("STT_BATCH_WINDOW_MS", "0"))
+STT_BATCH_MAX = int(os.getenv("STT_BATCH_MAX", "8"))
+
+BatchFunc = Callable[[Sequence[Tuple[BytesLike, AudioFrameHeader]]], List[Union[str, Exception]]]
+_Pending = Tuple[BytesLike, AudioFrameHeader, "asyncio.Future[str]", float, Any]
+
+
+class SttBatchScheduler:
+    """Collect utterances for a short window and transcribe them as one batch."""
+
+    def __init__(
+        self,
+        window_ms: float = STT_BATCH_WINDOW_MS,
+        max_batch: int = STT_BATCH_MAX,
+        batch_func: BatchFunc = transcribe_batch,
+    ) -> None:
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._batch_func = batch_func
+        self._pending: List[_Pending] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._starting = 0  # dispatched batches not yet counted by the STT pool
+        self.batches = 0
+        self.utterances = 0
+
+    async def transcribe(self, pcm: BytesLike, header: AudioFrameHeader, timer: Any = None) -> str:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[str] = loop.create_future()
+        self._pending.append((pcm, header, future, time.monotonic(), timer))
+        if len(self._pending) >= self.max_batch or self._worker_idle():
+            self._dispatch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_s, self._dispatch)
+        return await future
+
+    def _worker_idle(self) -> bool:
+        return stage_pool.get_stage_pool("stt").idle_workers() > self._starting
+
+    def _dispatch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # Callers cancelled while waiting for the window (barge-in) are not decoded.
+        batch, self._pending = [entry for entry in self._pending if not entry[2].done()], []
+        if batch:
+            self._starting += 1
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        dispatched = time.monotonic()
+        for _, _, _, queued, timer in batch:
+            if timer is not None:
+                timer.record("stt_batch_wait_ms", (dispatched - queued) * 1000.0)
+                timer.record("stt_batch_size", len(batch))
+        pool = stage_pool.get_stage_pool("stt")
+        # Snapshots are memoryviews, which cannot be pickled to process workers.
+        convert = bytes if pool.config.kind == "process" else (lambda pcm: pcm)
+        # Queue wait and depth of the shared call are reported to the first caller.
+        self._starting -= 1
+        try:
+            results = await pool.run(
+                self._batch_func, [(convert(pcm), header) for pcm, header, _, _, _ in batch], timer=batch[0][4]
+            )
+        except Exception as exc:  # noqa: BLE001 - StageBusyError or a model failure
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            # A worker just freed up: send whatever queued behind this batch.
+            if self._pending and self._worker_idle():
+                self._dispatch()
+
+        self.batches += 1
+        self.utterances += len(batch)
+        logger.info("stt_batch size=%d wait_ms=%.1f", len(batch), (dispatched - batch[0][3]) * 1000.0)
+        for (_, _, future, _, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_scheduler: Optional[SttBatchScheduler] = None
+
+
+async def transcribe(pcm: BytesLike, header: AudioFrameHeader, timer: Any = None) -> str:
+    """Transcribe one utterance, batched with other sessions when batching is enabled."""
+    global _scheduler
+    if STT_BATCH_WINDOW_MS <= 0 or STT_BATCH_MAX <= 1:
+        return await stt_workers.run_stt(transcribe_audio, pcm, header, timer=timer)
+    if _scheduler is None:
+        _scheduler = SttBatchScheduler()
+    return await _scheduler.transcribe(pcm, header, timer=timer)
@@ -2,30 +2,105 @@
 
 from __future__ import annotations
 
+import contextlib
 import os
+import threading
 from functools import lru_cache
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 from faster_whisper import WhisperModel
 
+from . import tracing
+from .audio_buffer import BytesLike, float32_scratch
 from .protocol import AudioFrameHeader
+from .whisper_pool import WhisperModelPool
 
 WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
 WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
 WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE")
+WHISPER_POOL_SIZE = int(os.getenv("WHISPER_POOL_SIZE", "1"))
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0: CTranslate2 default, or cores per instance
+WHISPER_PIN_CORES = os.getenv("WHISPER_PIN_CORES", "1").strip().lower() in {"1", "true", "yes", "on"}
 WHISPER_SAMPLE_RATE = 16000
+WHISPER_CHUNK_SAMPLES = 30 * WHISPER_SAMPLE_RATE  # Whisper's fixed 30 s input window
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+# (start_s, end_s, text) relative to the start of the decoded audio.
+Segment = Tuple[float, float, str]
+
+
+def _build_model(cpu_threads: int = WHISPER_CPU_THREADS) -> WhisperModel:
+    return WhisperModel(
+        WHISPER_MODEL_SIZE,
+        device=WHISPER_DEVICE,
+        compute_type=WHISPER_COMPUTE_TYPE,
+        cpu_threads=cpu_threads,
+    )
 
 
 @lru_cache(maxsize=1)
 def _get_model() -> WhisperModel:
     """Lazy-load the Whisper model so startup stays fast."""
-    return WhisperModel(WHISPER_MODEL_SIZE, device=WHISPER_DEVICE, compute_type=WHISPER_COMPUTE_TYPE)
+    return _build_model()
+
+
+_model_pool: Optional[WhisperModelPool] = None
+_model_pool_lock = threading.Lock()
+
+
+def _get_model_pool() -> WhisperModelPool:
+    global _model_pool
+    with _model_pool_lock:
+        if _model_pool is None:
+            _model_pool = WhisperModelPool(
+                _build_model, WHISPER_POOL_SIZE, cpu_threads=WHISPER_CPU_THREADS, pin_cores=WHISPER_PIN_CORES
+            )
+        return _model_pool
+
+
+@contextlib.contextmanager
+def _lease_model() -> Iterator[WhisperModel]:
+    """The single shared model, or the least-loaded instance when `WHISPER_POOL_SIZE` > 1."""
+    if WHISPER_POOL_SIZE <= 1:
+        yield _get_model()
+        return
+    with _get_model_pool().lease() as model:
+        yield model
 
 
-def _pcm16_mono_to_float32(pcm: bytes, header: AudioFrameHeader) -> np.ndarray:
-    """Convert raw PCM16 mono bytes into float32 samples in [-1.0, 1.0]."""
+@contextlib.contextmanager
+def _traced_lease() -> Iterator[WhisperModel]:
+    """`_lease_model`, with the wait for (or lazy load of) the model as an `stt.model` span."""
+    with contextlib.ExitStack() as stack:
+        with tracing.span("stt.model"):
+            model = stack.enter_context(_lease_model())
+        yield model
+
+
+def warm_models() -> None:
+    """Build the model (or every pool instance) ahead of the first utterance."""
+    if WHISPER_POOL_SIZE <= 1:
+        _get_model()
+    else:
+        _get_model_pool()
+
+
+def model_pool_stats() -> List[Dict[str, Any]]:
+    """Per-instance load and utilization (empty until the pool has been built)."""
+    return _model_pool.stats() if _model_pool is not None else []
+
+
+def _pcm16_mono_to_float32(pcm: BytesLike, header: AudioFrameHeader, reuse_scratch: bool = False) -> np.ndarray:
+    """Convert raw PCM16 mono bytes into float32 samples in [-1.0, 1.0].
+
+    With `reuse_scratch`, the result is written into this thread's reusable scratch
+    buffer (one pass, no temporaries) and is only valid until the thread's next call.
+    """
     if header.bits_per_sample != 16:
         raise ValueError(f"Only 16-bit PCM supported, got {header.bits_per_sample}")
     if header.channels != 1:
@@ -34,7 +109,8 @@ def _pcm16_mono_to_float32(pcm: bytes, header: AudioFrameHeader) -> np.ndarray:
         raise ValueError("PCM payload size must be aligned to 16-bit samples")
 
     samples = np.frombuffer(pcm, dtype=np.int16)
-    return samples.astype(np.float32) / 32768.0
+    out = float32_scratch(samples.size) if reuse_scratch else np.empty(samples.size, dtype=np.float32)
+    return np.multiply(samples, np.float32(1.0 / 32768.0), out=out, dtype=np.float32)
 
 
 def _collect_text(segments: Iterable) -> str:
@@ -47,20 +123,165 @@ def _collect_text(segments: Iterable) -> str:
     return " ".join(texts) if texts else ""
 
 
-def transcribe_audio(pcm: bytes, header: AudioFrameHeader) -> str:
+def transcribe_audio(pcm: BytesLike, header: AudioFrameHeader) -> str:
     """Transcribe the provided PCM bytes using faster-whisper."""
     if not pcm:
         return ""
     if header.sample_rate != WHISPER_SAMPLE_RATE:
         raise ValueError(f"Whisper expects {WHISPER_SAMPLE_RATE} Hz audio, got {header.sample_rate}")
 
-    audio = _pcm16_mono_to_float32(pcm, header)
-    model = _get_model()
+    audio = _pcm16_mono_to_float32(pcm, header, reuse_scratch=True)
+    with _traced_lease() as model, tracing.span("stt.decode", samples=int(audio.size)):
+        segments, _ = model.transcribe(
+            audio=audio,
+            language=WHISPER_LANGUAGE,
+            vad_filter=True,
+        )
+        # Segments are decoded lazily, so consume them while the instance is leased.
+        transcript = _collect_text(segments)
+    return transcript or ""
+
+
+def transcribe_segments(pcm: BytesLike, header: AudioFrameHeader, prompt: Optional[str] = None) -> List[Segment]:
+    """Transcribe PCM and keep segment timing, for incremental (streaming) decoding.
 
-    segments, _ = model.transcribe(
-        audio=audio,
-        language=WHISPER_LANGUAGE,
-        vad_filter=True,
+    Segments are returned as plain tuples so results pickle cheaply when the STT
+    stage runs in worker processes.
+    """
+    if not pcm:
+        return []
+    if header.sample_rate != WHISPER_SAMPLE_RATE:
+        raise ValueError(f"Whisper expects {WHISPER_SAMPLE_RATE} Hz audio, got {header.sample_rate}")
+
+    audio = _pcm16_mono_to_float32(pcm, header, reuse_scratch=True)
+    results: List[Segment] = []
+    with _traced_lease() as model, tracing.span("stt.decode", samples=int(audio.size), prompted=bool(prompt)):
+        segments, _ = model.transcribe(
+            audio=audio,
+            language=WHISPER_LANGUAGE,
+            vad_filter=True,
+            initial_prompt=prompt or None,
+        )
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                results.append((float(segment.start), float(segment.end), text))
+    return results
+
+
+def _vad_filter(audio: np.ndarray) -> np.ndarray:
+    """Keep only the speech regions, as `transcribe(..., vad_filter=True)` does."""
+    from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+    speech = get_speech_timestamps(audio, VadOptions())
+    if not speech:
+        return np.zeros(0, dtype=np.float32)
+    collected = collect_chunks(audio, speech)
+    # faster-whisper 1.0 returns the joined audio; 1.1+ returns (chunks, metadata).
+    return np.concatenate(collected[0]) if isinstance(collected, tuple) else collected
+
+
+def _batched_texts(model: WhisperModel, audios: Sequence[np.ndarray]) -> List[Optional[str]]:
+    """Decode several <=30 s utterances in one CTranslate2 `generate` call.
+
+    faster-whisper 1.0's `transcribe` handles one audio at a time, so this drives the
+    underlying CTranslate2 model directly: features are stacked into a single
+    [batch, n_mels, 3000] tensor, encoded once, and decoded with per-item prompts.
+    Audio is VAD-filtered first and each result goes through faster-whisper's
+    thresholds: silence yields "", and an item that would need a temperature
+    fallback (too repetitive, or too unlikely) yields None for the caller to redo
+    through `transcribe_audio`.
+    """
+    import ctranslate2
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.transcribe import get_compression_ratio, get_suppressed_tokens
+
+    texts: List[Optional[str]] = [None] * len(audios)
+    speech: List[Tuple[int, np.ndarray]] = []
+    for index, audio in enumerate(audios):
+        filtered = _vad_filter(audio)
+        if filtered.size == 0:
+            texts[index] = ""
+        else:
+            speech.append((index, filtered))
+    if not speech:
+        return texts
+
+    extractor = model.feature_extractor
+    features = []
+    for _, audio in speech:
+        padded = np.zeros(WHISPER_CHUNK_SAMPLES, dtype=np.float32)
+        padded[: audio.size] = audio
+        features.append(extractor(padded)[:, : extractor.nb_max_frames])
+    batch = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features)))
+    encoded = model.model.encode(batch, to_cpu=False)
+
+    if WHISPER_LANGUAGE:
+        languages = [WHISPER_LANGUAGE] * len(speech)
+    elif model.model.is_multilingual:
+        languages = [ranked[0][0][2:-2] for ranked in model.model.detect_language(encoded)]
+    else:
+        languages = ["en"] * len(speech)
+    tokenizers = [
+        Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language)
+        for language in languages
+    ]
+    prompts = [list(tokenizer.sot_sequence) + [tokenizer.no_timestamps] for tokenizer in tokenizers]
+    results = model.model.generate(
+        encoded,
+        prompts,
+        beam_size=WHISPER_BEAM_SIZE,
+        return_scores=True,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=list(get_suppressed_tokens(tokenizers[0], [-1])),
     )
-    transcript = _collect_text(segments)
-    return transcript or ""
+
+    for (index, _), tokenizer, result in zip(speech, tokenizers, results):
+        tokens = [token for token in result.sequences_ids[0] if token < tokenizer.eot]
+        text = tokenizer.decode(tokens).strip()
+        # Same arithmetic and order as faster-whisper's `generate_with_fallback`.
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOGPROB_THRESHOLD:
+            texts[index] = ""
+        elif get_compression_ratio(text) > COMPRESSION_RATIO_THRESHOLD or avg_logprob < LOGPROB_THRESHOLD:
+            texts[index] = None
+        else:
+            texts[index] = text
+    return texts
+
+
+def transcribe_batch(items: Sequence[Tuple[BytesLike, AudioFrameHeader]]) -> List[Union[str, Exception]]:
+    """Transcribe utterances from several sessions together; results keep the input order.
+
+    Invalid items yield their `ValueError` instead of failing the whole batch. Audio
+    longer than Whisper's 30 s window, batches that end up with a single item, and
+    items whose temperature-0 batched decode fails faster-whisper's quality thresholds go
+    through `transcribe_audio`, which retries at higher temperatures.
+    """
+    results: List[Union[str, Exception, None]] = [None] * len(items)
+    batchable: List[Tuple[int, np.ndarray]] = []
+    for index, (pcm, header) in enumerate(items):
+        try:
+            if header.sample_rate != WHISPER_SAMPLE_RATE:
+                raise ValueError(f"Whisper expects {WHISPER_SAMPLE_RATE} Hz audio, got {header.sample_rate}")
+            audio = _pcm16_mono_to_float32(pcm, header) if pcm else np.zeros(0, dtype=np.float32)
+        except ValueError as exc:
+            results[index] = exc
+            continue
+        if audio.size == 0:
+            results[index] = ""
+        elif audio.size > WHISPER_CHUNK_SAMPLES:
+            results[index] = transcribe_audio(pcm, header)
+        else:
+            batchable.append((index, audio))
+
+    if len(batchable) == 1:
+        index = batchable[0][0]
+        results[index] = transcribe_audio(*items[index])
+    elif batchable:
+        with _lease_model() as model:
+            texts = _batched_texts(model, [audio for _, audio in batchable])
+        for (index, _), text in zip(batchable, texts):
+            results[index] = transcribe_audio(*items[index]) if text is None else text
+    return results  # type: ignore[return-value]
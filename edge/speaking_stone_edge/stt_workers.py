@@ -0,0 +1,137 @@
+"""Hand utterance audio to process-pool STT workers through shared memory.
+
+With `STT_POOL_KIND=process`, arguments to the STT stage are pickled and piped to the
+worker. `STT_SHARED_MEMORY=1` instead writes each utterance into a slot of a
+`multiprocessing.shared_memory` ring and sends only (segment name, offset, length).
+Workers attach to the segment once, read the PCM in place and keep their own warm
+model (loaded by the stage pool initializer). Utterances larger than a slot, and
+thread pools, use the regular stage pool path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional
+
+from . import stage_pool
+from .audio_buffer import BytesLike
+from .protocol import AudioFrameHeader
+
+logger = logging.getLogger(__name__)
+
+STT_SHARED_MEMORY = os.getenv("STT_SHARED_MEMORY", "").strip().lower() in {"1", "true", "yes", "on"}
+STT_SHM_SLOT_BYTES = int(os.getenv("STT_SHM_SLOT_BYTES", str(30 * 16000 * 2)))  # 30 s of 16 kHz PCM16
+STT_SHM_SLOTS = int(os.getenv("STT_SHM_SLOTS", "0"))  # 0: STT workers + queue size
+
+
+class SharedPcmRing:
+    """Fixed-size slots in one shared-memory segment, handed out to in-flight STT calls."""
+
+    def __init__(self, slots: int, slot_bytes: int) -> None:
+        self.slots = max(1, slots)
+        self.slot_bytes = max(2, slot_bytes) & ~1
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._free: asyncio.Queue[int] = asyncio.Queue()
+        for index in range(self.slots):
+            self._free.put_nowait(index)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def fits(self, length: int) -> bool:
+        return length <= self.slot_bytes
+
+    async def acquire(self) -> int:
+        return await self._free.get()
+
+    def release(self, slot: int) -> None:
+        self._free.put_nowait(slot)
+
+    def write(self, slot: int, pcm: BytesLike) -> int:
+        """Copy PCM into `slot` and return its byte offset in the segment."""
+        offset = slot * self.slot_bytes
+        self._shm.buf[offset : offset + len(pcm)] = pcm
+        return offset
+
+    def close(self) -> None:
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _run_from_slot(
+    func: Callable[..., Any], shm_name: str, offset: int, length: int, header: AudioFrameHeader, *args: Any
+) -> Any:
+    """Worker side: call `func(pcm_view, header, *args)` on the PCM sitting in shared memory."""
+    shm = _attached.get(shm_name)
+    if shm is None:
+        shm = _attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    view = shm.buf[offset : offset + length]
+    try:
+        return func(view, header, *args)
+    finally:
+        try:
+            view.release()
+        except BufferError:  # still referenced by a traceback; freed with it
+            pass
+
+
+_ring: Optional[SharedPcmRing] = None
+
+
+def _get_ring(pool: stage_pool.StagePool) -> SharedPcmRing:
+    global _ring
+    if _ring is None:
+        slots = STT_SHM_SLOTS or pool.config.workers + pool.config.max_queue
+        _ring = SharedPcmRing(slots, STT_SHM_SLOT_BYTES)
+        logger.info("stt_shared_ring name=%s slots=%d slot_bytes=%d", _ring.name, _ring.slots, _ring.slot_bytes)
+    return _ring
+
+
+def close_ring() -> None:
+    global _ring
+    if _ring is not None:
+        _ring.close()
+        _ring = None
+
+
+async def run_stt(func: Callable[..., Any], pcm: BytesLike, header: AudioFrameHeader, *args: Any, timer: Any = None) -> Any:
+    """Run `func(pcm, header, *args)` on the STT stage, via shared memory when enabled."""
+    pool = stage_pool.get_stage_pool("stt")
+    if pool.config.kind != "process":
+        return await pool.run(func, pcm, header, *args, timer=timer)
+    if not STT_SHARED_MEMORY or not pcm:
+        return await pool.run(func, bytes(pcm), header, *args, timer=timer)  # memoryviews do not pickle
+    ring = _get_ring(pool)
+    if not ring.fits(len(pcm)):
+        logger.debug("stt_shared_ring_overflow bytes=%d slot_bytes=%d", len(pcm), ring.slot_bytes)
+        return await pool.run(func, bytes(pcm), header, *args, timer=timer)
+
+    slot = await ring.acquire()
+    try:
+        offset = ring.write(slot, pcm)
+    except BaseException:
+        ring.release(slot)
+        raise
+    # The slot is recycled only once no worker can still be reading it; a cancelled call
+    # that is still queued is dropped right away.
+    return await pool.run(
+        _run_from_slot,
+        func,
+        ring.name,
+        offset,
+        len(pcm),
+        header,
+        *args,
+        timer=timer,
+        finished=lambda: ring.release(slot),
+    )
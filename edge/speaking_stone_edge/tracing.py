@@ -0,0 +1,210 @@
+"""Per-turn tracing: nested spans tied to a turn id, exported as JSONL.
+
+`turn(kind)` opens a turn around one STT/LLM/TTS round trip. `span(name)` records a
+nested, timed section anywhere below it, in `main`, the stage modules or their
+stage-pool threads (thread workers inherit the caller's context; process workers are
+only visible as the enclosing span). Outside a turn, `span` is a no-op, so library code
+can be instrumented unconditionally.
+
+Finished turns are written to `TRACE_FILE` as one JSON line each: turn id, kind, wall
+clock start and every span with its parent, offset and duration. A logging
+`QueueListener` does the write and the size-based rotation (`TRACE_MAX_BYTES`,
+`TRACE_BACKUP_COUNT`) on its own thread, so the event loop only enqueues a dict.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = os.getenv("TRACE_FILE")  # JSONL export is off unless set
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "3"))
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float  # perf_counter seconds
+    end: Optional[float] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return round((end - self.start) * 1000.0, 2)
+
+
+class Turn:
+    """The spans of one turn. Spans are appended from the loop and from worker threads."""
+
+    def __init__(self, kind: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        self.turn_id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.attrs = dict(attrs or {})
+        self.started_at = time.time()
+        self._ids = itertools.count(1)
+        self.root = Span(kind, 0, None, time.perf_counter())
+        self.spans: List[Span] = []
+
+    def open_span(self, name: str, parent: Optional[Span], attrs: Dict[str, Any], start: Optional[float] = None) -> Span:
+        parent_id = parent.span_id if parent is not None else self.root.span_id
+        span = Span(name, next(self._ids), parent_id, time.perf_counter() if start is None else start, attrs=attrs)
+        self.spans.append(span)  # list.append is atomic; worker threads may add spans concurrently
+        return span
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact per-name milliseconds for the client (repeated spans are summed)."""
+        totals: Dict[str, float] = {}
+        for span in list(self.spans):
+            if span.end is not None:
+                totals[span.name] = round(totals.get(span.name, 0.0) + span.duration_ms, 2)
+        return {"turn_id": self.turn_id, "elapsed_ms": self.root.duration_ms, "spans_ms": totals}
+
+    def to_record(self) -> Dict[str, Any]:
+        origin = self.root.start
+        return {
+            "turn_id": self.turn_id,
+            "kind": self.kind,
+            "ts": round(self.started_at, 3),
+            "duration_ms": self.root.duration_ms,
+            "attrs": self.attrs,
+            "spans": [
+                {
+                    "id": span.span_id,
+                    "parent": span.parent_id,
+                    "name": span.name,
+                    "offset_ms": round((span.start - origin) * 1000.0, 2),
+                    "duration_ms": span.duration_ms,
+                    **({"attrs": span.attrs} if span.attrs else {}),
+                }
+                for span in list(self.spans)
+            ],
+        }
+
+
+_current_turn: contextvars.ContextVar[Optional[Turn]] = contextvars.ContextVar("trace_turn", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+def current_turn() -> Optional[Turn]:
+    return _current_turn.get()
+
+
+def turn_id() -> Optional[str]:
+    active = _current_turn.get()
+    return active.turn_id if active is not None else None
+
+
+@contextlib.contextmanager
+def turn(kind: str, **attrs: Any) -> Iterator[Turn]:
+    """Open a turn for the current context and export it when the block exits."""
+    active = Turn(kind, attrs)
+    turn_token = _current_turn.set(active)
+    span_token = _current_span.set(None)
+    try:
+        yield active
+    except BaseException as exc:
+        active.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        active.root.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_turn.reset(turn_token)
+        export(active)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time a nested section of the current turn; yields None (and records nothing) outside one."""
+    active = _current_turn.get()
+    if active is None:
+        yield None
+        return
+    current = active.open_span(name, _current_span.get(), attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start: float, end: Optional[float] = None, **attrs: Any) -> Optional[Span]:
+    """Add an already finished span (`perf_counter` times), e.g. from callback-style hooks.
+
+    Use this instead of `span` where the section straddles `yield`s of an async generator.
+    """
+    active = _current_turn.get()
+    if active is None:
+        return None
+    finished = active.open_span(name, _current_span.get(), attrs, start=start)
+    finished.end = time.perf_counter() if end is None else end
+    return finished
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_export_queue: Optional[queue.SimpleQueue] = None
+_exporter_lock = threading.Lock()
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+def _get_export_queue() -> Optional[queue.SimpleQueue]:
+    global _listener, _export_queue
+    if not TRACE_FILE:
+        return None
+    with _exporter_lock:
+        if _export_queue is None:
+            handler = logging.handlers.RotatingFileHandler(
+                TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8", delay=True
+            )
+            handler.setFormatter(_JsonLineFormatter())
+            _export_queue = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(_export_queue, handler)
+            _listener.start()
+        return _export_queue
+
+
+def export(finished: Turn) -> None:
+    """Queue a finished turn for the JSONL writer thread (no-op without `TRACE_FILE`)."""
+    export_queue = _get_export_queue()
+    if export_queue is None:
+        return
+    record = logging.LogRecord(__name__, logging.INFO, __file__, 0, finished.to_record(), None, None)
+    export_queue.put_nowait(record)
+
+
+def close_exporter() -> None:
+    """Flush queued turns and stop the writer thread (it restarts on the next export)."""
+    global _listener, _export_queue
+    with _exporter_lock:
+        listener, _listener, _export_queue = _listener, None, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
@@ -0,0 +1,364 @@
+"""Content-addressed cache for synthesized speech.
+
+Entries are keyed by a SHA-256 of (voice, model, output format, normalized text) and
+hold the complete PCM for one utterance. Two tiers:
+- memory: byte-bounded LRU (`TTS_CACHE_MEMORY_BYTES`), consulted on the event loop.
+- disk: one file per entry under `TTS_CACHE_DIR`, mapped with `mmap` off the event loop
+  and handed out as a read-only memoryview of the mapping (no copy into the heap), evicted
+  least-recently-used once `TTS_CACHE_DISK_BYTES` is exceeded. Files are replaced
+  atomically and never truncated, so a view stays valid after eviction. Disabled when
+  `TTS_CACHE_DIR` is unset.
+
+Placeholder audio (provider missing or failing) and clips cut short by a provider failure
+are never cached.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+from . import stage_pool
+from . import tts_module
+from .audio_buffer import BytesLike
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1").strip().lower() in {"1", "true", "yes", "on"}
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_MAX_TEXT_CHARS = int(os.getenv("TTS_CACHE_MAX_TEXT_CHARS", "400"))
+TTS_CACHE_PRELOAD_FILE = os.getenv("TTS_CACHE_PRELOAD_FILE")
+CACHED_PIECE_BYTES = 8192  # re-stream hits in pieces so chunk framing starts immediately
+
+Synthesize = Callable[[str], Iterable[bytes]]
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace; case and punctuation change prosody, so they stay."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, voice: Optional[tuple[str, str, str]] = None) -> str:
+    voice_id, model_id, output_format = voice or tts_module.voice_signature()
+    material = "\x1f".join((voice_id, model_id, output_format, normalize_text(text)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """Byte-bounded LRU of PCM blobs (bytes, or views of disk-tier mappings)."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, BytesLike] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[BytesLike]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: BytesLike) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+class DiskTier:
+    """One file per entry; LRU order is kept in memory and seeded from file mtimes."""
+
+    SUFFIX = ".pcm"
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _load_index(self) -> None:
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[: -len(self.SUFFIX)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._index[key] = size
+            self._bytes += size
+        self._evict()
+
+    def get(self, key: str) -> Optional[memoryview]:
+        """A read-only view of the entry's mapping; the mapping lives as long as the view."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = memoryview(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+            os.utime(path)  # keeps LRU order across restarts
+        except (OSError, ValueError) as exc:  # ValueError: empty file cannot be mapped
+            logger.warning("tts_cache_disk_read_failed key=%s error=%s", key[:12], exc)
+            self._forget(key)
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("tts_cache_disk_write_failed key=%s error=%s", key[:12], exc)
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            return
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._bytes -= old
+            self._index[key] = len(data)
+            self._bytes += len(data)
+        self._evict()
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._bytes -= size
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._bytes <= self.max_bytes or not self._index:
+                    return
+                key, size = self._index.popitem(last=False)
+                self._bytes -= size
+            with contextlib.suppress(OSError):
+                os.unlink(self._path(key))
+
+
+class TtsCache:
+    """Memory LRU in front of an optional disk tier, with hit/miss counters."""
+
+    def __init__(
+        self,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        directory: Optional[str] = TTS_CACHE_DIR,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+        max_text_chars: int = TTS_CACHE_MAX_TEXT_CHARS,
+    ) -> None:
+        self.memory = MemoryTier(memory_bytes)
+        self.disk = DiskTier(directory, disk_bytes) if directory else None
+        self.max_text_chars = max_text_chars
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.pending_writes: Set["asyncio.Future[None]"] = set()  # background disk puts, kept until they finish
+
+    def cacheable(self, text: str) -> bool:
+        return 0 < len(text) <= self.max_text_chars
+
+    def get_memory(self, key: str) -> Optional[BytesLike]:
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+        return data
+
+    def get_disk(self, key: str) -> Optional[BytesLike]:
+        """Blocking disk lookup; promotes hits into the memory tier."""
+        if self.disk is None:
+            return None
+        data = self.disk.get(key)
+        if data is not None:
+            self.disk_hits += 1
+            self.memory.put(key, data)
+        return data
+
+    def get(self, key: str) -> Optional[BytesLike]:
+        return self.get_memory(key) or self.get_disk(key)
+
+    def put_disk_later(self, key: str, data: bytes) -> None:
+        """Write `data` to the disk tier on the default executor; failures are logged."""
+        if self.disk is None:
+            return
+        future = asyncio.get_running_loop().run_in_executor(None, self.disk.put, key, data)
+        self.pending_writes.add(future)
+        future.add_done_callback(functools.partial(self._write_done, key))
+
+    def _write_done(self, key: str, future: "asyncio.Future[None]") -> None:
+        self.pending_writes.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("tts_cache_disk_write_failed key=%s error=%s", key[:12], future.exception())
+
+    def put(self, key: str, data: bytes) -> None:
+        """Blocking store into both tiers."""
+        self.memory.put(key, data)
+        if self.disk is not None:
+            self.disk.put(key, data)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes_used,
+        }
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+            stats["disk_bytes"] = self.disk.bytes_used
+        return stats
+
+
+_cache: Optional[TtsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TtsCache]:
+    """Process-wide cache, or None when `TTS_CACHE=0`."""
+    global _cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = TtsCache()
+        return _cache
+
+
+def reset_tts_cache(cache: Optional[TtsCache] = None) -> None:
+    """Swap the process-wide cache (tests, or after changing the voice at runtime)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def _count(timer: Any, name: str) -> None:
+    if timer is not None:
+        timer.count(name)
+
+
+async def iter_cached_speech(
+    text: str,
+    synthesize: Synthesize = tts_module.iter_speech,
+    timer: Any = None,
+) -> AsyncIterator[bytes]:
+    """Yield PCM for `text` from the cache, or from `synthesize` on the TTS stage (then cache it).
+
+    Counts `tts_cache_hits` / `tts_cache_misses` on `timer` for the stage timings.
+    """
+    pool = stage_pool.get_stage_pool("tts")
+    cache = get_tts_cache()
+    if cache is None or not cache.cacheable(text):
+        try:
+            async for pcm in pool.iterate(synthesize, text, timer=timer):
+                yield pcm
+        except tts_module.IncompleteSpeechError:
+            pass  # the audio sent so far is all there is
+        return
+
+    key = cache_key(text)
+    data = cache.get_memory(key)
+    if data is None and cache.disk is not None:
+        # The cache lives in this process, so disk I/O uses the default executor, not the stage pool.
+        data = await asyncio.to_thread(cache.get_disk, key)
+    if data is not None:
+        _count(timer, "tts_cache_hits")
+        for offset in range(0, len(data), CACHED_PIECE_BYTES):
+            yield data[offset : offset + CACHED_PIECE_BYTES]
+        return
+
+    cache.misses += 1
+    _count(timer, "tts_cache_misses")
+    pieces: List[bytes] = []
+    try:
+        async for pcm in pool.iterate(synthesize, text, timer=timer):
+            pieces.append(pcm)
+            yield pcm
+    except tts_module.IncompleteSpeechError:
+        logger.warning("tts_cache_skipped reason=incomplete text_len=%d", len(text))
+        return
+    audio = b"".join(pieces)
+    if audio and not tts_module.is_placeholder(audio):
+        cache.memory.put(key, audio)
+        cache.put_disk_later(key, audio)
+
+
+def load_preload_phrases(path: Optional[str] = TTS_CACHE_PRELOAD_FILE) -> List[str]:
+    """One phrase per line; blank lines and `#` comments are skipped."""
+    if not path:
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            lines = [line.strip() for line in handle]
+    except OSError as exc:
+        logger.warning("could not read TTS preload file %s: %s", path, exc)
+        return []
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+async def preload(phrases: Iterable[str]) -> int:
+    """Render phrases that are not cached yet; returns how many were synthesized."""
+    cache = get_tts_cache()
+    if cache is None:
+        return 0
+    rendered = 0
+    for phrase in phrases:
+        if not cache.cacheable(phrase):
+            continue
+        misses = cache.misses
+        try:
+            async for _ in iter_cached_speech(phrase):
+                pass
+        except stage_pool.StageBusyError:
+            logger.warning("tts_cache_preload_skipped reason=stage_busy phrase_len=%d", len(phrase))
+            continue
+        rendered += cache.misses - misses
+    logger.info("tts_cache_preloaded rendered=%d stats=%s", rendered, cache.stats())
+    return rendered
@@ -1,11 +1,18 @@
-"""Text-to-speech synthesis via ElevenLabs (official Python SDK)."""
+"""Text-to-speech synthesis via ElevenLabs (official Python SDK) or a local Piper voice.
+
+`TTS_BACKEND` selects the provider: `elevenlabs` (default) or `piper`.
+"""
 
 from __future__ import annotations
 
 import logging
 import os
+import time
 from functools import lru_cache
-from typing import Optional
+from typing import Iterator, Optional
+
+from . import metrics
+from . import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -13,16 +20,40 @@ ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")  # Rachel (default demo voice)
 ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID")  # optional; let API default if unset
 ELEVENLABS_API_HOST = os.getenv("ELEVENLABS_API_HOST", "https://api.elevenlabs.io")
+TTS_BACKEND = os.getenv("TTS_BACKEND", "elevenlabs").strip().lower()
+PIPER_VOICE_PATH = os.getenv("PIPER_VOICE_PATH")  # e.g. /models/en_GB-alan-low.onnx
+PIPER_CONFIG_PATH = os.getenv("PIPER_CONFIG_PATH")  # defaults to PIPER_VOICE_PATH + ".json"
+PIPER_INTRA_OP_THREADS = int(os.getenv("PIPER_INTRA_OP_THREADS", "1"))
+PIPER_SPEAKER_ID = os.getenv("PIPER_SPEAKER_ID")
 TARGET_SAMPLE_RATE = 16000
 TARGET_CHANNELS = 1
 TARGET_SAMPLE_WIDTH = 2  # bytes (16-bit)
 
 
+# 0.5s of silence at 16 kHz mono, 16-bit to avoid loud static in players.
+_PLACEHOLDER_PCM = b"\x00\x00" * int(TARGET_SAMPLE_RATE * 0.5)
+
+
+class IncompleteSpeechError(RuntimeError):
+    """The provider failed after part of the audio was streamed; the clip is cut short."""
+
+
 def _placeholder_response(text: str) -> bytes:
     logger.info("tts_placeholder len_chars=%d", len(text))
-    # Return 0.5s of silence at 16 kHz mono, 16-bit to avoid loud static in players.
-    samples = int(TARGET_SAMPLE_RATE * 0.5)
-    return b"\x00\x00" * samples
+    metrics.FALLBACKS.labels("tts").inc()
+    return _PLACEHOLDER_PCM
+
+
+def is_placeholder(pcm: bytes) -> bool:
+    """True for the fallback audio, which must not be cached as if it were speech."""
+    return pcm == _PLACEHOLDER_PCM
+
+
+def voice_signature() -> tuple[str, str, str]:
+    """(voice, model, output format) that the synthesized audio depends on."""
+    if TTS_BACKEND == "piper":
+        return (f"piper:{os.path.basename(PIPER_VOICE_PATH or '')}", "piper", f"pcm_{TARGET_SAMPLE_RATE}")
+    return (f"elevenlabs:{ELEVENLABS_VOICE_ID}", ELEVENLABS_MODEL_ID or "default", f"pcm_{TARGET_SAMPLE_RATE}")
 
 
 @lru_cache(maxsize=1)
@@ -45,13 +76,14 @@ def _get_client():
         return None
 
 
-def _synthesize_with_elevenlabs(text: str) -> Optional[bytes]:
+def _stream_with_elevenlabs(text: str) -> Optional[Iterator[bytes]]:
+    """Return an iterator of PCM pieces from ElevenLabs' streaming endpoint, or None if unavailable."""
     client = _get_client()
     if client is None:
         return None
 
     try:
-        response = client.text_to_speech.convert(
+        return client.text_to_speech.convert_as_stream(
             voice_id=ELEVENLABS_VOICE_ID,
             optimize_streaming_latency="0",  # lowest latency
             model_id=ELEVENLABS_MODEL_ID,
@@ -62,27 +94,98 @@ def _synthesize_with_elevenlabs(text: str) -> Optional[bytes]:
         logger.error("ElevenLabs synthesis failed: %s", exc)
         return None
 
-    audio_bytes = b"".join(response)
-    if not audio_bytes:
-        logger.error("ElevenLabs returned empty audio for %d characters", len(text))
+
+@lru_cache(maxsize=1)
+def _get_piper_voice():
+    """Load the Piper voice once per process (the ONNX session is reused for every sentence)."""
+    if not PIPER_VOICE_PATH:
+        logger.warning("TTS_BACKEND=piper but PIPER_VOICE_PATH is not set; using placeholder TTS")
         return None
+    try:
+        from .piper_voice import PiperVoice
 
-    logger.info(
-        "tts_succeeded provider=elevenlabs len_chars=%d bytes=%d voice_id=%s model_id=%s",
-        len(text),
-        len(audio_bytes),
-        ELEVENLABS_VOICE_ID,
-        ELEVENLABS_MODEL_ID or "default",
-    )
-    return audio_bytes
+        return PiperVoice.load(
+            PIPER_VOICE_PATH,
+            config_path=PIPER_CONFIG_PATH,
+            intra_op_threads=PIPER_INTRA_OP_THREADS,
+            speaker_id=int(PIPER_SPEAKER_ID) if PIPER_SPEAKER_ID else None,
+        )
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Failed to load Piper voice %s: %s", PIPER_VOICE_PATH, exc)
+        return None
 
 
-def synthesize_speech(text: str) -> bytes:
-    """Synthesize speech using ElevenLabs when configured, otherwise return placeholder bytes."""
+def _synthesize_with_piper(text: str) -> Optional[Iterator[bytes]]:
+    """Return an iterator of per-sentence PCM pieces from the local Piper voice, or None if unavailable."""
+    voice = _get_piper_voice()
+    if voice is None:
+        return None
+    return voice.iter_pcm(text, TARGET_SAMPLE_RATE)
+
+
+def warm_backend() -> None:
+    """Load the configured provider up front so the first reply does not pay for it."""
+    if TTS_BACKEND == "piper":
+        _get_piper_voice()
+    else:
+        _get_client()
+
+
+def iter_speech(text: str) -> Iterator[bytes]:
+    """Yield 16 kHz mono PCM16 pieces as soon as the provider produces them.
+
+    Falls back to placeholder audio when the provider is not configured or fails before
+    producing any audio. A failure mid-stream ends the audio early: `IncompleteSpeechError`
+    is raised after the last piece, so callers can tell the clip is not complete.
+    """
     if not text:
-        return b""
+        return
+
+    provider = "piper" if TTS_BACKEND == "piper" else "elevenlabs"
+    # Provider load (first call only) and request setup, apart from audio generation.
+    with tracing.span("tts.open", provider=provider):
+        stream = _synthesize_with_piper(text) if provider == "piper" else _stream_with_elevenlabs(text)
+    produced = 0
+    failure: Optional[Exception] = None
+    if stream is not None:
+        started = time.perf_counter()
+        try:
+            for piece in stream:
+                if piece:
+                    if not produced:
+                        tracing.record_span("tts.first_chunk", started, provider=provider)
+                    produced += len(piece)
+                    yield piece
+        except Exception as exc:  # noqa: BLE001
+            logger.error("TTS synthesis failed provider=%s after %d bytes: %s", provider, produced, exc)
+            failure = exc
+        finally:
+            tracing.record_span("tts.synthesize", started, provider=provider, chars=len(text), bytes=produced)
+
+    if produced and failure is not None:
+        raise IncompleteSpeechError(f"{provider} stream failed after {produced} bytes") from failure
+    if produced:
+        voice_id, model_id, _ = voice_signature()
+        logger.info(
+            "tts_succeeded provider=%s len_chars=%d bytes=%d voice_id=%s model_id=%s",
+            provider,
+            len(text),
+            produced,
+            voice_id,
+            model_id,
+        )
+        return
+    if stream is not None:
+        logger.error("%s returned empty audio for %d characters", provider, len(text))
+    yield _placeholder_response(text)
 
-    pcm = _synthesize_with_elevenlabs(text)
-    if pcm is None:
-        return _placeholder_response(text)
-    return pcm
+
+def synthesize_speech(text: str) -> bytes:
+    """Synthesize speech with the configured backend, otherwise return placeholder bytes."""
+    pieces = []
+    try:
+        for piece in iter_speech(text):
+            pieces.append(piece)
+    except IncompleteSpeechError:
+        pass  # already logged; return the audio produced before the failure
+    return b"".join(pieces)
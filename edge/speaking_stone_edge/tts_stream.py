@@ -0,0 +1,90 @@
+"""Frame synthesized PCM into MSG_TYPE_TTS_CHUNK websocket messages.
+
+Each downlink chunk is an `AudioFrameHeader` followed by up to `TTS_CHUNK_BYTES` of
+16 kHz mono PCM16. Sequence numbers increase per reply (wrapping at 16 bits) and the
+final chunk carries `FLAG_LAST_CHUNK`; it may be empty when the audio length was an
+exact multiple of the chunk size.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+from . import protocol
+from .tts_module import TARGET_CHANNELS, TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH
+
+TTS_CHUNK_BYTES = int(os.getenv("TTS_CHUNK_BYTES", "3200"))  # 100 ms at 16 kHz PCM16
+MAX_CHUNK_BYTES = 0xFFFE  # payload_len is 16-bit; keep it sample aligned
+
+
+class TtsChunkSender:
+    """Accumulate PCM pieces and send fixed-size framed chunks as soon as they fill."""
+
+    def __init__(
+        self,
+        send_bytes: Callable[[bytes], Awaitable[None]],
+        chunk_bytes: int = TTS_CHUNK_BYTES,
+        timer: Any = None,
+    ) -> None:
+        self._send_bytes = send_bytes
+        self.chunk_bytes = max(TARGET_SAMPLE_WIDTH, min(chunk_bytes, MAX_CHUNK_BYTES)) & ~1
+        self._timer = timer
+        self._pending = bytearray()
+        self.sequence = 0
+        self.chunks_sent = 0
+        self.bytes_sent = 0
+        self.finished = False
+
+    async def send(self, pcm: bytes) -> None:
+        """Queue PCM; every complete chunk is sent immediately."""
+        if self.finished:
+            raise RuntimeError("TTS stream already finished")
+        self._pending.extend(pcm)
+        while len(self._pending) >= self.chunk_bytes:
+            payload = bytes(self._pending[: self.chunk_bytes])
+            del self._pending[: self.chunk_bytes]
+            await self._emit(payload, last=False)
+
+    async def finish(self) -> None:
+        """Send the remaining audio as the last chunk (flagged with FLAG_LAST_CHUNK)."""
+        if self.finished:
+            return
+        payload = bytes(self._pending)
+        self._pending.clear()
+        await self._emit(payload, last=True)
+        self.finished = True
+
+    async def _emit(self, payload: bytes, last: bool) -> None:
+        header = protocol.AudioFrameHeader(
+            sequence=self.sequence & 0xFFFF,
+            payload_len=len(payload),
+            sample_rate=TARGET_SAMPLE_RATE,
+            channels=TARGET_CHANNELS,
+            bits_per_sample=TARGET_SAMPLE_WIDTH * 8,
+            flags=protocol.FLAG_LAST_CHUNK if last else 0,
+        )
+        if self.chunks_sent == 0 and self._timer is not None:
+            self._timer.record("first_audio_ms", self._timer.elapsed_ms())
+        await self._send_bytes(header.to_bytes() + payload)
+        self.sequence += 1
+        self.chunks_sent += 1
+        self.bytes_sent += len(payload)
+
+    def summary(self) -> Dict[str, Any]:
+        bytes_per_second = TARGET_SAMPLE_RATE * TARGET_CHANNELS * TARGET_SAMPLE_WIDTH
+        return {
+            "chunks": self.chunks_sent,
+            "bytes": self.bytes_sent,
+            "duration_ms": round(self.bytes_sent * 1000.0 / bytes_per_second, 2),
+        }
+
+
+def split_tts_chunk(raw: bytes) -> tuple[protocol.AudioFrameHeader, bytes]:
+    """Client-side helper: split a downlink message into its header and PCM payload."""
+    header = protocol.AudioFrameHeader.from_bytes(raw)
+    payload = raw[protocol.HEADER_SIZE : protocol.HEADER_SIZE + header.payload_len]
+    if len(payload) != header.payload_len:
+        raise ValueError("TTS chunk payload shorter than header payload_len")
+    return header, payload
+
@@ -0,0 +1,191 @@
+"""Server-side voice-activity detection and endpointing for the audio websocket.
+
+`VAD_MODE` selects the frame classifier:
+- `off` (default): the device must send `speech_end`.
+- `energy`: vectorized NumPy RMS/zero-crossing classifier with an adaptive noise floor.
+- `silero`: Silero VAD v5 ONNX model via onnxruntime (`SILERO_VAD_MODEL_PATH`).
+
+`VoiceEndpointer` turns per-frame decisions into an endpoint once speech has been seen
+and trailing silence exceeds `VAD_HANGOVER_MS`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from functools import lru_cache
+from typing import Optional, Protocol
+
+import numpy as np
+
+from .protocol import AudioFrameHeader
+
+logger = logging.getLogger(__name__)
+
+VAD_MODE = os.getenv("VAD_MODE", "off").strip().lower()
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "700"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "200"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))
+VAD_PREROLL_SLACK_MS = int(os.getenv("VAD_PREROLL_SLACK_MS", "200"))
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))
+VAD_ENERGY_MIN_DBFS = float(os.getenv("VAD_ENERGY_MIN_DBFS", "-50"))
+VAD_ENERGY_MARGIN_DB = float(os.getenv("VAD_ENERGY_MARGIN_DB", "12"))
+VAD_ZCR_MAX = float(os.getenv("VAD_ZCR_MAX", "0.35"))
+SILERO_VAD_MODEL_PATH = os.getenv("SILERO_VAD_MODEL_PATH")
+SILERO_VAD_THRESHOLD = float(os.getenv("SILERO_VAD_THRESHOLD", "0.5"))
+
+
+class FrameClassifier(Protocol):
+    frame_samples: int
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """Return one speech/non-speech bool per row of int16 `frames` (n, frame_samples)."""
+
+
+class EnergyVad:
+    """RMS energy + zero-crossing-rate classifier, vectorized across analysis frames."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_ms: int = VAD_FRAME_MS,
+        min_dbfs: float = VAD_ENERGY_MIN_DBFS,
+        margin_db: float = VAD_ENERGY_MARGIN_DB,
+        zcr_max: float = VAD_ZCR_MAX,
+    ) -> None:
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.min_dbfs = min_dbfs
+        self.margin_db = margin_db
+        self.zcr_max = zcr_max
+        self.noise_floor_db = min_dbfs - margin_db
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        samples = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(samples * samples, axis=1) + 1e-12)
+        level_db = 20.0 * np.log10(rms)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frames.shape[1] - 1)
+
+        threshold = max(self.min_dbfs, self.noise_floor_db + self.margin_db)
+        loud = level_db > threshold
+        # High ZCR at modest level is hiss/fans; very loud frames pass regardless (fricatives).
+        speech = loud & ((zcr < self.zcr_max) | (level_db > threshold + self.margin_db))
+
+        # Minimum tracking: drop to quieter levels at once, rise slowly so speech is not absorbed.
+        lowest = float(level_db.min())
+        if lowest < self.noise_floor_db:
+            self.noise_floor_db = lowest
+        else:
+            self.noise_floor_db += 0.02 * (lowest - self.noise_floor_db)
+        return speech
+
+
+@lru_cache(maxsize=1)
+def _load_silero_session(model_path: str):
+    """Load the Silero model once; per-connection recurrent state lives in `SileroVad`."""
+    import onnxruntime  # optional dependency, only needed for VAD_MODE=silero
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = 1
+    options.inter_op_num_threads = 1
+    return onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class SileroVad:
+    """Silero VAD v5 ONNX model; stateful, so windows are scored in order."""
+
+    CONTEXT_SAMPLES = 64
+
+    def __init__(self, model_path: str, sample_rate: int, threshold: float = SILERO_VAD_THRESHOLD) -> None:
+        if sample_rate not in (8000, 16000):
+            raise ValueError(f"Silero VAD supports 8 kHz or 16 kHz audio, got {sample_rate}")
+        self._session = _load_silero_session(model_path)
+        self.frame_samples = 512 if sample_rate == 16000 else 256
+        self.threshold = threshold
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._context = np.zeros((1, self.CONTEXT_SAMPLES), dtype=np.float32)
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        decisions = np.zeros(frames.shape[0], dtype=bool)
+        audio = frames.astype(np.float32) / 32768.0
+        for index in range(frames.shape[0]):
+            window = np.concatenate([self._context, audio[index : index + 1]], axis=1)
+            prob, self._state = self._session.run(
+                None, {"input": window, "state": self._state, "sr": self._sr}
+            )
+            self._context = window[:, -self.CONTEXT_SAMPLES :]
+            decisions[index] = float(prob[0][0]) >= self.threshold
+        return decisions
+
+
+class VoiceEndpointer:
+    """Accumulate frame decisions and report when an utterance has ended."""
+
+    def __init__(
+        self,
+        classifier: FrameClassifier,
+        sample_rate: int,
+        hangover_ms: int = VAD_HANGOVER_MS,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+    ) -> None:
+        self.classifier = classifier
+        self.sample_rate = sample_rate
+        self.frame_ms = classifier.frame_samples * 1000.0 / sample_rate
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the current utterance (classifier noise tracking is kept)."""
+        self._leftover = np.zeros(0, dtype=np.int16)
+        self.speech_ms = 0.0
+        self.trailing_silence_ms = 0.0
+
+    def accepts(self, header: AudioFrameHeader) -> bool:
+        """VAD only scores PCM16 mono at the rate it was built for."""
+        return header.sample_rate == self.sample_rate and header.channels == 1 and header.bits_per_sample == 16
+
+    @property
+    def speech_seen(self) -> bool:
+        return self.speech_ms >= self.min_speech_ms
+
+    @property
+    def speech_pending(self) -> bool:
+        """Speech started recently but is still shorter than `min_speech_ms`."""
+        return 0.0 < self.speech_ms < self.min_speech_ms and self.trailing_silence_ms < self.hangover_ms
+
+    def feed(self, pcm: bytes) -> bool:
+        """Classify a PCM16 mono payload; return True once the endpoint is reached."""
+        samples = np.frombuffer(pcm, dtype="<i2")
+        if self._leftover.size:
+            samples = np.concatenate([self._leftover, samples])
+        frame_samples = self.classifier.frame_samples
+        usable = samples.size - samples.size % frame_samples
+        self._leftover = samples[usable:].copy()
+        if usable == 0:
+            return False
+
+        decisions = self.classifier.classify(samples[:usable].reshape(-1, frame_samples))
+        speech_indices = np.flatnonzero(decisions)
+        self.speech_ms += speech_indices.size * self.frame_ms
+        if speech_indices.size:
+            self.trailing_silence_ms = (decisions.size - 1 - speech_indices[-1]) * self.frame_ms
+        else:
+            self.trailing_silence_ms += decisions.size * self.frame_ms
+        return bool(self.speech_seen and self.trailing_silence_ms >= self.hangover_ms)
+
+
+def create_endpointer(sample_rate: int = 16000, mode: Optional[str] = None) -> Optional[VoiceEndpointer]:
+    """Build the endpointer configured by `VAD_MODE`, or None when VAD is off."""
+    mode = (mode or VAD_MODE).lower()
+    if mode in ("", "off", "none"):
+        return None
+    if mode == "energy":
+        return VoiceEndpointer(EnergyVad(sample_rate), sample_rate)
+    if mode == "silero":
+        if not SILERO_VAD_MODEL_PATH:
+            logger.error("VAD_MODE=silero but SILERO_VAD_MODEL_PATH is not set; falling back to energy VAD")
+            return VoiceEndpointer(EnergyVad(sample_rate), sample_rate)
+        return VoiceEndpointer(SileroVad(SILERO_VAD_MODEL_PATH, sample_rate), sample_rate)
+    raise ValueError(f"Unknown VAD_MODE {mode!r}; expected off, energy or silero")
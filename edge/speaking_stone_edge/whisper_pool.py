@@ -0,0 +1,121 @@
+"""Several Whisper model instances, each pinned to its own slice of CPU cores.
+
+CTranslate2 spawns its compute threads from the thread that builds the model, and
+Linux threads inherit the CPU affinity of their parent. Each instance is therefore
+built while the building thread is temporarily restricted to that instance's cores,
+and its `cpu_threads` matches the slice size. Requests lease the least-loaded instance.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ModelFactory = Callable[[int], Any]  # cpu_threads -> model
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(cores: Sequence[int], instances: int) -> List[List[int]]:
+    """Split cores into `instances` contiguous, near-equal groups (cores are shared if too few)."""
+    instances = max(1, instances)
+    if len(cores) < instances:
+        return [[cores[index % len(cores)]] for index in range(instances)] if cores else [[] for _ in range(instances)]
+    base, extra = divmod(len(cores), instances)
+    groups: List[List[int]] = []
+    start = 0
+    for index in range(instances):
+        size = base + (1 if index < extra else 0)
+        groups.append(list(cores[start : start + size]))
+        start += size
+    return groups
+
+
+@contextlib.contextmanager
+def _pinned(cores: Sequence[int]) -> Iterator[None]:
+    """Restrict the calling thread to `cores` for the duration of the block (Linux only)."""
+    if not cores or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, set(cores))
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+@dataclass
+class ModelInstance:
+    index: int
+    model: Any
+    cores: List[int]
+    cpu_threads: int
+    active: int = 0
+    calls: int = 0
+    busy_s: float = 0.0
+    created: float = field(default_factory=time.monotonic)
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = max(1e-9, time.monotonic() - self.created)
+        return {
+            "index": self.index,
+            "cores": self.cores,
+            "cpu_threads": self.cpu_threads,
+            "active": self.active,
+            "calls": self.calls,
+            "busy_s": round(self.busy_s, 3),
+            "utilization": round(min(1.0, self.busy_s / uptime), 4),
+        }
+
+
+class WhisperModelPool:
+    """N model instances with least-loaded dispatch and per-instance utilization."""
+
+    def __init__(
+        self,
+        factory: ModelFactory,
+        size: int,
+        cpu_threads: int = 0,
+        pin_cores: bool = True,
+        cores: Optional[Sequence[int]] = None,
+    ) -> None:
+        groups = partition_cores(list(cores) if cores is not None else available_cores(), size)
+        self._lock = threading.Lock()
+        self.instances: List[ModelInstance] = []
+        for index, group in enumerate(groups):
+            threads = cpu_threads or max(1, len(group))
+            with _pinned(group if pin_cores else ()):
+                model = factory(threads)
+            self.instances.append(ModelInstance(index, model, group if pin_cores else [], threads))
+            logger.info("whisper_instance_ready index=%d cores=%s cpu_threads=%d", index, group, threads)
+
+    @contextlib.contextmanager
+    def lease(self) -> Iterator[Any]:
+        """Borrow the instance with the fewest in-flight calls (then least busy time)."""
+        with self._lock:
+            instance = min(self.instances, key=lambda item: (item.active, item.busy_s))
+            instance.active += 1
+        started = time.monotonic()
+        try:
+            yield instance.model
+        finally:
+            with self._lock:
+                instance.active -= 1
+                instance.calls += 1
+                instance.busy_s += time.monotonic() - started
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [instance.stats() for instance in self.instances]
@@ -0,0 +1,88 @@
+import pathlib
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import adpcm, protocol
+
+
+def _reference_decode(block: bytes) -> list:
+    """Textbook per-sample IMA-ADPCM decoder."""
+    predictor, index, _ = adpcm.BLOCK_HEADER.unpack_from(block)
+    samples = []
+    for byte in block[adpcm.BLOCK_HEADER_SIZE :]:
+        for code in (byte & 0x0F, byte >> 4):
+            step = int(adpcm.STEP_TABLE[index])
+            diff = step >> 3
+            if code & 4:
+                diff += step
+            if code & 2:
+                diff += step >> 1
+            if code & 1:
+                diff += step >> 2
+            predictor += -diff if code & 8 else diff
+            predictor = max(-32768, min(32767, predictor))
+            index = max(0, min(88, index + int(adpcm.INDEX_TABLE[code])))
+            samples.append(predictor)
+    return samples
+
+
+def test_vectorized_decoder_matches_reference_including_clamping():
+    rng = np.random.default_rng(1)
+    blocks = [
+        bytes(adpcm.BLOCK_HEADER.pack(32000, 80, 0)) + rng.integers(0, 256, 300, dtype=np.uint8).tobytes(),
+        bytes(adpcm.BLOCK_HEADER.pack(-32768, 0, 0)) + rng.integers(0, 256, 300, dtype=np.uint8).tobytes(),
+        bytes(adpcm.BLOCK_HEADER.pack(0, 88, 0)) + bytes([0x77] * 300),  # saturates at +32767
+    ]
+    decoded = adpcm.decode_blocks(b"".join(blocks), [len(block) for block in blocks])
+
+    expected = [sample for block in blocks for sample in _reference_decode(block)]
+    assert decoded.tolist() == expected
+
+
+def test_decoder_handles_ragged_blocks_into_caller_buffer():
+    rng = np.random.default_rng(2)
+    blocks = [
+        bytes(adpcm.BLOCK_HEADER.pack(100, 10, 0)) + rng.integers(0, 256, size, dtype=np.uint8).tobytes()
+        for size in (40, 7, 0, 25)
+    ]
+    out = np.full(adpcm.samples_in(sum(map(len, blocks)), len(blocks)), 123, dtype="<i2")
+
+    result = adpcm.decode_blocks(b"".join(blocks), [len(block) for block in blocks], out=out)
+
+    assert result is out
+    assert out.tolist() == [sample for block in blocks for sample in _reference_decode(block)]
+
+
+def test_encode_decode_roundtrip_tracks_the_signal():
+    t = np.arange(3200) / 16000.0
+    signal = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    first, index = adpcm.encode_block(signal[:1600])
+    second, _ = adpcm.encode_block(signal[1600:], index)
+
+    decoded = adpcm.decode_blocks(first + second, [len(first), len(second)])
+
+    assert len(first) == adpcm.BLOCK_HEADER_SIZE + 800
+    error = decoded.astype(np.float64) - signal
+    snr_db = 10 * np.log10(np.mean(signal.astype(np.float64) ** 2) / np.mean(error**2))
+    assert snr_db > 20
+
+
+def test_decoded_header_validates_format():
+    header = protocol.AudioFrameHeader(
+        sequence=5, payload_len=324, sample_rate=16000, channels=1, bits_per_sample=4, flags=protocol.FLAG_ADPCM
+    )
+    pcm_header = adpcm.decoded_header(header, [324])
+    assert (pcm_header.payload_len, pcm_header.bits_per_sample, pcm_header.flags) == (1280, 16, 0)
+
+    with pytest.raises(ValueError):
+        adpcm.decoded_header(header, [2])
+    with pytest.raises(ValueError):
+        adpcm.decoded_header(protocol.AudioFrameHeader(5, 324, 16000, 2, 4, protocol.FLAG_ADPCM), [324])
+    with pytest.raises(ValueError):
+        adpcm.decode_blocks(adpcm.BLOCK_HEADER.pack(0, 99, 0) + b"\x00", [5])
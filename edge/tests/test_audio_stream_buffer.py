@@ -1,6 +1,9 @@
+import asyncio
+import gc
 import pathlib
 import sys
 
+import numpy as np
 import pytest
 
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
@@ -8,6 +11,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from speaking_stone_edge import main, protocol
+from speaking_stone_edge.audio_buffer import AudioStreamBuffer, BufferLimitError, MemoryBudget
 
 
 def _header(**overrides):
@@ -60,3 +64,154 @@ def test_audio_stream_buffer_snapshot_without_data():
     buf.clear()
     with pytest.raises(ValueError):
         buf.snapshot()
+
+
+def test_audio_stream_buffer_grows_geometrically_without_losing_audio():
+    buf = main.AudioStreamBuffer(initial_capacity=8)
+    payload = bytes(range(4))
+    for _ in range(5):
+        buf.append_frame(_header(), memoryview(payload))
+
+    data, _ = buf.snapshot()
+    assert data == payload * 5
+    assert buf.capacity() == 32
+    assert buf.samples().size == 10
+
+
+def test_audio_stream_buffer_snapshot_survives_clear_and_reuse():
+    buf = main.AudioStreamBuffer(initial_capacity=8)
+    buf.append_frame(_header(), b"\x01\x01\x01\x01")
+    data, _ = buf.snapshot()
+
+    buf.clear()
+    buf.append_frame(_header(), b"\x02\x02\x02\x02")
+
+    assert data == b"\x01\x01\x01\x01"
+    assert data.readonly
+    assert buf.snapshot()[0] == b"\x02\x02\x02\x02"
+
+
+def test_audio_stream_buffer_reuses_its_store_once_no_snapshot_view_is_alive():
+    buf = main.AudioStreamBuffer(initial_capacity=8)
+    buf.append_frame(_header(), b"\x01\x01\x01\x01")
+    store = buf._store
+    data, _ = buf.snapshot()
+    window = np.frombuffer(data[2:], dtype="<i2")  # derived views pin the store too
+    del data
+    gc.collect()
+
+    buf.clear()
+    buf.append_frame(_header(), b"\x02\x02\x02\x02")
+    assert buf._store is not store
+    assert window.tolist() == [0x0101]
+
+    store = buf._store
+    buf.snapshot()  # dropped right away
+    buf.clear()
+    buf.append_frame(_header(), b"\x03\x03\x03\x03")
+    assert buf._store is store
+
+
+def test_audio_stream_buffer_keep_tail_slides_without_touching_snapshots():
+    buf = main.AudioStreamBuffer(initial_capacity=8)
+    buf.append_frame(_header(), b"\x01\x01\x02\x02")
+    buf.append_frame(_header(), b"\x03\x03\x04\x04")
+    data, _ = buf.snapshot()
+
+    assert buf.keep_tail(4) == 4
+    buf.append_frame(_header(), b"\x05\x05\x06\x06")
+
+    assert data == b"\x01\x01\x02\x02\x03\x03\x04\x04"
+    assert buf.snapshot()[0] == b"\x03\x03\x04\x04\x05\x05\x06\x06"
+    assert buf.keep_tail(2) == 6
+    assert buf.snapshot()[0] == b"\x06\x06"
+    assert buf.keep_tail(2) == 0  # nothing to drop
+
+
+def test_audio_stream_buffer_spills_past_memory_cap_and_keeps_audio():
+    budget = MemoryBudget(limit_bytes=1024)
+    buf = AudioStreamBuffer(initial_capacity=8, memory_cap=16, max_bytes=64, budget=budget)
+    payload = bytes(range(4))
+    for _ in range(4):
+        buf.append_frame(_header(), payload)
+    assert buf.spilled() is False
+    assert budget.used == 16
+
+    buf.append_frame(_header(), payload)
+    data, _ = buf.snapshot()
+    assert buf.spilled() is True
+    assert data == payload * 5
+    assert buf.samples().tolist()[:2] == [0x0100, 0x0302]
+
+    buf.clear()
+    gc.collect()
+    assert budget.used == 0
+    buf.append_frame(_header(), payload)
+    assert buf.spilled() is False
+    assert data == payload * 5  # the spilled snapshot is still readable after clear()
+
+
+def test_audio_stream_buffer_rejects_frames_past_hard_ceiling():
+    buf = AudioStreamBuffer(initial_capacity=8, memory_cap=8, max_bytes=12, budget=MemoryBudget(1024))
+    for _ in range(3):
+        buf.append_frame(_header(), b"\x01\x02\x03\x04")
+
+    with pytest.raises(BufferLimitError) as excinfo:
+        buf.append_frame(_header(), b"\x01\x02\x03\x04")
+    assert excinfo.value.limit_bytes == 12
+    assert excinfo.value.buffered_bytes == 12
+    assert buf.byte_count() == 12
+
+
+def test_audio_stream_buffer_spills_when_global_budget_is_exhausted():
+    budget = MemoryBudget(limit_bytes=16)
+    first = AudioStreamBuffer(initial_capacity=16, budget=budget)
+    second = AudioStreamBuffer(initial_capacity=16, budget=budget)
+    first.append_frame(_header(), b"\x00\x01\x02\x03")
+    second.append_frame(_header(), b"\x00\x01\x02\x03")
+
+    assert first.spilled() is False
+    assert second.spilled() is True
+    assert budget.denied == 1
+    assert budget.under_pressure() is True
+
+
+def test_memory_budget_backpressure_waits_until_released():
+    budget = MemoryBudget(limit_bytes=100, high_water=0.5)
+    assert budget.try_reserve(80)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.03, budget.release, 80)
+        return await budget.wait_for_room(max_wait_ms=1000)
+
+    waited_ms = asyncio.run(scenario())
+    assert 20 <= waited_ms < 1000
+    assert budget.backpressure_waits == 1
+    assert asyncio.run(budget.wait_for_room()) == 0.0
+
+
+def test_audio_stream_buffer_append_decoded_fills_in_place():
+    buf = AudioStreamBuffer(initial_capacity=8, budget=MemoryBudget(1024))
+    buf.append_frame(_header(), b"\x01\x00\x02\x00")
+
+    region = buf.append_decoded(_header(payload_len=6))
+    region[:] = b"\x03\x00\x04\x00\x05\x00"
+
+    assert buf.samples().tolist() == [1, 2, 3, 4, 5]
+    with pytest.raises(ValueError):
+        buf.append_decoded(_header(sample_rate=8000))
+
+
+def test_audio_stream_buffer_keeps_a_frozen_header_for_frame_slots():
+    buf = AudioStreamBuffer(initial_capacity=8, budget=MemoryBudget(1024))
+    slot = protocol.FrameSlot(sample_rate=16000, channels=1, bits_per_sample=16)
+
+    buf.append_frame(slot.parse(protocol.SLIM_HEADER_STRUCT.pack(0, 4, 0)), b"\x01\x00\x02\x00")
+    buf.append_frame(slot.parse(protocol.SLIM_HEADER_STRUCT.pack(1, 2, 0)), b"\x03\x00")
+
+    data, header = buf.snapshot()
+    assert data == b"\x01\x00\x02\x00\x03\x00"
+    assert header == _header(sequence=0, payload_len=4)
+    with pytest.raises(ValueError):
+        buf.append_frame(_header(sample_rate=8000), b"\x00\x00\x00\x00")
@@ -0,0 +1,200 @@
+import asyncio
+import pathlib
+import sys
+import threading
+
+import numpy as np
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.testclient import TestClient
+
+from speaking_stone_edge import main, metrics, protocol, vad
+
+
+def _frame(sequence: int, samples: int = 320, loud: bool = False) -> bytes:
+    pcm = (b"\x00\x10" if loud else b"\x10\x00") * samples
+    return protocol.AudioFrameHeader(sequence, len(pcm), 16000, 1, 16, 0).to_bytes() + pcm
+
+
+def _control(event: str, payload: dict | None = None) -> str:
+    return protocol.encode_control_message(event, payload or {})
+
+
+class _SlowLlm:
+    """Blocks until cancelled (or released) and reports both through thread-safe events."""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+        self.release = threading.Event()
+
+    async def __call__(self, text, history=None):
+        self.started.set()
+        try:
+            while not self.release.is_set():
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        return f"reply to {text}"
+
+
+class _LoudVad:
+    """Frames louder than a fixed level are speech."""
+
+    frame_samples = 320
+
+    def classify(self, frames):
+        return np.abs(frames).max(axis=1) > 1000
+
+
+def _use_vad(monkeypatch):
+    monkeypatch.setattr(
+        main.vad, "create_endpointer", lambda: vad.VoiceEndpointer(_LoudVad(), 16000, min_speech_ms=20)
+    )
+
+
+def _stub_pipeline(monkeypatch, llm):
+    transcribed = []
+
+    async def transcribe(pcm, header, timer=None):
+        transcribed.append(len(pcm))
+        return f"utterance {len(transcribed)}"
+
+    monkeypatch.setattr(main, "BARGE_IN", True)
+    monkeypatch.setattr(main.stt_batch, "transcribe", transcribe)
+    monkeypatch.setattr(main, "generate_reply", llm)
+    monkeypatch.setattr(main, "iter_speech", lambda text: iter([b"\x01\x00" * 1600]))
+    return transcribed
+
+
+def _next_event(ws) -> dict:
+    while True:
+        message = ws.receive()
+        if message.get("text") is not None:
+            return protocol.decode_control_message(message["text"])
+
+
+def test_detected_speech_cancels_reply_in_flight_and_starts_next_utterance(monkeypatch):
+    llm = _SlowLlm()
+    transcribed = _stub_pipeline(monkeypatch, llm)
+    _use_vad(monkeypatch)
+    cancelled = metrics.TURNS_CANCELLED.labels("barge_in").value
+
+    client = TestClient(main.app)  # no lifespan: startup would load Whisper
+    with client.websocket_connect("/ws/audio") as ws:
+        assert _next_event(ws)["event"] == "connected"
+        for sequence in range(3):
+            ws.send_bytes(_frame(sequence, loud=True))
+        ws.send_text(_control("speech_end"))
+        assert llm.started.wait(5)
+
+        ws.send_bytes(_frame(3))  # background noise does not interrupt
+        ws.send_bytes(_frame(4, loud=True))  # the user talks over the pending reply
+        event = _next_event(ws)
+        assert event["event"] == "turn_cancelled"
+        assert event["payload"]["reason"] == "barge_in"
+        assert event["payload"]["kind"] == "audio"
+        assert llm.cancelled.wait(5)
+
+        llm.release.set()
+        ws.send_bytes(_frame(5, loud=True))
+        ws.send_text(_control("speech_end"))
+        event = _next_event(ws)
+        assert event["event"] == "transcription_ready"
+        assert event["payload"]["transcript"] == "utterance 2"
+
+    # The second turn only saw the audio sent after the first speech_end.
+    assert transcribed == [3 * 640, 3 * 640]
+    assert metrics.TURNS_CANCELLED.labels("barge_in").value == cancelled + 1
+
+
+def test_audio_without_vad_does_not_cancel_reply_in_flight(monkeypatch):
+    llm = _SlowLlm()
+    _stub_pipeline(monkeypatch, llm)
+    monkeypatch.setattr(main.vad, "create_endpointer", lambda: None)
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/audio") as ws:
+        assert _next_event(ws)["event"] == "connected"
+        ws.send_bytes(_frame(0, loud=True))
+        ws.send_text(_control("speech_end"))
+        assert llm.started.wait(5)
+
+        ws.send_bytes(_frame(1, loud=True))
+        llm.release.set()
+        event = _next_event(ws)
+        assert event["event"] == "transcription_ready"
+        assert event["payload"]["transcript"] == "utterance 1"
+    assert not llm.cancelled.is_set()
+
+
+def test_cancel_event_aborts_text_turn_and_acks_when_idle(monkeypatch):
+    llm = _SlowLlm()
+    _stub_pipeline(monkeypatch, llm)
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/audio") as ws:
+        assert _next_event(ws)["event"] == "connected"
+        ws.send_text(_control("cancel"))
+        assert _next_event(ws) == {"type": protocol.MSG_TYPE_CONTROL, "event": "ack", "payload": {"event": "cancel"}}
+
+        ws.send_text(_control("text_input", {"text": "hello", "skip_tts": True}))
+        assert llm.started.wait(5)
+        ws.send_text(_control("cancel"))
+        event = _next_event(ws)
+        assert event["event"] == "turn_cancelled"
+        assert event["payload"]["reason"] == "cancel"
+        assert event["payload"]["kind"] == "text"
+        assert llm.cancelled.wait(5)
+
+
+def test_unexpected_turn_failure_is_reported_to_the_stone(monkeypatch):
+    _stub_pipeline(monkeypatch, _SlowLlm())
+
+    async def broken_transcribe(pcm, header, timer=None):
+        raise RuntimeError("decoder crashed")
+
+    monkeypatch.setattr(main.stt_batch, "transcribe", broken_transcribe)
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/audio") as ws:
+        assert _next_event(ws)["event"] == "connected"
+        ws.send_bytes(_frame(0))
+        ws.send_text(_control("speech_end"))
+        event = _next_event(ws)
+        assert event["event"] == "error"
+        assert event["payload"] == {"detail": "turn_failed", "error": "decoder crashed"}
+
+
+def test_open_mic_preroll_is_trimmed_once_per_slack_not_per_frame(monkeypatch):
+    llm = _SlowLlm()
+    llm.release.set()
+    transcribed = _stub_pipeline(monkeypatch, llm)
+    _use_vad(monkeypatch)
+    monkeypatch.setattr(main.vad, "VAD_PREROLL_MS", 300)
+    monkeypatch.setattr(main.vad, "VAD_PREROLL_SLACK_MS", 200)
+    trims = []
+    keep_tail = main.AudioStreamBuffer.keep_tail
+
+    def counting_keep_tail(self, nbytes):
+        trims.append(self.byte_count())
+        return keep_tail(self, nbytes)
+
+    monkeypatch.setattr(main.AudioStreamBuffer, "keep_tail", counting_keep_tail)
+
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/audio") as ws:
+        assert _next_event(ws)["event"] == "connected"
+        for sequence in range(40):  # 800 ms of silence
+            ws.send_bytes(_frame(sequence))
+        ws.send_bytes(_frame(40, loud=True))
+        ws.send_text(_control("speech_end"))
+        assert _next_event(ws)["event"] == "transcription_ready"
+
+    # Trimmed back to 300 ms whenever 500 ms had built up: at frames 25 and 35.
+    assert trims == [25 * 640, 25 * 640]
+    assert transcribed == [21 * 640]  # 20 frames of pre-roll plus the speech
@@ -0,0 +1,92 @@
+import asyncio
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import history, stage_pool
+
+
+def _fill(chat: history.ChatHistory, turns: int) -> None:
+    for index in range(turns):
+        chat.append("user", f"question number {index} " + "x" * 60)
+        chat.append("assistant", f"answer number {index} " + "y" * 60)
+
+
+def test_estimate_tokens_is_roughly_four_chars_per_token():
+    assert history.estimate_tokens("") == 0
+    assert history.estimate_tokens("abcd") == 1
+    assert history.estimate_tokens("a" * 401) == 101
+
+
+def test_history_compacts_oldest_turns_into_summary_in_background():
+    seen = {}
+
+    async def summarizer(previous, turns):
+        seen["previous"] = previous
+        seen["turns"] = [turn["content"] for turn in turns]
+        return "user asked several numbered questions"
+
+    chat = history.ChatHistory(summarizer=summarizer, budget_tokens=120, keep_messages=2)
+
+    async def scenario():
+        _fill(chat, 3)
+        task = chat.schedule_compaction()
+        assert task is not None
+        assert chat.schedule_compaction() is None  # one compaction at a time
+        # A turn that lands while the summary is being written is kept verbatim.
+        chat.append("user", "late question")
+        await task
+
+    asyncio.run(scenario())
+
+    assert seen["previous"] == ""
+    assert len(seen["turns"]) == 4
+    messages = chat.messages()
+    assert messages[0]["role"] == "system"
+    assert messages[0]["content"].endswith("user asked several numbered questions")
+    assert [m["content"] for m in messages[1:]][-1] == "late question"
+    assert len(chat) == 3
+    assert chat.compactions == 1
+    assert chat.token_count() < 120
+
+
+def test_history_uses_extractive_summary_when_summarizer_fails():
+    async def summarizer(previous, turns):
+        raise RuntimeError("provider down")
+
+    chat = history.ChatHistory(summarizer=summarizer, budget_tokens=60, keep_messages=2)
+    _fill(chat, 2)
+    asyncio.run(chat.compact())
+
+    assert chat.summary.startswith("User: question number 0")
+    assert "Assistant: answer number 0" in chat.summary
+    assert len(chat) == 2
+
+
+def test_history_replaces_an_over_budget_summary_and_admits_it_as_an_llm_call():
+    pool = stage_pool.get_stage_pool("llm")
+    seen = {}
+
+    async def summarizer(previous, turns):
+        seen["pending"] = pool.stats()["pending"]
+        return "rambling " * 200
+
+    chat = history.ChatHistory(summarizer=summarizer, budget_tokens=60, keep_messages=2, summary_max_tokens=40)
+    _fill(chat, 2)
+    asyncio.run(chat.compact())
+
+    assert seen["pending"] == 1  # the summary call held an LLM stage slot
+    assert "rambling" not in chat.summary
+    assert chat.summary.startswith("...") and "Assistant: answer number 0" in chat.summary  # extractive, truncated from the front
+    assert history.estimate_tokens(chat.summary) <= 40
+
+
+def test_history_drops_oldest_turns_when_far_over_budget():
+    chat = history.ChatHistory(budget_tokens=50, keep_messages=2)
+    _fill(chat, 5)
+
+    assert chat.token_count() <= 100
+    assert chat.messages()[-1]["content"].startswith("answer number 4")
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import pathlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import llm_module
+
+
+async def _alines(lines):
+    for line in lines:
+        yield line
+
+
+async def _collect(aiterable):
+    return [item async for item in aiterable]
+
+
+def test_aiter_sse_data_skips_comments_and_stops_at_done():
+    lines = [
+        ": OPENROUTER PROCESSING",
+        "",
+        'data: {"a": 1}',
+        "",
+        'data: {"b": 2}\r',
+        "",
+        "data: [DONE]",
+        "",
+        'data: {"late": true}',
+        "",
+    ]
+    assert asyncio.run(_collect(llm_module._aiter_sse_data(_alines(lines)))) == ['{"a": 1}', '{"b": 2}']
+
+
+def test_sentence_segmenter_emits_complete_sentences_only():
+    segmenter = llm_module.SentenceSegmenter()
+    emitted = []
+    for token in ["Hello there", "! How are", " you today? *wa", "ves. smiles* Dr. Smith", " is in.", " Bye"]:
+        emitted.extend(segmenter.feed(token))
+
+    assert emitted == ["Hello there!", "How are you today?", "*waves. smiles* Dr. Smith is in."]
+    assert segmenter.flush() == ["Bye"]
+    assert segmenter.flush() == []
+
+
+def test_clean_speech_can_be_empty_while_sanitize_keeps_fallback():
+    assert llm_module._clean_speech("*nods*") == ""
+    assert llm_module._sanitize_reply("*nods*") == "*nods*"
+    assert llm_module._clean_speech(' "Sure [beeps] thing." ') == "Sure thing."
+
+
+def test_stream_reply_yields_deltas(monkeypatch):
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(llm_module, "_load_system_prompt", lambda: "prompt")
+    captured = {}
+
+    async def fake_stream(payload):
+        captured["payload"] = payload
+        yield "Hi"
+        yield " there."
+
+    monkeypatch.setattr(llm_module, "_stream_openrouter", fake_stream)
+    tokens = asyncio.run(_collect(llm_module.stream_reply("hello", [{"role": "user", "content": "earlier"}])))
+
+    assert tokens == ["Hi", " there."]
+    assert [m["role"] for m in captured["payload"]["messages"]] == ["system", "user", "user"]
+
+
+def test_stream_reply_falls_back_when_stream_fails_before_content(monkeypatch):
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(llm_module, "_load_system_prompt", lambda: "prompt")
+
+    async def failing_stream(payload):
+        raise ValueError("boom")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(llm_module, "_stream_openrouter", failing_stream)
+    assert asyncio.run(_collect(llm_module.stream_reply("hello"))) == ["Echoing your words: hello"]
+
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", None)
+    assert asyncio.run(_collect(llm_module.stream_reply("hi"))) == ["Echoing your words: hi"]
+
+
+def test_generate_reply_raises_instead_of_echoing_when_asked(monkeypatch):
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(llm_module, "_load_system_prompt", lambda: "prompt")
+
+    async def malformed(payload):
+        return {"choices": [{"message": {}}]}
+
+    monkeypatch.setattr(llm_module, "_post_openrouter", malformed)
+    assert asyncio.run(llm_module.generate_reply("hello")) == "Echoing your words: hello"
+    with pytest.raises(llm_module.ReplyUnavailableError):
+        asyncio.run(llm_module.generate_reply("hello", echo_fallback=False))
+
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", None)
+    with pytest.raises(llm_module.ReplyUnavailableError):
+        asyncio.run(llm_module.generate_reply("hello", echo_fallback=False))
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request.get("stream"):
+            events = [{"choices": [{"delta": {"content": token}}]} for token in ("Hello", " from", " stream.")]
+            body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({"choices": [{"message": {"content": "*nods* Stand-in reply."}}]})
+            content_type = "application/json"
+        raw = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@pytest.fixture
+def stand_in_openrouter(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(llm_module, "OPENROUTER_BASE_URL", f"http://127.0.0.1:{server.server_port}/api/v1")
+    monkeypatch.setattr(llm_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(llm_module, "_load_system_prompt", lambda: "prompt")
+    monkeypatch.setattr(llm_module, "_stats", llm_module.ConnectionStats())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_pooled_client_reuses_the_prewarmed_connection(stand_in_openrouter):
+    async def scenario():
+        try:
+            await llm_module.prewarm_connection()
+            first = await llm_module.generate_reply("hi")
+            second = await llm_module.generate_reply("again")
+            streamed = await _collect(llm_module.stream_reply("stream please"))
+            return first, second, streamed
+        finally:
+            await llm_module.close_http_client()
+
+    first, second, streamed = asyncio.run(scenario())
+
+    assert first == second == "Stand-in reply."
+    assert streamed == ["Hello", " from", " stream."]
+    stats = llm_module.connection_stats()
+    assert stats["requests"] == 4
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 3
+    assert stats["http_version"] == "HTTP/1.1"
@@ -0,0 +1,72 @@
+import pathlib
+import sys
+
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import metrics
+
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not rendered")
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_latency_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    child = histogram.labels("stt")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+
+    text = "\n".join(histogram.render())
+    prefix = "speaking_stone_test_latency_seconds"
+    assert f"# TYPE {prefix} histogram" in text
+    assert _sample(text, f'{prefix}_bucket{{stage="stt",le="0.1"}}') == 1
+    assert _sample(text, f'{prefix}_bucket{{stage="stt",le="1"}}') == 3
+    assert _sample(text, f'{prefix}_bucket{{stage="stt",le="+Inf"}}') == 4
+    assert _sample(text, f'{prefix}_count{{stage="stt"}}') == 4
+    assert _sample(text, f'{prefix}_sum{{stage="stt"}}') == pytest.approx(4.05)
+
+
+def test_counter_and_gauge_exposition():
+    counter = metrics.Counter("test_events", "Test events.", ("kind",))
+    counter.labels('a"b').inc(2)
+    gauge = metrics.Gauge("test_depth", "Test depth.")
+    gauge.set_function(lambda: 7)
+    labelled = metrics.Gauge("test_queue", "Test queue.", ("stage",))
+    labelled.set_collector(lambda: {("llm",): 3})
+
+    text = "\n".join(counter.render() + gauge.render() + labelled.render())
+    assert _sample(text, 'speaking_stone_test_events_total{kind="a\\"b"}') == 2
+    assert _sample(text, "speaking_stone_test_depth") == 7
+    assert _sample(text, 'speaking_stone_test_queue{stage="llm"}') == 3
+    with pytest.raises(ValueError):
+        counter.labels()
+
+
+def test_observe_timings_feeds_stage_histograms_and_turn_counter():
+    before = metrics.TURNS.labels("text").value
+    stt = metrics.STAGE_SECONDS.labels("stt")
+    stt_count = stt.count
+
+    metrics.observe_timings({"llm_ms": 250.0, "llm_queue_wait_ms": 3.0, "total_ms": 300.0}, "text")
+
+    assert metrics.TURNS.labels("text").value == before + 1
+    assert stt.count == stt_count  # no stt stage in a text turn
+    assert "speaking_stone_stage_seconds_bucket" in metrics.render()
+
+
+def test_error_details_collapse_to_known_codes():
+    other = metrics.ERRORS.labels("other").value
+    busy = metrics.ERRORS.labels("stage_busy").value
+
+    metrics.count_error("stage_busy")
+    metrics.count_error("sample rate mismatch: expected 16000 got 8000")
+
+    assert metrics.ERRORS.labels("stage_busy").value == busy + 1
+    assert metrics.ERRORS.labels("other").value == other + 1
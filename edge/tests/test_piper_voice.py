@@ -0,0 +1,90 @@
+import pathlib
+import sys
+
+import numpy as np
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import piper_voice, tts_module
+
+VOICE_CONFIG = PROJECT_ROOT / "tests" / "data" / "tts" / "voices" / "alan" / "en_GB-alan-low.onnx.json"
+
+
+class _Input:
+    def __init__(self, name):
+        self.name = name
+
+
+class _StubSession:
+    """Stands in for an onnxruntime session: one sample of 0.5 per phoneme id."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_inputs(self):
+        return [_Input("input"), _Input("input_lengths"), _Input("scales")]
+
+    def run(self, outputs, inputs):
+        self.calls.append(inputs)
+        length = int(inputs["input_lengths"][0])
+        return [np.full((1, 1, length * 10), 0.5, dtype=np.float32)]
+
+
+def _voice(**overrides):
+    config = piper_voice.PiperConfig.from_file(str(VOICE_CONFIG))
+    if overrides:
+        config = piper_voice.PiperConfig(**{**config.__dict__, **overrides})
+    return piper_voice.PiperVoice(config, _StubSession())
+
+
+def test_config_reads_shipped_voice():
+    config = piper_voice.PiperConfig.from_file(str(VOICE_CONFIG))
+    assert config.sample_rate == 16000
+    assert config.espeak_voice == "en-gb-x-rp"
+    assert config.noise_w == 0.8
+
+
+def test_phoneme_ids_use_bos_pad_eos_framing():
+    voice = _voice()
+    id_map = voice.config.phoneme_id_map
+    ids = voice.phoneme_ids(["h", "ə"])
+    assert ids == [1, 0, *id_map["h"], 0, *id_map["ə"], 0, 2]
+
+
+def test_iter_pcm_synthesizes_each_sentence_at_target_rate():
+    voice = _voice(phoneme_type="text", sample_rate=8000)
+    pieces = list(voice.iter_pcm("hi", 16000))
+
+    assert len(pieces) == 1
+    samples = np.frombuffer(pieces[0], dtype="<i2")
+    ids = voice._session.calls[0]["input"][0]
+    assert samples.size == len(ids) * 10 * 2  # 8 kHz model output resampled to 16 kHz
+    assert samples.max() == 32767  # peak-normalized like Piper
+    scales = voice._session.calls[0]["scales"]
+    assert np.allclose(scales, [0.667, 1.0, 0.8])
+
+
+def test_iter_speech_uses_piper_backend(monkeypatch):
+    voice = _voice(phoneme_type="text")
+    monkeypatch.setattr(tts_module, "TTS_BACKEND", "piper")
+    monkeypatch.setattr(tts_module, "_get_piper_voice", lambda: voice)
+
+    audio = tts_module.synthesize_speech("ok")
+
+    assert audio and not tts_module.is_placeholder(audio)
+    assert tts_module.voice_signature()[0].startswith("piper:")
+
+
+def test_resample_filters_content_above_the_target_nyquist():
+    rate = 22050
+    times = np.arange(rate) / rate
+
+    def level(freq):
+        out = piper_voice.resample(np.sin(2 * np.pi * freq * times).astype(np.float32), rate, 16000)
+        assert out.size == 16000 and out.dtype == np.float32
+        return float(np.sqrt(np.mean(out[200:-200] ** 2) * 2))
+
+    assert abs(level(1000) - 1.0) < 0.01
+    assert level(10000) < 0.01  # would fold back to 6 kHz at nearly full level with plain interpolation
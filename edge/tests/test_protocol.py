@@ -1,6 +1,8 @@
 import pathlib
 import sys
 
+import pytest
+
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
@@ -32,3 +34,86 @@ def test_audio_frame_header_requires_minimum_bytes():
         assert "expected" in str(exc)
     else:
         raise AssertionError("Expected ValueError to be raised for short header")
+
+
+def test_compact_control_roundtrip_uses_event_id():
+    raw = protocol.encode_compact_control("tts_end", {"chunks": 3, "timings": {"total_ms": 12.5}})
+    header = protocol.AudioFrameHeader.from_bytes(raw)
+
+    assert header.flags & protocol.FLAG_CONTROL
+    assert header.sequence == protocol.EVENT_IDS["tts_end"]
+    assert header.payload_len == len(raw) - protocol.HEADER_SIZE
+    decoded = protocol.decode_compact_control(header, memoryview(raw)[protocol.HEADER_SIZE :])
+    assert decoded == {
+        "type": protocol.MSG_TYPE_CONTROL,
+        "event": "tts_end",
+        "payload": {"chunks": 3, "timings": {"total_ms": 12.5}},
+    }
+
+
+def test_compact_control_carries_unregistered_event_names():
+    raw = protocol.encode_compact_control("custom_event", {"value": 1})
+    header = protocol.AudioFrameHeader.from_bytes(raw)
+
+    assert header.sequence == protocol.EVENT_ID_NAMED
+    decoded = protocol.decode_compact_control(header, raw[protocol.HEADER_SIZE :])
+    assert decoded["event"] == "custom_event"
+    assert decoded["payload"] == {"value": 1}
+
+
+def test_control_encoding_negotiation_defaults_to_json():
+    assert protocol.negotiate_control_encoding(None) == protocol.CONTROL_ENCODING_JSON
+    assert protocol.negotiate_control_encoding("cbor") == protocol.CONTROL_ENCODING_JSON
+    assert protocol.negotiate_control_encoding("MsgPack") == protocol.CONTROL_ENCODING_MSGPACK
+    assert isinstance(protocol.encode_control("ack", {}), str)
+    assert isinstance(protocol.encode_control("ack", {}, protocol.CONTROL_ENCODING_MSGPACK), bytes)
+
+
+def test_superframe_roundtrip_yields_contiguous_pcm():
+    frames = [(7, b"\x01\x00\x02\x00"), (8, b"\x03\x00"), (9, b"\x04\x00\x05\x00\x06\x00")]
+    raw = protocol.pack_superframe(frames, sample_rate=16000, channels=1, bits_per_sample=16)
+    header = protocol.AudioFrameHeader.from_bytes(raw)
+
+    assert header.flags & protocol.FLAG_SUPERFRAME
+    assert header.payload_len == len(raw) - protocol.HEADER_SIZE
+    pcm_header, sequences, lengths, pcm = protocol.split_superframe(header, memoryview(raw)[protocol.HEADER_SIZE :])
+    assert sequences == (7, 8, 9)
+    assert lengths == (4, 2, 6)
+    assert pcm == b"".join(chunk for _, chunk in frames)
+    assert pcm_header.sequence == 7
+    assert pcm_header.payload_len == len(pcm)
+    assert pcm_header.flags == 0
+    assert pcm_header.sample_rate == 16000
+
+
+def test_superframe_rejects_inconsistent_table():
+    raw = protocol.pack_superframe([(0, b"\x00\x00\x00\x00")], sample_rate=16000, channels=1, bits_per_sample=16)
+    header = protocol.AudioFrameHeader.from_bytes(raw)
+
+    with pytest.raises(ValueError):
+        protocol.split_superframe(header, raw[protocol.HEADER_SIZE : -2])
+    with pytest.raises(ValueError):
+        protocol.split_superframe(header, b"\x00\x00")
+
+
+def test_frame_slot_parses_slim_headers_in_place():
+    slot = protocol.parse_stream_format({"sample_rate": 16000, "channels": 1, "bits_per_sample": 16})
+
+    first = slot.parse(protocol.SLIM_HEADER_STRUCT.pack(3, 640, 0) + b"\x00" * 640)
+    frozen = slot.freeze()
+    second = slot.parse(protocol.SLIM_HEADER_STRUCT.pack(4, 320, protocol.FLAG_SUPERFRAME))
+
+    assert first is second is slot
+    assert (slot.sequence, slot.payload_len, slot.flags) == (4, 320, protocol.FLAG_SUPERFRAME)
+    assert frozen == protocol.AudioFrameHeader(3, 640, 16000, 1, 16, 0)
+    with pytest.raises(ValueError):
+        slot.parse(b"\x00\x00\x00")
+
+
+def test_stream_format_requires_integer_fields():
+    with pytest.raises(ValueError):
+        protocol.parse_stream_format({"sample_rate": 16000, "channels": 1})
+    with pytest.raises(ValueError):
+        protocol.parse_stream_format({"sample_rate": 16000, "channels": True, "bits_per_sample": 16})
+    with pytest.raises(ValueError):
+        protocol.parse_stream_format({"sample_rate": 70000, "channels": 1, "bits_per_sample": 16})
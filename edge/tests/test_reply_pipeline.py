@@ -0,0 +1,132 @@
+import asyncio
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.testclient import TestClient
+
+from speaking_stone_edge import main, protocol, reply_pipeline, stage_pool
+
+
+def test_first_sentence_is_spoken_while_llm_still_streams(monkeypatch):
+    second_sentence_gate = asyncio.Event()
+    events = []
+
+    async def fake_stream_reply(text, history):
+        yield "First sentence here. "
+        # Block until sentence one has been sent, proving TTS overlaps the LLM stream.
+        await asyncio.wait_for(second_sentence_gate.wait(), timeout=5)
+        yield "*smiles* Second one follows."
+
+    def fake_tts(sentence):
+        events.append(("tts", sentence))
+        yield sentence.encode()
+
+    async def send_audio(pcm):
+        events.append(("sent", pcm.decode()))
+        second_sentence_gate.set()
+
+    monkeypatch.setattr(reply_pipeline, "stream_reply", fake_stream_reply)
+    monkeypatch.setattr(reply_pipeline, "iter_speech", fake_tts)
+    timer = main.StageTimer()
+
+    try:
+        reply = asyncio.run(reply_pipeline.stream_spoken_reply("hi", [], timer, send_audio))
+    finally:
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    assert reply == "First sentence here. Second one follows."
+    assert [e for e in events if e[0] == "sent"] == [
+        ("sent", "First sentence here."),
+        ("sent", "Second one follows."),
+    ]
+    metrics = timer.metrics()
+    assert "llm_ms" in metrics and "tts_ms" in metrics
+
+
+def test_text_only_stream_skips_tts(monkeypatch):
+    async def fake_stream_reply(text, history):
+        yield "Just text, no audio."
+
+    monkeypatch.setattr(reply_pipeline, "stream_reply", fake_stream_reply)
+
+    def fail_tts(sentence):
+        raise AssertionError("TTS should not run")
+
+    monkeypatch.setattr(reply_pipeline, "iter_speech", fail_tts)
+    try:
+        reply = asyncio.run(reply_pipeline.stream_spoken_reply("hi", [], main.StageTimer(), None))
+    finally:
+        stage_pool.shutdown_stage_pools(wait=True)
+    assert reply == "Just text, no audio."
+
+
+def test_synthesis_runs_at_most_reply_synth_ahead_sentences_ahead_of_the_socket(monkeypatch):
+    started = []
+    release = asyncio.Event()
+
+    async def fake_stream_reply(text, history):
+        for number in ("one", "two", "three", "four"):
+            yield f"This is sentence number {number}. "
+
+    def fake_tts(sentence):
+        started.append(sentence)
+        yield sentence.encode()
+
+    async def slow_send(pcm):
+        await asyncio.wait_for(release.wait(), timeout=5)
+
+    async def scenario():
+        reply = asyncio.ensure_future(reply_pipeline.stream_spoken_reply("hi", [], main.StageTimer(), slow_send))
+        await asyncio.sleep(0.2)  # the socket is stuck on sentence one
+        in_flight = list(started)
+        release.set()
+        return in_flight, await reply
+
+    monkeypatch.setattr(reply_pipeline, "stream_reply", fake_stream_reply)
+    monkeypatch.setattr(reply_pipeline, "iter_speech", fake_tts)
+    monkeypatch.setattr(reply_pipeline, "REPLY_SYNTH_AHEAD", 2)
+    try:
+        in_flight, reply = asyncio.run(scenario())
+    finally:
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    sentences = [f"This is sentence number {number}." for number in ("one", "two", "three", "four")]
+    assert in_flight == sentences[:2]
+    assert started == sentences
+    assert reply == " ".join(sentences)
+
+
+def test_streamed_turn_sends_transcript_before_audio_and_reply_in_tts_end(monkeypatch):
+    async def fake_spoken_reply(transcript, history, timer, send_audio):
+        await send_audio(b"\x01\x00" * 1600)
+        await send_audio(b"\x02\x00" * 1600)
+        return "Hi. Again."
+
+    monkeypatch.setattr(main, "OPENROUTER_STREAM", True)
+    monkeypatch.setattr(main.reply_pipeline, "stream_spoken_reply", fake_spoken_reply)
+
+    client = TestClient(main.app)  # no lifespan: startup would load Whisper
+    with client.websocket_connect("/ws/audio") as ws:
+        ws.receive_text()  # connected
+        ws.send_text(protocol.encode_control_message("text_input", {"text": "hello"}))
+        order = []
+        while not order or order[-1] != "tts_end":
+            message = ws.receive()
+            if message.get("text") is None:
+                order.append("chunk")
+                continue
+            event = protocol.decode_control_message(message["text"])
+            order.append(event["event"])
+            if event["event"] == "transcription_ready":
+                assert event["payload"]["transcript"] == "hello"
+                assert "reply" not in event["payload"]
+            if event["event"] == "tts_end":
+                assert event["payload"]["reply"] == "Hi. Again."
+                assert "total_ms" in event["payload"]["timings"]
+
+    assert order[0] == "transcription_ready" and order[-1] == "tts_end"
+    assert set(order[1:-1]) == {"chunk"}
@@ -0,0 +1,115 @@
+import asyncio
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import llm_module, speculative
+from speaking_stone_edge.history import ChatHistory
+from speaking_stone_edge.speculative import SpeculativeReply
+
+
+class _FakeLlm:
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def __call__(self, text, history):
+        self.calls.append(text)
+        await asyncio.sleep(0)
+        return f"reply to {text}"
+
+
+def test_stable_partial_starts_one_speculation_and_hits():
+    async def scenario():
+        llm = _FakeLlm()
+        speculation = SpeculativeReply(llm, stable_decodes=2)
+        hits = speculative._stats.hits
+
+        assert not speculation.observe("Turn on the", [])
+        assert not speculation.observe("Turn on the lights", [])
+        assert speculation.observe("turn on the lights.", [])  # same text once normalized
+        assert not speculation.observe("Turn on the lights", [])  # already speculating on it
+
+        reply = await speculation.take("Turn on the lights!")
+        assert reply == "reply to turn on the lights."
+        assert llm.calls == ["turn on the lights."]
+        assert speculative._stats.hits == hits + 1
+        assert speculation.task is None
+
+    asyncio.run(scenario())
+
+
+def test_mismatched_final_transcript_discards_and_counts_waste():
+    async def scenario():
+        llm = _FakeLlm()
+        speculation = SpeculativeReply(llm, stable_decodes=1)
+        misses = speculative._stats.misses
+        wasted = speculative._stats.wasted_completion_tokens
+
+        speculation.observe("turn on the lights", [{"role": "user", "content": "hello"}])
+        await asyncio.sleep(0.01)  # let the speculative reply finish
+        assert await speculation.take("turn on the lights in the kitchen") is None
+
+        assert speculative._stats.misses == misses + 1
+        assert speculative._stats.wasted_completion_tokens > wasted
+        assert speculative.speculation_stats()["hit_rate"] is not None
+
+    asyncio.run(scenario())
+
+
+def test_newer_stable_hypothesis_supersedes_and_cancel_drops():
+    async def scenario():
+        speculation = SpeculativeReply(_FakeLlm(), stable_decodes=1)
+        superseded = speculative._stats.superseded
+        cancelled = speculative._stats.cancelled
+
+        speculation.observe("what time", [])
+        first = speculation.task
+        speculation.observe("what time is it", [])
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert speculative._stats.superseded == superseded + 1
+
+        speculation.cancel()
+        assert speculation.task is None
+        assert speculative._stats.cancelled == cancelled + 1
+        assert await speculation.take("what time is it") is None
+
+    asyncio.run(scenario())
+
+
+def test_history_change_mid_speculation_supersedes_it():
+    async def scenario():
+        llm = _FakeLlm()
+        speculation = SpeculativeReply(llm, stable_decodes=1)
+        history = ChatHistory()
+        superseded, hits = speculative._stats.superseded, speculative._stats.hits
+
+        speculation.observe("what time is it", history.messages(), history.revision)
+        history.append("assistant", "It is noon.")  # e.g. the previous turn's reply lands
+        await asyncio.sleep(0.01)
+        assert await speculation.take("what time is it", history.revision) is None
+
+        assert speculative._stats.superseded == superseded + 1
+        assert speculative._stats.hits == hits
+        assert speculation.task is None
+
+    asyncio.run(scenario())
+
+
+def test_failed_speculation_is_not_a_hit():
+    async def failing(text, history):
+        raise llm_module.ReplyUnavailableError("OpenRouter request failed")
+
+    async def scenario():
+        speculation = SpeculativeReply(failing, stable_decodes=1)
+        hits, failed = speculative._stats.hits, speculative._stats.failed
+
+        speculation.observe("what time is it", [])
+        assert await speculation.take("what time is it") is None  # the turn asks again for real
+        assert speculative._stats.hits == hits
+        assert speculative._stats.failed == failed + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,134 @@
+import asyncio
+import pathlib
+import sys
+import threading
+
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import main, stage_pool
+
+
+def _pool(**overrides):
+    base = dict(name="stt", workers=1, kind="thread", max_queue=0, queue_timeout=0.05)
+    base.update(overrides)
+    return stage_pool.StagePool(stage_pool.StagePoolConfig(**base))
+
+
+def test_stage_pool_runs_off_loop_and_records_queue_metrics():
+    pool = _pool()
+    timer = main.StageTimer()
+    loop_thread = threading.get_ident()
+
+    async def scenario():
+        return await pool.run(lambda x: (threading.get_ident(), x * 2), 21, timer=timer)
+
+    try:
+        worker_thread, value = asyncio.run(scenario())
+    finally:
+        pool.shutdown(wait=True)
+
+    assert value == 42
+    assert worker_thread != loop_thread
+    metrics = timer.metrics()
+    assert "stt_queue_wait_ms" in metrics
+    assert metrics["stt_queue_depth"] == 0
+    assert pool.stats()["completed"] == 1
+
+
+def test_stage_pool_rejects_when_queue_stays_full():
+    pool = _pool()
+    release = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        assert pool.stats()["pending"] == 1
+        with pytest.raises(stage_pool.StageBusyError) as excinfo:
+            await pool.run(lambda: None)
+        release.set()
+        await blocker
+        return excinfo.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+    assert error.stage == "stt"
+    assert pool.stats()["rejected"] == 1
+
+
+def test_cancelled_calls_drop_when_queued_and_keep_their_slot_while_running():
+    pool = _pool(max_queue=1)
+    release = threading.Event()
+    ran = []
+    finished = []
+
+    async def scenario():
+        running = asyncio.create_task(pool.run(release.wait, finished=lambda: finished.append("running")))
+        queued = asyncio.create_task(pool.run(ran.append, "queued", finished=lambda: finished.append("queued")))
+        await asyncio.sleep(0.02)
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        assert finished == ["queued"]  # never reached a worker
+        assert pool._slots._value == 1  # the running call still holds its slot
+        assert pool.stats()["pending"] == 1
+        assert pool.idle_workers() == 0  # ...and its worker
+
+
+        release.set()
+        for _ in range(100):
+            if finished == ["queued", "running"]:
+                break
+            await asyncio.sleep(0.01)
+        assert pool._slots._value == 2
+        assert pool.stats()["pending"] == 0
+        assert pool.idle_workers() == 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+    assert ran == []
+    assert finished == ["queued", "running"]
+
+
+def test_stage_pool_config_reads_env(monkeypatch):
+    monkeypatch.setenv("TTS_POOL_WORKERS", "3")
+    monkeypatch.setenv("TTS_POOL_QUEUE_SIZE", "5")
+    monkeypatch.setenv("TTS_POOL_KIND", "process")
+    config = stage_pool.StagePoolConfig.from_env("tts")
+    assert (config.workers, config.max_queue, config.kind) == (3, 5, "process")
+
+    monkeypatch.setenv("TTS_POOL_KIND", "fiber")
+    with pytest.raises(ValueError):
+        stage_pool.StagePoolConfig.from_env("tts")
+
+
+def test_stage_pool_slot_bounds_concurrency_for_async_work():
+    pool = _pool(name="llm", workers=2, max_queue=4, queue_timeout=1.0)
+    timer = main.StageTimer()
+    state = {"running": 0, "peak": 0}
+
+    async def job():
+        async with pool.slot(timer=timer):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(job() for _ in range(5)))
+
+    asyncio.run(scenario())
+    assert state["peak"] == 2
+    assert pool.stats()["completed"] == 5
+    assert "llm_queue_wait_ms" in timer.metrics()
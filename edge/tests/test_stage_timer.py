@@ -27,3 +27,16 @@ def test_stage_timer_without_marks_reports_zero(monkeypatch):
     timer = main.StageTimer()
     metrics = timer.metrics()
     assert metrics["total_ms"] == 0.0
+
+
+def test_stage_timer_records_extras_outside_total(monkeypatch):
+    times = iter([0.0, 0.1])
+    monkeypatch.setattr(main.time, "perf_counter", lambda: next(times))
+
+    timer = main.StageTimer()
+    timer.record("stt_queue_wait_ms", 12.345)
+    timer.mark("stt")
+
+    metrics = timer.metrics()
+    assert metrics["stt_queue_wait_ms"] == 12.35
+    assert metrics["total_ms"] == 100.0
@@ -0,0 +1,88 @@
+import asyncio
+import pathlib
+import struct
+import sys
+import types
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import main, protocol, streaming_stt, stt_module
+
+BYTES_PER_SECOND = 32000
+
+
+def _transcript():
+    return streaming_stt.StreamingTranscript(step_ms=1000, stability_ms=1000, max_window_ms=15000)
+
+
+def test_segments_commit_after_two_agreeing_decodes():
+    transcript = _transcript()
+    first = [(0.0, 1.0, "Hello there."), (1.0, 2.6, "How are")]
+    assert transcript.apply(first, 0, 3 * BYTES_PER_SECOND) == []
+    assert transcript.committed_bytes == 0
+    assert transcript.partial_payload()["tentative"] == "Hello there. How are"
+
+    second = [(0.0, 1.0, "hello there"), (1.0, 3.4, "How are you?")]
+    assert transcript.apply(second, 0, 4 * BYTES_PER_SECOND) == ["hello there"]
+    assert transcript.committed_bytes == BYTES_PER_SECOND
+    assert transcript.partial_payload() == {
+        "text": "hello there How are you?",
+        "committed": "hello there",
+        "tentative": "How are you?",
+    }
+    assert transcript.final_text([(0.0, 2.0, "How are you doing?")]) == "hello there How are you doing?"
+
+
+def test_segments_near_tail_edge_stay_tentative():
+    transcript = _transcript()
+    segments = [(0.0, 1.5, "Turn on the lights")]
+    transcript.apply(segments, 0, 2 * BYTES_PER_SECOND)
+    assert transcript.apply(segments, 0, 2 * BYTES_PER_SECOND) == []
+    assert transcript.committed == []
+
+
+def test_stale_window_is_ignored_and_step_gates_decodes():
+    transcript = _transcript()
+    assert transcript.should_decode(BYTES_PER_SECOND - 2) is False
+    assert transcript.should_decode(BYTES_PER_SECOND) is True
+
+    transcript.committed_bytes = 4000
+    assert transcript.apply([(0.0, 0.5, "late")], 0, 2 * BYTES_PER_SECOND) == []
+    assert transcript.should_decode(2 * BYTES_PER_SECOND + 100) is False
+
+
+def test_transcribe_segments_returns_timed_tuples(monkeypatch):
+    header = protocol.AudioFrameHeader(sequence=0, payload_len=4, sample_rate=16000, channels=1, bits_per_sample=16)
+    captured = {}
+
+    class DummySegment:
+        def __init__(self, start, end, text):
+            self.start, self.end, self.text = start, end, text
+
+    class DummyModel:
+        def transcribe(self, audio, language, vad_filter, initial_prompt):
+            captured["initial_prompt"] = initial_prompt
+            return [DummySegment(0.0, 0.4, " hi "), DummySegment(0.4, 0.5, " ")], None
+
+    monkeypatch.setattr(stt_module, "_get_model", lambda: DummyModel())
+    segments = stt_module.transcribe_segments(struct.pack("<hh", 0, 0), header, prompt="earlier words")
+
+    assert segments == [(0.0, 0.4, "hi")]
+    assert captured["initial_prompt"] == "earlier words"
+
+
+def test_failed_partial_decode_skips_the_window_without_raising(monkeypatch):
+    async def broken_stt(func, *args, timer=None):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(main.stt_workers, "run_stt", broken_stt)
+    transcript = _transcript()
+    header = protocol.AudioFrameHeader(sequence=0, payload_len=0, sample_rate=16000, channels=1, bits_per_sample=16)
+    websocket = types.SimpleNamespace(client="stone")
+
+    asyncio.run(main._decode_partial(websocket, transcript, memoryview(bytes(BYTES_PER_SECOND)), header, None))
+
+    assert transcript.decoded_bytes == BYTES_PER_SECOND
+    assert transcript.committed_bytes == 0
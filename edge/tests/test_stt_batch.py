@@ -0,0 +1,134 @@
+import asyncio
+import pathlib
+import sys
+import threading
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import main, protocol, stage_pool, stt_batch
+
+HEADER = protocol.AudioFrameHeader(sequence=0, payload_len=2, sample_rate=16000, channels=1, bits_per_sample=16)
+
+
+async def _occupy_stt_workers(count: int, release: threading.Event) -> list:
+    pool = stage_pool.get_stage_pool("stt")
+    tasks = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(count)]
+    await asyncio.sleep(0)  # let them take their workers
+    return tasks
+
+
+def test_scheduler_batches_utterances_that_wait_for_busy_workers_and_demultiplexes():
+    calls = []
+    release = threading.Event()
+
+    def fake_batch(items):
+        calls.append(len(items))
+        return [pcm.decode() if pcm != b"bad" else ValueError("bad audio") for pcm, _ in items]
+
+    scheduler = stt_batch.SttBatchScheduler(window_ms=50, max_batch=8, batch_func=fake_batch)
+    timers = [main.StageTimer() for _ in range(3)]
+
+    async def scenario():
+        workers = stage_pool.get_stage_pool("stt").config.workers
+        busy = await _occupy_stt_workers(workers, release)
+        asyncio.get_running_loop().call_later(0.2, release.set)  # after the window has closed
+        try:
+            return await asyncio.gather(
+                scheduler.transcribe(b"one", HEADER, timers[0]),
+                scheduler.transcribe(b"bad", HEADER, timers[1]),
+                scheduler.transcribe(b"two", HEADER, timers[2]),
+                return_exceptions=True,
+            )
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        release.set()
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    assert calls == [3]
+    assert results[0] == "one" and results[2] == "two"
+    assert isinstance(results[1], ValueError)
+    assert timers[2].metrics()["stt_batch_size"] == 3
+    assert "stt_queue_wait_ms" in timers[0].metrics()
+
+
+def test_scheduler_dispatches_full_batch_without_waiting_for_window():
+    release = threading.Event()
+
+    def fake_batch(items):
+        return [pcm.decode() for pcm, _ in items]
+
+    scheduler = stt_batch.SttBatchScheduler(window_ms=10_000, max_batch=2, batch_func=fake_batch)
+
+    async def scenario():
+        workers = stage_pool.get_stage_pool("stt").config.workers
+        busy = await _occupy_stt_workers(workers, release)
+        asyncio.get_running_loop().call_later(0.1, release.set)
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(scheduler.transcribe(b"a", HEADER), scheduler.transcribe(b"b", HEADER)),
+                timeout=2,
+            )
+        finally:
+            await asyncio.gather(*busy)
+
+    try:
+        assert asyncio.run(scenario()) == ["a", "b"]
+    finally:
+        release.set()
+        stage_pool.shutdown_stage_pools(wait=True)
+    assert scheduler.batches == 1
+
+
+def test_scheduler_dispatches_lone_utterance_to_an_idle_worker_at_once():
+    scheduler = stt_batch.SttBatchScheduler(window_ms=10_000, max_batch=8, batch_func=lambda items: ["solo"])
+
+    async def scenario():
+        return await asyncio.wait_for(scheduler.transcribe(b"a", HEADER), timeout=2)
+
+    try:
+        assert asyncio.run(scenario()) == "solo"
+    finally:
+        stage_pool.shutdown_stage_pools(wait=True)
+
+
+def test_scheduler_sends_utterances_queued_behind_a_batch_when_its_worker_frees():
+    calls = []
+    gate = threading.Event()
+    hold = threading.Event()
+
+    def fake_batch(items):
+        calls.append([pcm.decode() for pcm, _ in items])
+        if len(calls) == 1:
+            gate.wait(5)
+        return [pcm.decode() for pcm, _ in items]
+
+    scheduler = stt_batch.SttBatchScheduler(window_ms=10_000, max_batch=8, batch_func=fake_batch)
+
+    async def scenario():
+        workers = stage_pool.get_stage_pool("stt").config.workers
+        busy = await _occupy_stt_workers(workers - 1, hold)
+        try:
+            first = asyncio.ensure_future(scheduler.transcribe(b"a", HEADER))
+            await asyncio.sleep(0.05)  # "a" now owns the last worker
+            queued = asyncio.gather(scheduler.transcribe(b"b", HEADER), scheduler.transcribe(b"c", HEADER))
+            await asyncio.sleep(0.05)
+            gate.set()
+            return await asyncio.wait_for(asyncio.gather(first, queued), timeout=2)
+        finally:
+            hold.set()
+            await asyncio.gather(*busy)
+
+    try:
+        assert asyncio.run(scenario()) == ["a", ["b", "c"]]
+    finally:
+        gate.set()
+        hold.set()
+        stage_pool.shutdown_stage_pools(wait=True)
+    assert calls == [["a"], ["b", "c"]]
@@ -1,14 +1,19 @@
 import pathlib
 import struct
 import sys
+import types
+import wave
 
+import numpy as np
 import pytest
 
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from speaking_stone_edge import protocol, stt_module
+from speaking_stone_edge import piper_voice, protocol, stt_module
+
+SPEECH_WAV = PROJECT_ROOT / "tests" / "data" / "audio" / "test_speech.wav"
 
 
 def test_pcm16_conversion_validates_header():
@@ -70,3 +75,146 @@ def test_transcribe_audio_rejects_wrong_sample_rate():
 
     with pytest.raises(ValueError):
         stt_module.transcribe_audio(pcm, header)
+
+
+def test_transcribe_batch_demultiplexes_and_isolates_errors(monkeypatch):
+    good = protocol.AudioFrameHeader(sequence=0, payload_len=4, sample_rate=16000, channels=1, bits_per_sample=16)
+    wrong_rate = protocol.AudioFrameHeader(sequence=0, payload_len=4, sample_rate=8000, channels=1, bits_per_sample=16)
+    batched = {}
+
+    def fake_batched(model, audios):
+        batched["sizes"] = [audio.size for audio in audios]
+        return [f"utterance {audio.size}" for audio in audios]
+
+    monkeypatch.setattr(stt_module, "_get_model", lambda: object())
+    monkeypatch.setattr(stt_module, "_batched_texts", fake_batched)
+    items = [
+        (b"\x00\x00" * 3, good),
+        (b"\x00\x00" * 2, wrong_rate),
+        (b"", good),
+        (b"\x00\x00" * 5, good),
+    ]
+
+    results = stt_module.transcribe_batch(items)
+
+    assert batched["sizes"] == [3, 5]
+    assert results[0] == "utterance 3"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == ""
+    assert results[3] == "utterance 5"
+
+
+class _CharTokenizer:
+    """Stand-in for the HF tokenizer: one token per character, special tokens above them."""
+
+    specials = ["<|endoftext|>", "<|startoftranscript|>", "<|transcribe|>", "<|translate|>", "<|startoflm|>",
+                "<|startofprev|>", "<|nospeech|>", "<|notimestamps|>"]
+
+    def token_to_id(self, token):
+        return 60000 + self.specials.index(token) if token in self.specials else None
+
+    def encode(self, text, add_special_tokens=False):
+        return types.SimpleNamespace(ids=[ord(char) for char in text])
+
+    def decode(self, ids):
+        return "".join(chr(token) for token in ids)
+
+
+class _FakeWhisper:
+    """Real feature extractor and tokenizer wrapper over a scripted CTranslate2 model."""
+
+    def __init__(self, outputs):
+        from faster_whisper.feature_extractor import FeatureExtractor
+
+        self.feature_extractor = FeatureExtractor()
+        self.hf_tokenizer = _CharTokenizer()
+        self.model = self
+        self.is_multilingual = False
+        self.outputs = outputs
+        self.calls = {}
+
+    def encode(self, features, to_cpu=False):
+        self.calls["encode_shape"] = tuple(features.shape)
+        return features
+
+    def generate(self, encoded, prompts, **options):
+        self.calls["prompts"] = prompts
+        self.calls["options"] = options
+        eot = self.hf_tokenizer.token_to_id("<|endoftext|>")
+        return [
+            types.SimpleNamespace(
+                sequences_ids=[[ord(char) for char in text] + [eot]], scores=[score], no_speech_prob=no_speech
+            )
+            for text, score, no_speech in self.outputs
+        ]
+
+
+def test_batched_texts_applies_vad_and_faster_whisper_thresholds(monkeypatch):
+    model = _FakeWhisper(
+        [
+            ("Hello there.", -0.2, 0.01),
+            ("um", -2.0, 0.9),  # silence: no-speech and unlikely
+            ("la " * 40, -0.1, 0.01),  # repetitive: compression ratio above 2.4
+            ("maybe", -1.5, 0.1),  # unlikely: log-prob below -1
+        ]
+    )
+    header = protocol.AudioFrameHeader(sequence=0, payload_len=0, sample_rate=16000, channels=1, bits_per_sample=16)
+    tone = (np.sin(np.arange(8000) * 0.05) * 8000).astype("<i2").tobytes()
+    items = [(tone, header)] * 4 + [(b"\x00\x00" * 8000, header)]
+    redone = []
+    monkeypatch.setattr(stt_module, "_get_model", lambda: model)
+    monkeypatch.setattr(stt_module, "_vad_filter", lambda audio: audio if audio.any() else audio[:0])
+    monkeypatch.setattr(stt_module, "transcribe_audio", lambda pcm, hdr: redone.append(len(pcm)) or "redone")
+
+    results = stt_module.transcribe_batch(items)
+
+    assert results == ["Hello there.", "", "redone", "redone", ""]
+    assert redone == [16000, 16000]
+    assert model.calls["encode_shape"] == (4, 80, 3000)  # the silent item never reached the model
+    assert model.calls["prompts"][0] == [60001, 60007]
+    suppressed = model.calls["options"]["suppress_tokens"]
+    assert ord("♪") in suppressed and 60002 in suppressed  # non-speech symbols and task tokens, not [-1]
+
+
+def test_vad_filter_drops_silence():
+    assert stt_module._vad_filter(np.zeros(16000, dtype=np.float32)).size == 0
+
+
+def _speech_16k() -> np.ndarray:
+    with wave.open(str(SPEECH_WAV), "rb") as handle:
+        rate = handle.getframerate()
+        samples = np.frombuffer(handle.readframes(handle.getnframes()), dtype="<i2")
+    return piper_voice.resample(samples.astype(np.float32) / 32768.0, rate, 16000)
+
+
+def test_vad_filter_keeps_speech():
+    audio = np.concatenate([np.zeros(16000, dtype=np.float32), _speech_16k()])
+
+    kept = stt_module._vad_filter(audio)
+
+    assert kept.dtype == np.float32
+    assert 0 < kept.size < audio.size  # the leading second of silence is gone
+
+
+def test_vad_filter_accepts_faster_whisper_1_0_collect_chunks(monkeypatch):
+    import faster_whisper.vad
+
+    # 1.0 returned the joined speech audio instead of (chunks, metadata).
+    monkeypatch.setattr(
+        faster_whisper.vad,
+        "collect_chunks",
+        lambda audio, chunks: np.concatenate([audio[chunk["start"] : chunk["end"]] for chunk in chunks]),
+    )
+    audio = _speech_16k()
+
+    assert stt_module._vad_filter(audio).size > 0
+
+
+def test_pcm16_conversion_reuses_thread_scratch_buffer():
+    header = protocol.AudioFrameHeader(sequence=0, payload_len=4, sample_rate=16000, channels=1, bits_per_sample=16)
+    first = stt_module._pcm16_mono_to_float32(struct.pack("<hh", 16384, 0), header, reuse_scratch=True)
+    assert first.tolist() == [0.5, 0.0]
+    second = stt_module._pcm16_mono_to_float32(memoryview(struct.pack("<h", -16384)), header, reuse_scratch=True)
+
+    assert second.tolist() == [-0.5]
+    assert second.base is first.base  # same backing scratch, no new allocation
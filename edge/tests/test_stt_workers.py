@@ -0,0 +1,54 @@
+import asyncio
+import pathlib
+import struct
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import protocol, stage_pool, stt_module, stt_workers
+
+HEADER = protocol.AudioFrameHeader(sequence=0, payload_len=0, sample_rate=16000, channels=1, bits_per_sample=16)
+
+
+def test_ring_hands_out_slots_and_writes_in_place():
+    async def scenario():
+        ring = stt_workers.SharedPcmRing(slots=2, slot_bytes=8)
+        try:
+            first, second = await ring.acquire(), await ring.acquire()
+            offset = ring.write(second, b"\x01\x02\x03\x04")
+            assert offset == 8
+            assert bytes(ring._shm.buf[8:12]) == b"\x01\x02\x03\x04"
+            assert ring.fits(8) and not ring.fits(10)
+            ring.release(first)
+            assert await ring.acquire() == first
+        finally:
+            ring.close()
+
+    asyncio.run(scenario())
+
+
+def test_process_worker_reads_pcm_from_shared_memory(monkeypatch):
+    monkeypatch.setattr(stt_workers, "STT_SHARED_MEMORY", True)
+    monkeypatch.setattr(stt_workers, "STT_SHM_SLOT_BYTES", 64)
+    pool = stage_pool.StagePool(stage_pool.StagePoolConfig(name="stt", workers=1, kind="process", max_queue=1))
+    monkeypatch.setitem(stage_pool._POOLS, "stt", pool)
+    pcm = struct.pack("<4h", 0, 16384, -16384, 32767)
+
+    async def scenario():
+        # Runs in a spawned worker; the PCM travels through the ring, not the pickle.
+        shared = await stt_workers.run_stt(stt_module._pcm16_mono_to_float32, pcm, HEADER)
+        assert stt_workers._ring is not None and stt_workers._ring._free.qsize() == stt_workers._ring.slots
+        # Too large for a slot: falls back to the pickled path.
+        pickled = await stt_workers.run_stt(stt_module._pcm16_mono_to_float32, pcm * 20, HEADER)
+        return shared, pickled
+
+    try:
+        shared, pickled = asyncio.run(scenario())
+    finally:
+        pool.shutdown(wait=True)
+        stt_workers.close_ring()
+
+    assert shared.tolist() == [0.0, 0.5, -0.5, 32767 / 32768.0]
+    assert len(pickled) == 80
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import pathlib
+import sys
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import stage_pool, tracing
+
+
+def test_spans_nest_under_the_current_turn():
+    with tracing.turn("text") as trace:
+        with tracing.span("llm") as outer:
+            with tracing.span("llm.request", model="m") as inner:
+                pass
+            tracing.record_span("llm.first_token", time.perf_counter() - 0.01)
+        with tracing.span("tts"):
+            pass
+
+    names = [span.name for span in trace.spans]
+    assert names == ["llm", "llm.request", "llm.first_token", "tts"]
+    assert inner.parent_id == outer.span_id
+    assert trace.spans[2].parent_id == outer.span_id
+    assert trace.spans[3].parent_id == trace.root.span_id
+    summary = trace.summary()
+    assert summary["turn_id"] == trace.turn_id
+    assert summary["spans_ms"]["llm.first_token"] >= 10.0
+    assert tracing.current_turn() is None
+
+
+def test_span_outside_a_turn_is_a_no_op():
+    with tracing.span("stt.decode") as span:
+        assert span is None
+    assert tracing.record_span("llm.first_token", time.perf_counter()) is None
+
+
+def test_thread_stage_workers_inherit_the_turn():
+    pool = stage_pool.StagePool(stage_pool.StagePoolConfig.from_env("tracetest"))
+
+    def work() -> str:
+        with tracing.span("stt.decode"):
+            return tracing.turn_id()
+
+    async def run() -> tuple:
+        with tracing.turn("audio") as trace:
+            with tracing.span("stt"):
+                seen = await pool.run(work)
+        return trace, seen
+
+    try:
+        trace, seen = asyncio.run(run())
+    finally:
+        pool.shutdown(wait=True)
+    assert seen == trace.turn_id
+    stt, decode = trace.spans
+    assert decode.parent_id == stt.span_id
+
+
+def test_finished_turns_are_exported_as_json_lines(monkeypatch, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(path))
+    try:
+        with tracing.turn("text", client="test") as trace:
+            with tracing.span("llm"):
+                pass
+    finally:
+        tracing.close_exporter()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["turn_id"] == trace.turn_id
+    assert records[0]["attrs"] == {"client": "test"}
+    assert [span["name"] for span in records[0]["spans"]] == ["llm"]
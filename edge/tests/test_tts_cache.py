@@ -0,0 +1,121 @@
+import asyncio
+import os
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import main, stage_pool, tts_cache, tts_module
+
+VOICE = ("voice", "model", "pcm_16000")
+
+
+def test_cache_key_normalizes_whitespace_but_not_voice():
+    assert tts_cache.cache_key("Hello  there.\n", VOICE) == tts_cache.cache_key(" Hello there.", VOICE)
+    assert tts_cache.cache_key("Hello there.", VOICE) != tts_cache.cache_key("Hello there.", ("other", "model", "pcm_16000"))
+    assert tts_cache.cache_key("Hello there.", VOICE) != tts_cache.cache_key("Hello there!", VOICE)
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    tier = tts_cache.MemoryTier(max_bytes=10)
+    tier.put("a", b"aaaa")
+    tier.put("b", b"bbbb")
+    assert tier.get("a") == b"aaaa"  # refresh a
+    tier.put("c", b"cccc")
+
+    assert tier.get("b") is None
+    assert tier.get("a") == b"aaaa"
+    assert tier.bytes_used == 8
+
+
+def test_disk_tier_survives_restart_and_evicts_by_size(tmp_path):
+    tier = tts_cache.DiskTier(str(tmp_path), max_bytes=10)
+    tier.put("a", b"aaaa")
+    tier.put("b", b"bbbb")
+    assert tier.get("a") == b"aaaa"
+
+    reopened = tts_cache.DiskTier(str(tmp_path), max_bytes=10)
+    view = reopened.get("b")
+    assert isinstance(view, memoryview) and view.readonly and view == b"bbbb"
+    reopened.put("c", b"cccc")
+
+    assert reopened.get("a") is None
+    assert sorted(os.listdir(tmp_path)) == ["b.pcm", "c.pcm"]
+
+
+def test_iter_cached_speech_hits_after_first_synthesis(tmp_path):
+    calls = []
+
+    def fake_tts(text):
+        calls.append(text)
+        yield b"\x01\x00" * 10
+        yield b"\x02\x00" * 10
+
+    cache = tts_cache.TtsCache(memory_bytes=1024, directory=str(tmp_path), disk_bytes=1024)
+    tts_cache.reset_tts_cache(cache)
+    first, second = main.StageTimer(), main.StageTimer()
+
+    async def speak(timer):
+        return b"".join([pcm async for pcm in tts_cache.iter_cached_speech("Hi there.", fake_tts, timer=timer)])
+
+    async def scenario():
+        audio = await speak(first)
+        again = await speak(second)
+        await asyncio.gather(*cache.pending_writes)  # let the background disk write land
+        return audio, again
+
+    try:
+        audio, again = asyncio.run(scenario())
+    finally:
+        tts_cache.reset_tts_cache()
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    assert calls == ["Hi there."]
+    assert audio == again == b"\x01\x00" * 10 + b"\x02\x00" * 10
+    assert first.metrics()["tts_cache_misses"] == 1
+    assert second.metrics()["tts_cache_hits"] == 1
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_placeholder_audio_is_not_cached():
+    def failing_tts(text):
+        yield tts_module._placeholder_response(text)
+
+    cache = tts_cache.TtsCache(memory_bytes=1 << 20, directory=None)
+    tts_cache.reset_tts_cache(cache)
+
+    async def scenario():
+        async for _ in tts_cache.iter_cached_speech("Hello.", failing_tts):
+            pass
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        tts_cache.reset_tts_cache()
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    assert len(cache.memory) == 0
+    assert cache.misses == 1
+
+
+def test_audio_cut_short_by_a_provider_failure_is_not_cached():
+    def broken_tts(text):
+        yield b"\x01\x00" * 10
+        raise tts_module.IncompleteSpeechError("stream failed after 20 bytes")
+
+    cache = tts_cache.TtsCache(memory_bytes=1 << 20, directory=None)
+    tts_cache.reset_tts_cache(cache)
+
+    async def scenario():
+        return [pcm async for pcm in tts_cache.iter_cached_speech("Hello.", broken_tts)]
+
+    try:
+        pieces = asyncio.run(scenario())
+    finally:
+        tts_cache.reset_tts_cache()
+        stage_pool.shutdown_stage_pools(wait=True)
+
+    assert pieces == [b"\x01\x00" * 10]
+    assert len(cache.memory) == 0
@@ -1,6 +1,8 @@
 import pathlib
 import sys
 
+import pytest
+
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
@@ -9,6 +11,24 @@ from speaking_stone_edge import tts_module
 
 
 def test_synthesize_speech_falls_back_without_voice(monkeypatch):
+    monkeypatch.setattr(tts_module, "TTS_BACKEND", "piper")
     monkeypatch.setattr(tts_module, "_synthesize_with_piper", lambda text: None)
     data = tts_module.synthesize_speech("testing fallback")
-    assert data.startswith(b"[tts-placeholder")
+    assert tts_module.is_placeholder(data)
+    assert data == b"\x00\x00" * (tts_module.TARGET_SAMPLE_RATE // 2)  # 0.5 s of PCM16 silence
+
+
+def test_iter_speech_raises_after_audio_when_the_stream_fails(monkeypatch):
+    def stream(text):
+        yield b"\x01\x00" * 10
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(tts_module, "TTS_BACKEND", "piper")
+    monkeypatch.setattr(tts_module, "_synthesize_with_piper", stream)
+
+    pieces = []
+    with pytest.raises(tts_module.IncompleteSpeechError):
+        for piece in tts_module.iter_speech("hello there"):
+            pieces.append(piece)
+    assert pieces == [b"\x01\x00" * 10]
+    assert tts_module.synthesize_speech("hello there") == b"\x01\x00" * 10
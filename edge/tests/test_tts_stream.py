@@ -0,0 +1,53 @@
+import asyncio
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import main, protocol, tts_stream
+
+
+def _run_sender(pieces, chunk_bytes):
+    sent = []
+
+    async def send_bytes(raw):
+        sent.append(raw)
+
+    timer = main.StageTimer()
+    sender = tts_stream.TtsChunkSender(send_bytes, chunk_bytes=chunk_bytes, timer=timer)
+
+    async def scenario():
+        for piece in pieces:
+            await sender.send(piece)
+        await sender.finish()
+        await sender.finish()  # idempotent
+
+    asyncio.run(scenario())
+    return sender, timer, [tts_stream.split_tts_chunk(raw) for raw in sent]
+
+
+def test_chunks_are_framed_sequenced_and_flag_the_last_one():
+    sender, timer, frames = _run_sender([b"\x01" * 5, b"\x02" * 7], chunk_bytes=4)
+
+    assert [header.sequence for header, _ in frames] == [0, 1, 2, 3]
+    assert [len(payload) for _, payload in frames] == [4, 4, 4, 0]
+    assert [header.flags & protocol.FLAG_LAST_CHUNK for header, _ in frames] == [0, 0, 0, protocol.FLAG_LAST_CHUNK]
+    assert b"".join(payload for _, payload in frames) == b"\x01" * 5 + b"\x02" * 7
+    assert frames[0][0].sample_rate == 16000 and frames[0][0].bits_per_sample == 16
+    assert sender.summary() == {"chunks": 4, "bytes": 12, "duration_ms": 0.38}
+    assert "first_audio_ms" in timer.metrics()
+
+
+def test_remainder_goes_out_with_the_last_flag():
+    _, _, frames = _run_sender([b"\x00" * 10], chunk_bytes=8)
+    assert [(len(payload), header.flags) for header, payload in frames] == [(8, 0), (2, protocol.FLAG_LAST_CHUNK)]
+
+
+def test_chunk_size_is_sample_aligned_and_bounded():
+    async def noop(raw):
+        return None
+
+    assert tts_stream.TtsChunkSender(noop, chunk_bytes=5).chunk_bytes == 4
+    assert tts_stream.TtsChunkSender(noop, chunk_bytes=1_000_000).chunk_bytes == tts_stream.MAX_CHUNK_BYTES
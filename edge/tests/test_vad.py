@@ -0,0 +1,84 @@
+import pathlib
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import protocol, vad
+
+SAMPLE_RATE = 16000
+
+
+def _tone(ms, amplitude=8000, freq=220.0):
+    t = np.arange(SAMPLE_RATE * ms // 1000) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def _silence(ms, amplitude=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(-amplitude, amplitude, SAMPLE_RATE * ms // 1000, dtype=np.int16).astype("<i2").tobytes()
+
+
+def _frames(pcm, frame_ms=80):
+    size = SAMPLE_RATE * frame_ms // 1000 * 2
+    return [pcm[i : i + size] for i in range(0, len(pcm), size)]
+
+
+def test_energy_vad_separates_tone_from_noise():
+    classifier = vad.EnergyVad(SAMPLE_RATE)
+    tone = np.frombuffer(_tone(100), dtype="<i2").reshape(-1, classifier.frame_samples)
+    hiss = np.frombuffer(_silence(100), dtype="<i2").reshape(-1, classifier.frame_samples)
+
+    assert not classifier.classify(hiss).any()
+    assert classifier.classify(tone).all()
+
+
+def test_endpointer_fires_after_hangover_only_once_speech_seen():
+    endpointer = vad.VoiceEndpointer(vad.EnergyVad(SAMPLE_RATE), SAMPLE_RATE, hangover_ms=400, min_speech_ms=200)
+
+    assert not any(endpointer.feed(frame) for frame in _frames(_silence(1000)))
+    assert not endpointer.speech_seen
+
+    assert not any(endpointer.feed(frame) for frame in _frames(_tone(480)))
+    assert endpointer.speech_seen
+
+    fired = [endpointer.feed(frame) for frame in _frames(_silence(560, seed=1))]
+    assert fired[-1] is True
+    assert fired.index(True) == 4  # 5 x 80 ms frames >= 400 ms hangover
+
+    endpointer.reset()
+    assert endpointer.speech_ms == 0.0
+    assert endpointer.feed(_silence(80)) is False
+
+
+def test_short_speech_is_pending_until_it_dies_out():
+    endpointer = vad.VoiceEndpointer(vad.EnergyVad(SAMPLE_RATE), SAMPLE_RATE, hangover_ms=400, min_speech_ms=200)
+    for frame in _frames(_silence(1000)):
+        endpointer.feed(frame)
+    assert not endpointer.speech_pending
+
+    endpointer.feed(_tone(80))  # a word onset, still under min_speech_ms
+    assert endpointer.speech_pending and not endpointer.speech_seen
+
+    for frame in _frames(_silence(480, seed=1)):
+        endpointer.feed(frame)
+    assert not endpointer.speech_pending  # a blip, not an utterance
+
+
+def test_endpointer_only_accepts_pcm16_mono_at_its_rate():
+    endpointer = vad.VoiceEndpointer(vad.EnergyVad(SAMPLE_RATE), SAMPLE_RATE)
+    header = protocol.AudioFrameHeader(sequence=0, payload_len=2, sample_rate=SAMPLE_RATE, channels=1, bits_per_sample=16)
+    assert endpointer.accepts(header)
+    assert not endpointer.accepts(protocol.AudioFrameHeader(0, 2, 8000, 1, 16))
+    assert not endpointer.accepts(protocol.AudioFrameHeader(0, 2, SAMPLE_RATE, 2, 16))
+
+
+def test_create_endpointer_modes():
+    assert vad.create_endpointer(mode="off") is None
+    assert isinstance(vad.create_endpointer(mode="energy"), vad.VoiceEndpointer)
+    with pytest.raises(ValueError):
+        vad.create_endpointer(mode="psychic")
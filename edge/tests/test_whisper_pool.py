@@ -0,0 +1,48 @@
+import os
+import pathlib
+import sys
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from speaking_stone_edge import whisper_pool
+
+
+def test_partition_cores_splits_evenly_and_shares_when_short():
+    assert whisper_pool.partition_cores(list(range(16)), 4) == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8, 9, 10, 11],
+        [12, 13, 14, 15],
+    ]
+    assert whisper_pool.partition_cores([0, 1, 2, 3, 4], 2) == [[0, 1, 2], [3, 4]]
+    assert whisper_pool.partition_cores([0], 2) == [[0], [0]]
+
+
+def test_pool_builds_pinned_instances_and_leases_least_loaded():
+    cores = whisper_pool.available_cores()[:1]
+    built = []
+
+    def factory(cpu_threads):
+        affinity = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else cores
+        built.append((cpu_threads, affinity))
+        return f"model-{len(built)}"
+
+    before = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+    pool = whisper_pool.WhisperModelPool(factory, size=2, cores=cores)
+
+    assert built == [(1, cores), (1, cores)]
+    if before is not None:
+        assert os.sched_getaffinity(0) == before  # affinity restored after building
+
+    with pool.lease() as first:
+        with pool.lease() as second:
+            assert {first, second} == {"model-1", "model-2"}
+            assert [item["active"] for item in pool.stats()] == [1, 1]
+    with pool.lease() as third:
+        assert third in {"model-1", "model-2"}
+
+    stats = pool.stats()
+    assert sum(item["calls"] for item in stats) == 3
+    assert all(0.0 <= item["utilization"] <= 1.0 for item in stats)
@@ -11,7 +11,8 @@ import wave
 import numpy as np
 import websockets
 
-from speaking_stone_edge import protocol
+from speaking_stone_edge import adpcm, protocol
+from speaking_stone_edge.tts_stream import split_tts_chunk
 
 TARGET_SAMPLE_RATE = 16000
 TARGET_CHANNELS = 1
@@ -36,6 +37,22 @@ def _parse_args() -> argparse.Namespace:
         default=80,
         help="Approximate duration per frame in milliseconds",
     )
+    parser.add_argument(
+        "--frames-per-message",
+        type=int,
+        default=1,
+        help="Pack this many frames into one superframe message (1 sends plain frames)",
+    )
+    parser.add_argument(
+        "--adpcm",
+        action="store_true",
+        help="Send 4:1 IMA-ADPCM frames instead of PCM16 (16-bit mono input only)",
+    )
+    parser.add_argument(
+        "--slim-header",
+        action="store_true",
+        help="Declare the format once with stream_start and send 6-byte frame headers",
+    )
     parser.add_argument(
         "--post-delay",
         type=float,
@@ -143,8 +160,10 @@ async def _listen_for_responses(
             if isinstance(message, str):
                 print(f"<< text: {message}")
             else:
-                print(f"<< received {len(message)} bytes (likely TTS chunk)")
-                collected.extend(message)
+                header, payload = split_tts_chunk(message)
+                last = " last" if header.flags & protocol.FLAG_LAST_CHUNK else ""
+                print(f"<< TTS chunk seq={header.sequence} bytes={len(payload)}{last}")
+                collected.extend(payload)
     except websockets.ConnectionClosed:
         print("<< connection closed by server")
     finally:
@@ -155,6 +174,17 @@ async def _listen_for_responses(
             print("<< no synthesized audio received; nothing written")
 
 
+def _superframe(
+    frames: list[tuple[int, bytes]], sample_rate: int, channels: int, bits_per_sample: int, flags: int, slim: bool
+) -> bytes:
+    message = protocol.pack_superframe(frames, sample_rate, channels, bits_per_sample, flags)
+    if not slim:
+        return message
+    header = protocol.AudioFrameHeader.from_bytes(message)
+    slim_header = protocol.SLIM_HEADER_STRUCT.pack(header.sequence, header.payload_len, header.flags)
+    return slim_header + message[protocol.HEADER_SIZE :]
+
+
 async def _send_audio_frames(
     ws: websockets.WebSocketClientProtocol,
     pcm: bytes,
@@ -162,23 +192,53 @@ async def _send_audio_frames(
     channels: int,
     bits_per_sample: int,
     chunk_ms: int,
+    frames_per_message: int = 1,
+    use_adpcm: bool = False,
+    slim_header: bool = False,
 ) -> None:
     bytes_per_sample = (bits_per_sample // 8) * channels
     samples_per_chunk = max(1, sample_rate * chunk_ms // 1000)
     chunk_size = samples_per_chunk * bytes_per_sample
 
+    flags = 0
+    step_index = 0
+    if use_adpcm:
+        flags, bits_per_sample = protocol.FLAG_ADPCM, adpcm.BITS_PER_SAMPLE
+    if slim_header:
+        stream_format = {"sample_rate": sample_rate, "channels": channels, "bits_per_sample": bits_per_sample}
+        await ws.send(protocol.encode_control_message("stream_start", stream_format))
+
     sequence = 0
+    pending: list[tuple[int, bytes]] = []
     for chunk in _chunk_bytes(pcm, chunk_size):
+        if use_adpcm:
+            chunk, step_index = adpcm.encode_block(np.frombuffer(chunk, dtype="<i2"), step_index)
+        if frames_per_message > 1:
+            pending.append((sequence & 0xFFFF, chunk))
+            sequence += 1
+            await asyncio.sleep(chunk_ms / 1000.0)
+            if len(pending) == frames_per_message:
+                await ws.send(_superframe(pending, sample_rate, channels, bits_per_sample, flags, slim_header))
+                pending = []
+            continue
+        if slim_header:
+            await ws.send(protocol.SLIM_HEADER_STRUCT.pack(sequence & 0xFFFF, len(chunk), flags) + chunk)
+            sequence += 1
+            await asyncio.sleep(chunk_ms / 1000.0)
+            continue
         header = protocol.AudioFrameHeader(
             sequence=sequence,
             payload_len=len(chunk),
             sample_rate=sample_rate,
             channels=channels,
             bits_per_sample=bits_per_sample,
+            flags=flags,
         )
         await ws.send(header.to_bytes() + chunk)
         sequence += 1
         await asyncio.sleep(chunk_ms / 1000.0)
+    if pending:
+        await ws.send(_superframe(pending, sample_rate, channels, bits_per_sample, flags, slim_header))
 
     await ws.send(protocol.encode_control_message("speech_end", {}))
 
@@ -190,7 +250,9 @@ async def _run(args: argparse.Namespace) -> None:
     async with websockets.connect(args.url, ping_interval=None) as ws:
         listener = asyncio.create_task(_listen_for_responses(ws, args.output_wav))
         try:
-            await _send_audio_frames(ws, pcm, sample_rate, channels, bits_per_sample, args.chunk_ms)
+            await _send_audio_frames(
+                ws, pcm, sample_rate, channels, bits_per_sample, args.chunk_ms, args.frames_per_message, args.adpcm, args.slim_header
+            )
             await asyncio.sleep(args.post_delay)
         finally:
             await ws.close()
@@ -0,0 +1,181 @@
+"""Benchmark the audio ingest path: websocket frames -> AudioStreamBuffer -> Whisper float32 input.
+
+Replays synthetic utterances through the legacy copy-heavy path (bytes slicing,
+bytearray, `bytes()` snapshot, `astype` + divide) and the current zero-copy path, and
+reports per utterance: allocation count, allocations that carry PCM (at least one
+frame's payload), PCM-sized buffer allocations and allocated bytes (tracemalloc, which
+also traces NumPy data buffers), traced peak bytes, wall time (measured with tracing
+off) and peak RSS growth over the idle process (`ru_maxrss`). With `--path both` each
+path runs in its own child process so the RSS figures do not mix.
+
+Example:
+    python -m tools.bench_audio_ingest --seconds 8 --utterances 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from speaking_stone_edge import protocol
+from speaking_stone_edge.audio_buffer import AudioStreamBuffer
+from speaking_stone_edge.stt_module import _pcm16_mono_to_float32
+
+LARGE_ALLOCATION_BYTES = 4096  # anything this size is a PCM copy, not bookkeeping
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=8.0, help="Utterance length in seconds")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Frame duration in milliseconds")
+    parser.add_argument("--utterances", type=int, default=20, help="Utterances per path")
+    parser.add_argument("--path", choices=("both", "legacy", "zero_copy"), default="both")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON only")
+    return parser.parse_args()
+
+
+def _frames(seconds: float, frame_ms: int) -> List[bytes]:
+    samples_per_frame = 16000 * frame_ms // 1000
+    count = int(seconds * 1000 // frame_ms)
+    rng = np.random.default_rng(0)
+    frames = []
+    for sequence in range(count):
+        pcm = rng.integers(-2000, 2000, samples_per_frame, dtype=np.int16).astype("<i2").tobytes()
+        header = protocol.AudioFrameHeader(
+            sequence=sequence & 0xFFFF,
+            payload_len=len(pcm),
+            sample_rate=16000,
+            channels=1,
+            bits_per_sample=16,
+        )
+        frames.append(header.to_bytes() + pcm)
+    return frames
+
+
+def legacy_path(frames: List[bytes], keep: List[Any]) -> np.ndarray:
+    """The pre-rework ingest: every stage makes its own copy."""
+    buffered = bytearray()
+    for raw in frames:
+        protocol.AudioFrameHeader.from_bytes(raw)
+        payload = raw[protocol.HEADER_SIZE :]
+        keep.append(payload)
+        buffered.extend(payload)
+    pcm = bytes(buffered)
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    audio = samples / 32768.0
+    keep.extend((buffered, pcm, samples))
+    return audio
+
+
+def zero_copy_path(frames: List[bytes], buffer: AudioStreamBuffer, keep: List[Any]) -> np.ndarray:
+    for raw in frames:
+        header = protocol.AudioFrameHeader.from_bytes(raw)
+        payload = memoryview(raw)[protocol.HEADER_SIZE :]
+        keep.append(payload)
+        buffer.append_frame(header, payload)
+    pcm, header = buffer.snapshot()
+    audio = _pcm16_mono_to_float32(pcm, header, reuse_scratch=True)
+    keep.append(pcm)
+    buffer.clear()
+    return audio
+
+
+PathFunc = Callable[[List[Any]], np.ndarray]
+
+
+def _count_allocations(run: PathFunc, frame_bytes: int) -> Dict[str, float]:
+    """Count every allocation of one utterance; intermediates are kept alive so none are missed."""
+    keep: List[Any] = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    audio = run(keep)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    count = 0
+    pcm = 0
+    large = 0
+    allocated = 0
+    for stat in after.compare_to(before, "traceback"):
+        if stat.count_diff <= 0:
+            continue
+        count += stat.count_diff
+        allocated += stat.size_diff
+        average = stat.size_diff / stat.count_diff
+        if average >= frame_bytes:
+            pcm += stat.count_diff
+        if average >= LARGE_ALLOCATION_BYTES:
+            large += stat.count_diff
+    del keep, audio
+    return {"allocations": count, "pcm_allocations": pcm, "buffer_allocations": large, "allocated_bytes": allocated}
+
+
+def _measure(run: PathFunc, utterances: int, audio_bytes: int, frame_bytes: int) -> Dict[str, float]:
+    idle_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    run([])  # warm-up: scratch buffers and stores reach steady state
+    counts = _count_allocations(run, frame_bytes)
+    peak = 0
+    for _ in range(utterances):
+        tracemalloc.start()
+        run([])
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    # Timed separately: tracemalloc's per-allocation hook would skew the comparison.
+    started = time.perf_counter()
+    for _ in range(utterances):
+        run([])
+    elapsed = time.perf_counter() - started
+    return {
+        "allocations_per_utterance": counts["allocations"],
+        "pcm_allocations_per_utterance": counts["pcm_allocations"],
+        "buffer_allocations_per_utterance": counts["buffer_allocations"],
+        "allocated_bytes_per_utterance": counts["allocated_bytes"],
+        "traced_peak_bytes": peak,
+        "peak_over_audio_bytes": round(peak / audio_bytes, 2),
+        "ms_per_utterance": round(elapsed * 1000.0 / utterances, 3),
+        "rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - idle_rss,
+    }
+
+
+def _run_isolated(seconds: float, frame_ms: int, utterances: int, path: str) -> Dict[str, float]:
+    """Run one path in a child process so its peak RSS is its own."""
+    command = [sys.executable, "-m", "tools.bench_audio_ingest", "--json", "--path", path]
+    command += ["--seconds", str(seconds), "--frame-ms", str(frame_ms), "--utterances", str(utterances)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)[path]
+
+
+def run_benchmark(seconds: float, frame_ms: int, utterances: int, path: str = "both") -> Dict[str, Dict[str, float]]:
+    if path == "both":
+        return {name: _run_isolated(seconds, frame_ms, utterances, name) for name in ("legacy", "zero_copy")}
+    frames = _frames(seconds, frame_ms)
+    audio_bytes = sum(len(raw) - protocol.HEADER_SIZE for raw in frames)
+    frame_bytes = 16000 * 2 * frame_ms // 1000
+    buffer = AudioStreamBuffer()
+    paths: Dict[str, PathFunc] = {
+        "legacy": lambda keep: legacy_path(frames, keep),
+        "zero_copy": lambda keep: zero_copy_path(frames, buffer, keep),
+    }
+    return {path: _measure(paths[path], utterances, audio_bytes, frame_bytes)}
+
+
+def main() -> None:
+    args = _parse_args()
+    results = run_benchmark(args.seconds, args.frame_ms, args.utterances, args.path)
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"utterance={args.seconds:.1f}s frame={args.frame_ms}ms runs={args.utterances}")
+    for name, stats in results.items():
+        print(f"{name:>10}: " + " ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
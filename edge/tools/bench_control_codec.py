@@ -0,0 +1,112 @@
+"""Benchmark control-message encode/decode throughput: JSON text vs compact MessagePack frames.
+
+Encodes and decodes representative payloads of the hot control events (the ones sent
+on every turn or every streaming step) through `protocol.encode_control_message` /
+`decode_control_message` and `encode_compact_control` / `decode_compact_control`, and
+reports messages per second and wire bytes for each.
+
+Example:
+    python -m tools.bench_control_codec --iterations 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+from speaking_stone_edge import protocol
+
+HOT_EVENTS: Dict[str, Dict[str, Any]] = {
+    "ack": {"event": "reset_buffer"},
+    "partial_transcript": {
+        "text": "turn on the lights in the",
+        "committed": "turn on the lights",
+        "tentative": "in the",
+    },
+    "endpoint_detected": {"speech_ms": 1840.0, "trailing_silence_ms": 720.0},
+    "transcription_ready": {
+        "transcript": "turn on the lights in the kitchen",
+        "reply": "Sure, the kitchen lights are on.",
+        "timings": {"stt_ms": 412.3, "llm_ms": 655.1, "stt_queue_wait_ms": 0.2, "total_ms": 1067.6},
+    },
+    "tts_end": {
+        "chunks": 24,
+        "bytes": 76800,
+        "duration_ms": 2400.0,
+        "timings": {
+            "stt_ms": 412.3,
+            "llm_ms": 655.1,
+            "tts_ms": 301.8,
+            "first_audio_ms": 1190.4,
+            "tts_cache_hits": 1,
+            "total_ms": 1369.2,
+        },
+    },
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="Encode/decode calls per event and codec")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON only")
+    return parser.parse_args()
+
+
+def _rate(func: Callable[[], Any], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - started)
+
+
+def _json_codec(event: str, payload: Dict[str, Any], iterations: int) -> Dict[str, float]:
+    raw = protocol.encode_control_message(event, payload)
+    return {
+        "bytes": len(raw.encode("utf-8")),
+        "encode_per_s": round(_rate(lambda: protocol.encode_control_message(event, payload), iterations)),
+        "decode_per_s": round(_rate(lambda: protocol.decode_control_message(raw), iterations)),
+    }
+
+
+def _compact_codec(event: str, payload: Dict[str, Any], iterations: int) -> Dict[str, float]:
+    raw = protocol.encode_compact_control(event, payload)
+
+    def decode() -> Dict[str, Any]:
+        header = protocol.AudioFrameHeader.from_bytes(raw)
+        return protocol.decode_compact_control(header, memoryview(raw)[protocol.HEADER_SIZE :])
+
+    return {
+        "bytes": len(raw),
+        "encode_per_s": round(_rate(lambda: protocol.encode_compact_control(event, payload), iterations)),
+        "decode_per_s": round(_rate(decode, iterations)),
+    }
+
+
+def run_benchmark(iterations: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    if not protocol.compact_encoding_available():
+        raise SystemExit("msgpack is not installed; pip install msgpack")
+    return {
+        event: {
+            protocol.CONTROL_ENCODING_JSON: _json_codec(event, payload, iterations),
+            protocol.CONTROL_ENCODING_MSGPACK: _compact_codec(event, payload, iterations),
+        }
+        for event, payload in HOT_EVENTS.items()
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    results = run_benchmark(args.iterations)
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"iterations={args.iterations}")
+    for event, codecs in results.items():
+        for codec, stats in codecs.items():
+            print(f"{event:>20} {codec:>8}: " + " ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
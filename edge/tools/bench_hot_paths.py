@@ -0,0 +1,274 @@
+"""Micro-benchmarks for the per-frame and per-turn hot paths, with JSON baselines.
+
+Each case times one operation with `time.perf_counter_ns`. It runs `--repeat` rounds
+of a calibrated number of calls and reports the median and minimum time per call:
+
+- `header_from_bytes` / `header_to_bytes`: one `AudioFrameHeader` parse / pack.
+- `buffer_append_snapshot_5s` / `_30s`: 20 ms frames of a 5 s / 30 s utterance
+  appended to an `AudioStreamBuffer`, then `snapshot()` and `clear()` (per utterance).
+- `pcm16_to_float32_10s`: Whisper input conversion of 10 s of audio (scratch reused).
+- `encode_control_transcription_ready`: JSON encoding of a typical `transcription_ready`.
+- `sanitize_reply`: cleanup of a reply with stage directions and markdown.
+- `build_messages_long_history`: prompt assembly with 40 prior turns and a summary.
+- `websocket_audio_turn`: a full `/ws/audio` turn through FastAPI's `TestClient`: 1 s
+  of frames, `speech_end`, then `transcription_ready`, TTS chunks and `tts_end`. STT, LLM
+  and TTS are stubbed, so only the edge's own overhead is timed.
+
+`--save PATH` writes the results as a baseline. `--compare PATH` flags every case whose
+median is more than `--threshold` (default 0.2, i.e. 20 %) slower than the baseline and
+exits with status 1 if there is any. Compare baselines taken on the same machine only.
+
+Example:
+    python -m tools.bench_hot_paths --save bench_baseline.json
+    python -m tools.bench_hot_paths --compare bench_baseline.json --threshold 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from speaking_stone_edge import protocol
+from speaking_stone_edge.audio_buffer import AudioStreamBuffer
+from speaking_stone_edge.llm_module import _build_messages, _sanitize_reply
+from speaking_stone_edge.stt_module import _pcm16_mono_to_float32
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+TARGET_ROUND_S = 0.05  # calls per round are calibrated to take about this long
+
+Case = Tuple[Callable[[], Any], Optional[Callable[[], None]]]  # (operation, teardown)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7, help="Timed rounds per case")
+    parser.add_argument("--only", action="append", help="Run only cases whose name contains this (repeatable)")
+    parser.add_argument("--save", type=Path, help="Write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a case is flagged")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON only")
+    return parser.parse_args()
+
+
+def _frames(seconds: float) -> List[Tuple[protocol.AudioFrameHeader, memoryview]]:
+    samples_per_frame = SAMPLE_RATE * FRAME_MS // 1000
+    rng = np.random.default_rng(0)
+    frames = []
+    for sequence in range(int(seconds * 1000 // FRAME_MS)):
+        pcm = rng.integers(-2000, 2000, samples_per_frame, dtype=np.int16).astype("<i2").tobytes()
+        header = protocol.AudioFrameHeader(sequence & 0xFFFF, len(pcm), SAMPLE_RATE, 1, 16, 0)
+        frames.append((header, memoryview(pcm)))
+    return frames
+
+
+def _case_header_from_bytes() -> Case:
+    raw = protocol.AudioFrameHeader(7, 640, SAMPLE_RATE, 1, 16, 0).to_bytes() + b"\x00" * 640
+    return (lambda: protocol.AudioFrameHeader.from_bytes(raw)), None
+
+
+def _case_header_to_bytes() -> Case:
+    header = protocol.AudioFrameHeader(7, 640, SAMPLE_RATE, 1, 16, 0)
+    return header.to_bytes, None
+
+
+def _buffer_case(seconds: float) -> Case:
+    frames = _frames(seconds)
+    buffer = AudioStreamBuffer()
+
+    def utterance() -> None:
+        for header, payload in frames:
+            buffer.append_frame(header, payload)
+        buffer.snapshot()
+        buffer.clear()
+
+    return utterance, None
+
+
+def _case_pcm16_to_float32() -> Case:
+    pcm = np.random.default_rng(0).integers(-2000, 2000, SAMPLE_RATE * 10, dtype=np.int16).tobytes()
+    header = protocol.AudioFrameHeader(0, len(pcm), SAMPLE_RATE, 1, 16, 0)
+    return (lambda: _pcm16_mono_to_float32(pcm, header, reuse_scratch=True)), None
+
+
+def _case_encode_control() -> Case:
+    payload = {
+        "header": {"sample_rate": SAMPLE_RATE, "channels": 1, "bits_per_sample": 16, "flags": 0},
+        "payload_bytes": 96000,
+        "transcript": "turn on the lights in the kitchen and tell me tomorrow's weather",
+        "reply": "Sure, the kitchen lights are on. Tomorrow looks sunny with a high of twenty-one degrees.",
+        "timings": {"stt_ms": 412.3, "llm_ms": 655.1, "stt_queue_wait_ms": 0.2, "history_tokens": 812, "total_ms": 1067.6},
+        "trace": {"turn_id": "0123456789abcdef", "elapsed_ms": 1068.0, "spans_ms": {"stt": 412.1, "llm": 655.0}},
+    }
+    return (lambda: protocol.encode_control_message("transcription_ready", payload)), None
+
+
+def _case_sanitize_reply() -> Case:
+    reply = (
+        "*clears throat* **Well**, the kitchen lights are on now (as requested). "
+        "Tomorrow looks _sunny_ — a high of 21°C, low of 12°C. [smiles] Anything else?\n\n"
+    ) * 3
+    return (lambda: _sanitize_reply(reply)), None
+
+
+def _case_build_messages() -> Case:
+    history: List[Dict[str, str]] = [
+        {"role": "system", "content": "Summary of earlier conversation: the user is planning a trip to Lisbon. " * 4}
+    ]
+    for turn in range(40):
+        history.append({"role": "user", "content": f"Question number {turn} about the itinerary and the weather?"})
+        history.append({"role": "assistant", "content": f"Answer number {turn}, with a couple of sentences of detail."})
+    return (lambda: _build_messages("And what should I pack?", history)), None
+
+
+def _case_websocket_turn() -> Case:
+    from fastapi.testclient import TestClient
+
+    from speaking_stone_edge import main
+
+    reply_pcm = b"\x01\x00" * SAMPLE_RATE  # 1 s of speech from the stubbed TTS
+    originals = (main.stt_batch.transcribe, main.generate_reply, main.iter_speech)
+
+    async def transcribe(pcm: Any, header: Any, timer: Any = None) -> str:
+        return "turn on the lights"
+
+    async def generate_reply(text: str, history: Any = None) -> str:
+        return "Sure, the lights are on."
+
+    def iter_speech(text: str) -> Iterator[bytes]:
+        yield reply_pcm
+
+    main.stt_batch.transcribe, main.generate_reply, main.iter_speech = transcribe, generate_reply, iter_speech
+    main.logger.setLevel(logging.WARNING)  # keep per-turn log I/O out of the measurement
+    client = TestClient(main.app)  # no lifespan: startup would load Whisper
+    session = client.websocket_connect("/ws/audio")
+    ws = session.__enter__()
+    ws.receive_text()  # connected
+    frames = [header.to_bytes() + bytes(payload) for header, payload in _frames(1.0)]
+    speech_end = protocol.encode_control_message("speech_end", {})
+
+    def turn() -> None:
+        for frame in frames:
+            ws.send_bytes(frame)
+        ws.send_text(speech_end)
+        while True:
+            message = ws.receive()
+            text = message.get("text")
+            if text is not None and protocol.decode_control_message(text).get("event") in ("tts_end", "error"):
+                return
+
+    def teardown() -> None:
+        session.__exit__(None, None, None)
+        main.stt_batch.transcribe, main.generate_reply, main.iter_speech = originals
+        main.logger.setLevel(logging.INFO)
+
+    return turn, teardown
+
+
+CASES: Dict[str, Callable[[], Case]] = {
+    "header_from_bytes": _case_header_from_bytes,
+    "header_to_bytes": _case_header_to_bytes,
+    "buffer_append_snapshot_5s": lambda: _buffer_case(5.0),
+    "buffer_append_snapshot_30s": lambda: _buffer_case(30.0),
+    "pcm16_to_float32_10s": _case_pcm16_to_float32,
+    "encode_control_transcription_ready": _case_encode_control,
+    "sanitize_reply": _case_sanitize_reply,
+    "build_messages_long_history": _case_build_messages,
+    "websocket_audio_turn": _case_websocket_turn,
+}
+
+
+def _time_calls(operation: Callable[[], Any], number: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(number):
+        operation()
+    return (time.perf_counter_ns() - started) / number
+
+
+def run_case(name: str, repeat: int) -> Dict[str, Any]:
+    operation, teardown = CASES[name]()
+    try:
+        operation()  # warm-up: lazy imports, first-use allocations, caches
+        number = 1
+        while _time_calls(operation, number) * number < TARGET_ROUND_S * 1e9 and number < 1_000_000:
+            number *= 2
+        rounds = [_time_calls(operation, number) for _ in range(repeat)]
+    finally:
+        if teardown is not None:
+            teardown()
+    return {
+        "median_ns": round(statistics.median(rounds)),
+        "min_ns": round(min(rounds)),
+        "calls_per_round": number,
+        "rounds": repeat,
+    }
+
+
+def run_benchmarks(repeat: int, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    names = [name for name in CASES if not only or any(part in name for part in only)]
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "results": {name: run_case(name, repeat) for name in names},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, Dict[str, Any]]:
+    """Per case: baseline/current medians, their ratio and whether it regressed past `threshold`."""
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            report[name] = {"current_ns": result["median_ns"], "status": "new"}
+            continue
+        ratio = result["median_ns"] / max(1, before["median_ns"])
+        report[name] = {
+            "baseline_ns": before["median_ns"],
+            "current_ns": result["median_ns"],
+            "ratio": round(ratio, 3),
+            "status": "regressed" if ratio > 1.0 + threshold else "ok",
+        }
+    return report
+
+
+def _format_ns(value: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value:.0f} ns"
+
+
+def main() -> None:
+    args = _parse_args()
+    current = run_benchmarks(args.repeat, args.only)
+    if args.save:
+        args.save.write_text(json.dumps(current, indent=2) + "\n")
+    comparison = None
+    if args.compare:
+        comparison = compare(current, json.loads(args.compare.read_text()), args.threshold)
+
+    if args.json:
+        print(json.dumps({**current, "comparison": comparison} if comparison is not None else current))
+    else:
+        for name, result in current["results"].items():
+            line = f"{name:>36}: median {_format_ns(result['median_ns']):>10}  min {_format_ns(result['min_ns']):>10}"
+            if comparison is not None:
+                entry = comparison[name]
+                line += f"  {entry['status']}" + (f" x{entry['ratio']}" if "ratio" in entry else "")
+            print(line)
+    if comparison is not None and any(entry["status"] == "regressed" for entry in comparison.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
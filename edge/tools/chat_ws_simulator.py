@@ -11,6 +11,7 @@ import wave
 import websockets
 
 from speaking_stone_edge import protocol, tts_module
+from speaking_stone_edge.tts_stream import split_tts_chunk
 
 
 def _parse_args() -> argparse.Namespace:
@@ -70,7 +71,6 @@ async def _send_text_turn(
     print(f'>> sent text_input (turn {turn_index}): "{text}" skip_tts={skip_tts}')
 
     collected = bytearray()
-    ready_seen = False
     while True:
         try:
             message = await ws.recv()
@@ -85,26 +85,26 @@ async def _send_text_turn(
                 event = control.get("event")
                 payload = control.get("payload") or {}
                 if event == "transcription_ready":
-                    ready_seen = True
                     transcript = payload.get("transcript", "")
                     reply = payload.get("reply", "")
                     tts_skipped = payload.get("tts_skipped", False)
                     print(f'<< transcript: "{transcript}"')
-                    print(f'<< reply: "{reply}"')
+                    if "reply" in payload:
+                        print(f'<< reply: "{reply}"')
                     if tts_skipped:
                         print("<< TTS was skipped")
                         break
+                elif event == "tts_end":
+                    print(f'<< reply: "{payload.get("reply", "")}"')
+                    print(f"<< TTS finished: {payload.get('chunks')} chunks, {payload.get('duration_ms')} ms")
+                    break
             except Exception:
                 # Non-control text; keep looping.
                 pass
         else:
-            print(f"<< received {len(message)} bytes (TTS chunk)")
-            collected.extend(message)
-            if ready_seen:
-                break
-
-        if ready_seen and collected:
-            break
+            header, chunk = split_tts_chunk(message)
+            print(f"<< received {len(chunk)} bytes (TTS chunk seq={header.sequence})")
+            collected.extend(chunk)
 
     if collected:
         if single_turn:
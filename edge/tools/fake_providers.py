@@ -0,0 +1,212 @@
+"""Local stand-ins for OpenRouter and ElevenLabs with scripted, reproducible timing.
+
+Serves the two provider endpoints the edge calls, so end-to-end latency can be measured
+on an offline box:
+
+- `POST /chat/completions` (OpenRouter): waits `--ttft-ms`, then emits the reply at
+  `--tokens-per-s`, as SSE deltas when the request sets `"stream": true`, otherwise as
+  one JSON completion once every token would have been generated. `HEAD /` answers the
+  edge's connection pre-warm.
+- `POST /v1/text-to-speech/{voice_id}[/stream]` (ElevenLabs): waits `--tts-first-byte-ms`,
+  then streams 16 kHz mono PCM16 at `--audio-bytes-per-s`. The clip lasts as long as the
+  text would take to speak at `--chars-per-s`. It is a quiet tone, so the edge never
+  mistakes it for its silent placeholder.
+
+`--error-rate` fails that fraction of requests with HTTP 500 (or 429 with
+`--error-status`). Reply text, clip lengths and failures follow from `--seed` and the
+request order, so two runs with the same load see the same provider behaviour.
+
+Point the edge at it:
+    python -m tools.fake_providers --port 8100 --ttft-ms 350 --tokens-per-s 60
+    OPENROUTER_BASE_URL=http://127.0.0.1:8100 OPENROUTER_API_KEY=fake \\
+    ELEVENLABS_API_HOST=http://127.0.0.1:8100 ELEVENLABS_API_KEY=fake \\
+        uvicorn speaking_stone_edge.main:app --port 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List
+
+import numpy as np
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_RATE = 16000
+FILLER = (
+    "Sure thing. Here is a short answer that takes a few sentences, so the edge has to split it "
+    "into several pieces of speech. It keeps going for a little while, then it wraps up."
+).split()
+
+
+@dataclass
+class FakeProviderConfig:
+    ttft_ms: float = 300.0
+    tokens_per_s: float = 50.0
+    reply_words: int = 30
+    tts_first_byte_ms: float = 150.0
+    audio_bytes_per_s: float = 64000.0  # 2x real time for 16 kHz PCM16
+    audio_chunk_bytes: int = 3200
+    chars_per_s: float = 15.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+
+
+def _reply_tokens(config: FakeProviderConfig, prompt: str, rng: random.Random) -> List[str]:
+    """Echo the start of the prompt, then filler words; each token keeps its leading space."""
+    echoed = prompt.split()[:8]
+    words = ["You", "said:"] + echoed[:-1] + [echoed[-1].rstrip(".?!") + "."] if echoed else []
+    start = rng.randrange(len(FILLER))
+    while len(words) < config.reply_words:
+        words.append(FILLER[start % len(FILLER)])
+        start += 1
+    return [word if index == 0 else " " + word for index, word in enumerate(words[: config.reply_words])]
+
+
+def _tone(nbytes: int) -> bytes:
+    samples = np.arange(nbytes // 2, dtype=np.float32)
+    return (np.sin(samples * (2.0 * np.pi * 220.0 / SAMPLE_RATE)) * 1200.0).astype("<i2").tobytes()
+
+
+def create_app(config: FakeProviderConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenRouter + ElevenLabs")
+    rng = random.Random(config.seed)
+    counters = {"chat": 0, "tts": 0, "errors": 0}
+
+    def should_fail() -> bool:
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            counters["errors"] += 1
+            return True
+        return False
+
+    def error_response(provider: str) -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": f"fake {provider} failure", "code": config.error_status}},
+            status_code=config.error_status,
+        )
+
+    @app.head("/")
+    @app.get("/")
+    async def root() -> Dict[str, Any]:
+        return {"service": "fake-providers", **counters}
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        counters["chat"] += 1
+        if should_fail():
+            return error_response("openrouter")
+        messages = body.get("messages") or []
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        tokens = _reply_tokens(config, str(prompt), rng)
+        model = body.get("model") or "fake/model"
+        interval = 1.0 / config.tokens_per_s if config.tokens_per_s > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.ttft_ms / 1000.0 + interval * len(tokens))
+            return JSONResponse(
+                {
+                    "id": f"fake-{counters['chat']}",
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}}],
+                    "usage": {"completion_tokens": len(tokens)},
+                }
+            )
+
+        async def events() -> AsyncIterator[bytes]:
+            yield b": OPENROUTER PROCESSING\n\n"
+            await asyncio.sleep(config.ttft_ms / 1000.0)
+            started = time.perf_counter()
+            for index, token in enumerate(tokens):
+                # Pace against the start so per-token overhead does not slow the stream down.
+                delay = started + index * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+                yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def speech(request: Request) -> Response:
+        body = await request.json()
+        counters["tts"] += 1
+        if should_fail():
+            return error_response("elevenlabs")
+        text = str(body.get("text") or "")
+        seconds = len(text) / config.chars_per_s if config.chars_per_s > 0 else 0.0
+        total = int(seconds * SAMPLE_RATE) * 2
+        chunk_bytes = max(2, config.audio_chunk_bytes - config.audio_chunk_bytes % 2)
+
+        async def audio() -> AsyncIterator[bytes]:
+            await asyncio.sleep(config.tts_first_byte_ms / 1000.0)
+            started = time.perf_counter()
+            sent = 0
+            while sent < total:
+                piece = _tone(min(chunk_bytes, total - sent))
+                if config.audio_bytes_per_s > 0:
+                    delay = started + sent / config.audio_bytes_per_s - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                sent += len(piece)
+                yield piece
+
+        return StreamingResponse(audio(), media_type="audio/pcm")
+
+    app.add_api_route("/v1/text-to-speech/{voice_id}/stream", speech, methods=["POST"])
+    app.add_api_route("/v1/text-to-speech/{voice_id}", speech, methods=["POST"])
+    return app
+
+
+def _parse_args() -> argparse.Namespace:
+    defaults = FakeProviderConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms, help="Delay before the first LLM token")
+    parser.add_argument("--tokens-per-s", type=float, default=defaults.tokens_per_s, help="LLM generation rate")
+    parser.add_argument("--reply-words", type=int, default=defaults.reply_words, help="Tokens per LLM reply")
+    parser.add_argument(
+        "--tts-first-byte-ms", type=float, default=defaults.tts_first_byte_ms, help="Delay before the first audio byte"
+    )
+    parser.add_argument(
+        "--audio-bytes-per-s",
+        type=float,
+        default=defaults.audio_bytes_per_s,
+        help="TTS streaming rate (32000 is real time for 16 kHz PCM16; 0 sends as fast as possible)",
+    )
+    parser.add_argument("--audio-chunk-bytes", type=int, default=defaults.audio_chunk_bytes, help="TTS chunk size")
+    parser.add_argument("--chars-per-s", type=float, default=defaults.chars_per_s, help="Speaking rate for clip length")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=defaults.error_status, help="HTTP status of failures")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for replies and failures")
+    return parser.parse_args()
+
+
+def main() -> None:
+    import uvicorn
+
+    args = _parse_args()
+    config = FakeProviderConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_s=args.tokens_per_s,
+        reply_words=args.reply_words,
+        tts_first_byte_ms=args.tts_first_byte_ms,
+        audio_bytes_per_s=args.audio_bytes_per_s,
+        audio_chunk_bytes=args.audio_chunk_bytes,
+        chars_per_s=args.chars_per_s,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
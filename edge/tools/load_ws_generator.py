@@ -0,0 +1,274 @@
+"""Drive many concurrent stones against the edge and report turn latency percentiles.
+
+Each session connects after a staggered delay, then runs `--turns` turns drawn from the
+configured mix:
+
+- audio turns replay the WAV in real time (`--chunk-ms` frames with the simulator's
+  framing, superframe/ADPCM/slim-header options included) and end with `speech_end`;
+- text turns send `text_input`, optionally with `skip_tts`.
+
+Latency is measured from `speech_end` (or `text_input`) leaving the client to the first
+and the last reply byte: the first and the flagged last TTS chunk of spoken turns, or
+`transcription_ready` for text turns that skip TTS. Run the edge with `VAD_MODE=off`,
+otherwise server-side endpointing may flush a turn before `speech_end` is sent.
+
+The JSON report (stdout, or `--output`) holds the configuration, p50/p95/p99 latencies
+overall and per turn kind, error counts and throughput, so runs can be diffed.
+
+Example:
+    python -m tools.load_ws_generator tests/data/audio/test_speech.wav --sessions 50 --ramp-s 10 \\
+        --turns 3 --text-ratio 0.3 --skip-tts-ratio 0.5 --output load.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import websockets
+
+from speaking_stone_edge import protocol
+from speaking_stone_edge.tts_stream import split_tts_chunk
+from tools.audio_ws_simulator import _load_wav, _send_audio_frames
+
+PERCENTILES = (50, 95, 99)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav_path", type=Path, help="PCM WAV replayed by audio turns")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/audio", help="Websocket URL for the edge server")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent websocket sessions")
+    parser.add_argument("--ramp-s", type=float, default=5.0, help="Spread session starts evenly over this many seconds")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--think-s", type=float, default=1.0, help="Pause between a session's turns")
+    parser.add_argument("--text-ratio", type=float, default=0.0, help="Fraction of turns sent as text_input")
+    parser.add_argument(
+        "--skip-tts-ratio", type=float, default=0.0, help="Fraction of text turns that set skip_tts"
+    )
+    parser.add_argument("--text", default="What's the weather like today?", help="Prompt for text turns")
+    parser.add_argument("--chunk-ms", type=int, default=80, help="Approximate duration per uplink frame")
+    parser.add_argument("--frames-per-message", type=int, default=1, help="Frames packed per superframe message")
+    parser.add_argument("--adpcm", action="store_true", help="Send IMA-ADPCM frames")
+    parser.add_argument("--slim-header", action="store_true", help="Use stream_start and 6-byte frame headers")
+    parser.add_argument("--turn-timeout", type=float, default=60.0, help="Seconds before a turn counts as failed")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the turn mix")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+@dataclass
+class TurnResult:
+    kind: str  # "audio" or "text"
+    spoken: bool
+    sent_at: float = 0.0
+    first_at: Optional[float] = None
+    last_at: Optional[float] = None
+    tts_bytes: int = 0
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def finish(self, now: float, error: Optional[str] = None) -> None:
+        if self.done.is_set():
+            return
+        if error is None:
+            self.first_at = self.first_at if self.first_at is not None else now
+            self.last_at = self.last_at if self.last_at is not None else now
+        self.error = error
+        self.done.set()
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.last_at is not None
+
+    def first_byte_ms(self) -> float:
+        return (self.first_at - self.sent_at) * 1000.0
+
+    def last_byte_ms(self) -> float:
+        return (self.last_at - self.sent_at) * 1000.0
+
+
+class _Receiver:
+    """Routes server messages of one session to its turn in flight."""
+
+    def __init__(self) -> None:
+        self.turn: Optional[TurnResult] = None
+
+    def on_message(self, message: Any) -> None:
+        now = time.perf_counter()
+        turn = self.turn
+        if isinstance(message, bytes):
+            header, payload = split_tts_chunk(message)
+            if turn is None or not turn.spoken:
+                return
+            if turn.first_at is None:
+                turn.first_at = now
+            turn.tts_bytes += len(payload)
+            if header.flags & protocol.FLAG_LAST_CHUNK:
+                turn.last_at = now
+            return
+
+        control = protocol.decode_control_message(message)
+        event = control.get("event")
+        payload = control.get("payload") or {}
+        if turn is None:
+            return
+        if event == "error" or (event == "noop" and payload.get("detail")):
+            turn.finish(now, error=str(payload.get("detail", event)))
+        elif event == "turn_cancelled":
+            turn.finish(now, error=f"turn_cancelled:{payload.get('reason')}")
+        elif event == "transcription_ready" and not turn.spoken:
+            turn.finish(now)
+        elif event == "tts_end":
+            turn.finish(now)
+
+    async def listen(self, ws: websockets.WebSocketClientProtocol) -> None:
+        try:
+            async for message in ws:
+                self.on_message(message)
+        except websockets.ConnectionClosed:
+            pass
+        if self.turn is not None:
+            self.turn.finish(time.perf_counter(), error="connection_closed")
+
+
+async def _run_turn(
+    ws: websockets.WebSocketClientProtocol,
+    receiver: _Receiver,
+    turn: TurnResult,
+    audio: tuple,
+    args: argparse.Namespace,
+) -> None:
+    receiver.turn = turn
+    if turn.kind == "text":
+        await ws.send(protocol.encode_control_message("text_input", {"text": args.text, "skip_tts": not turn.spoken}))
+        turn.sent_at = time.perf_counter()
+    else:
+        pcm, sample_rate, channels, bits_per_sample = audio
+        await _send_audio_frames(
+            ws,
+            pcm,
+            sample_rate,
+            channels,
+            bits_per_sample,
+            args.chunk_ms,
+            args.frames_per_message,
+            args.adpcm,
+            args.slim_header,
+        )
+        turn.sent_at = time.perf_counter()  # speech_end is the last message sent
+    try:
+        await asyncio.wait_for(turn.done.wait(), timeout=args.turn_timeout)
+    except asyncio.TimeoutError:
+        turn.finish(time.perf_counter(), error="timeout")
+    finally:
+        receiver.turn = None
+
+
+async def _run_session(index: int, audio: tuple, args: argparse.Namespace, results: List[TurnResult]) -> None:
+    await asyncio.sleep(index * args.ramp_s / max(1, args.sessions))
+    rng = random.Random(args.seed * 100003 + index)
+    try:
+        async with websockets.connect(args.url, ping_interval=None, max_size=None) as ws:
+            receiver = _Receiver()
+            await ws.recv()  # `connected`
+            listener = asyncio.create_task(receiver.listen(ws))
+            try:
+                for number in range(args.turns):
+                    if number:
+                        await asyncio.sleep(args.think_s)
+                    is_text = rng.random() < args.text_ratio
+                    spoken = not (is_text and rng.random() < args.skip_tts_ratio)
+                    turn = TurnResult(kind="text" if is_text else "audio", spoken=spoken)
+                    results.append(turn)
+                    await _run_turn(ws, receiver, turn, audio, args)
+            finally:
+                listener.cancel()
+    except (OSError, websockets.WebSocketException) as exc:
+        print(f"session {index} failed: {exc}", file=sys.stderr)
+        results.append(TurnResult(kind="connect", spoken=False, error=type(exc).__name__))
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    data = np.asarray(values, dtype=np.float64)
+    stats = {f"p{p}": round(float(np.percentile(data, p)), 1) for p in PERCENTILES}
+    stats["mean"] = round(float(data.mean()), 1)
+    stats["max"] = round(float(data.max()), 1)
+    return stats
+
+
+def _latency_report(turns: List[TurnResult]) -> Dict[str, Any]:
+    ok = [turn for turn in turns if turn.ok]
+    return {
+        "turns": len(turns),
+        "ok": len(ok),
+        "first_byte_ms": _percentiles([turn.first_byte_ms() for turn in ok]),
+        "last_byte_ms": _percentiles([turn.last_byte_ms() for turn in ok]),
+    }
+
+
+def build_report(results: List[TurnResult], wall_s: float, audio_s: float, args: argparse.Namespace) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "config": {
+            key: (str(value) if isinstance(value, Path) else value)
+            for key, value in vars(args).items()
+            if key != "output"
+        },
+        "wall_s": round(wall_s, 2),
+        **_latency_report(results),
+        "failed": len([turn for turn in results if not turn.ok]),
+        "errors": dict(Counter(turn.error for turn in results if turn.error)),
+        "by_kind": {},
+    }
+    for kind in ("audio", "text"):
+        for spoken in (True, False):
+            subset = [turn for turn in results if turn.kind == kind and turn.spoken == spoken]
+            if subset:
+                report["by_kind"][f"{kind}{'' if spoken else '_skip_tts'}"] = _latency_report(subset)
+    ok = [turn for turn in results if turn.ok]
+    uplink_s = audio_s * len([turn for turn in results if turn.kind == "audio"])
+    report["throughput"] = {
+        "turns_per_s": round(len(ok) / wall_s, 3) if wall_s else 0.0,
+        "uplink_audio_s_per_s": round(uplink_s / wall_s, 2) if wall_s else 0.0,
+        "tts_bytes_per_s": round(sum(turn.tts_bytes for turn in ok) / wall_s) if wall_s else 0,
+    }
+    return report
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    audio = _load_wav(args.wav_path)
+    pcm, sample_rate, channels, bits_per_sample = audio
+    audio_s = len(pcm) / (sample_rate * channels * (bits_per_sample // 8))
+    results: List[TurnResult] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(_run_session(index, audio, args, results) for index in range(args.sessions)))
+    return build_report(results, time.perf_counter() - started, audio_s, args)
+
+
+def main() -> None:
+    args = _parse_args()
+    try:
+        report = asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        print("Interrupted by user", file=sys.stderr)
+        return
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
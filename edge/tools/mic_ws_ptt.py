@@ -15,6 +15,7 @@ import websockets
 from pynput import keyboard, mouse
 
 from speaking_stone_edge import protocol
+from speaking_stone_edge.tts_stream import split_tts_chunk
 
 TARGET_SAMPLE_RATE = 16000
 TARGET_CHANNELS = 1
@@ -84,8 +85,10 @@ async def _listen_for_responses(
             if isinstance(message, str):
                 print(f"<< text: {message}")
             else:
-                print(f"<< received {len(message)} bytes (likely TTS chunk)")
-                collected.extend(message)
+                header, payload = split_tts_chunk(message)
+                last = " last" if header.flags & protocol.FLAG_LAST_CHUNK else ""
+                print(f"<< TTS chunk seq={header.sequence} bytes={len(payload)}{last}")
+                collected.extend(payload)
     except websockets.ConnectionClosed:
         print("<< connection closed by server")
     finally:
@@ -0,0 +1,85 @@
+// Speaking Stone wire protocol shared with the edge service.
+// Keep aligned with shared/protocol.md and edge/speaking_stone_edge/protocol.py.
+#pragma once
+
+#include <stdint.h>
+
+// Binary audio frame header: little-endian `<HHHBBH>`, 10 bytes, followed by `payload_len` bytes.
+typedef struct __attribute__((packed)) {
+    uint16_t sequence;
+    uint16_t payload_len;
+    uint16_t sample_rate;
+    uint8_t channels;
+    uint8_t bits_per_sample;
+    uint16_t flags;
+} ss_frame_header_t;
+
+#define SS_HEADER_SIZE 10
+
+// Slim uplink header, used after the stream_start control event has fixed sample_rate,
+// channels and bits_per_sample for the connection. Downlink frames keep the full header.
+typedef struct __attribute__((packed)) {
+    uint16_t sequence;
+    uint16_t payload_len;
+    uint16_t flags;
+} ss_slim_header_t;
+
+#define SS_SLIM_HEADER_SIZE 6
+
+// ss_frame_header_t.flags bits.
+#define SS_FLAG_LAST_CHUNK 0x0001  // downlink: final TTS chunk of a reply
+#define SS_FLAG_SUPERFRAME 0x0002  // uplink: several PCM frames in one message (see below)
+#define SS_FLAG_ADPCM      0x0004  // uplink: IMA-ADPCM payload, bits_per_sample = 4 (see below)
+#define SS_FLAG_CONTROL    0x8000  // compact control message (see below)
+
+// Superframe payload (after the header, header.payload_len bytes in total):
+//   uint16_t count; ss_superframe_entry_t entries[count]; then the frames' PCM back to back.
+// The header's sequence is the first packed frame's, and its audio fields apply to all frames.
+typedef struct __attribute__((packed)) {
+    uint16_t sequence;
+    uint16_t length;
+} ss_superframe_entry_t;
+
+// IMA-ADPCM uplink (4:1): each frame (or each packed superframe frame) is one block,
+// a block header followed by 4-bit codes, low nibble first, two samples per byte.
+// Mono only. predictor/step_index are the encoder state before the block's first sample;
+// carry step_index from block to block for best quality.
+typedef struct __attribute__((packed)) {
+    int16_t predictor;
+    uint8_t step_index;  // 0..88
+    uint8_t reserved;
+} ss_adpcm_block_header_t;
+
+#define SS_ADPCM_BITS_PER_SAMPLE 4
+
+// Compact control messages (negotiated with `/ws/audio?encoding=msgpack`).
+// A binary frame whose header has SS_FLAG_CONTROL set carries a control event instead of PCM:
+//   sequence    = event id (SS_EVENT_*)
+//   payload_len = length of the MessagePack map that follows
+//   sample_rate, channels, bits_per_sample = 0
+// SS_EVENT_NAMED means the map carries the event name under the "event" key.
+#define SS_EVENT_NAMED               0
+
+// edge -> firmware
+#define SS_EVENT_CONNECTED           1
+#define SS_EVENT_ACK                 2
+#define SS_EVENT_NOOP                3
+#define SS_EVENT_ERROR               4
+#define SS_EVENT_TRANSCRIPTION_READY 5
+#define SS_EVENT_TTS_END             6
+#define SS_EVENT_PARTIAL_TRANSCRIPT  7
+#define SS_EVENT_ENDPOINT_DETECTED   8
+#define SS_EVENT_TURN_CANCELLED      9   // {"reason", "kind", "elapsed_ms"}: stop playback, drop queued audio
+
+// firmware -> edge
+#define SS_EVENT_SPEECH_END          32
+#define SS_EVENT_RESET_BUFFER        33
+#define SS_EVENT_TEXT_INPUT          34
+#define SS_EVENT_STREAM_START        35  // {"sample_rate", "channels", "bits_per_sample"}
+#define SS_EVENT_CANCEL              36  // abort the reply in flight
+
+static inline int
+ss_is_control_frame(const ss_frame_header_t *header)
+{
+    return (header->flags & SS_FLAG_CONTROL) != 0;
+}